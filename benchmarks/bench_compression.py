@@ -0,0 +1,94 @@
+#!/usr/bin/env python
+# See COPYRIGHT file at the top of the source tree.
+"""Compare file size and read/write throughput of Job JSON files across
+compression codecs and the compact and indented formats.
+
+Usage::
+
+    python benchmarks/bench_compression.py [--array-size N] [--output FILE]
+"""
+from __future__ import print_function, division
+
+import argparse
+import json
+import os
+import shutil
+import tempfile
+import time
+
+from lsst.validate.base import Job
+from lsst.validate.base.compression import encode_json
+
+from synthetic import make_job
+
+
+CODECS = [(None, '.json'), ('gzip', '.json.gz'), ('bz2', '.json.bz2'),
+          ('lzma', '.json.xz')]
+
+
+def run(job, repeat=3):
+    """Benchmark every codec and format on ``job``.
+
+    Returns
+    -------
+    results : `list` of `dict`
+        One result per (codec, format) combination.
+    """
+    raw_bytes = len(encode_json(job.json).encode('utf-8'))
+    tmp_dir = tempfile.mkdtemp()
+    results = []
+    try:
+        for compact in (False, True):
+            for compression, ext in CODECS:
+                path = os.path.join(tmp_dir, 'job' + ext)
+                write_times = []
+                read_times = []
+                for _ in range(repeat):
+                    start = time.perf_counter()
+                    job.write_json(path, compact=compact)
+                    write_times.append(time.perf_counter() - start)
+                    start = time.perf_counter()
+                    Job.read_json(path)
+                    read_times.append(time.perf_counter() - start)
+                size = os.path.getsize(path)
+                results.append({
+                    'compression': compression or 'none',
+                    'compact': compact,
+                    'bytes': size,
+                    'ratio': raw_bytes / size,
+                    'write_s': min(write_times),
+                    'read_s': min(read_times),
+                    'write_MBps': raw_bytes / min(write_times) / 1e6,
+                    'read_MBps': raw_bytes / min(read_times) / 1e6})
+    finally:
+        shutil.rmtree(tmp_dir)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--measurements', type=int, default=20)
+    parser.add_argument('--blobs', type=int, default=2)
+    parser.add_argument('--array-size', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--output', help='Write results as JSON to this file')
+    args = parser.parse_args()
+
+    job = make_job(n_measurements=args.measurements, n_blobs=args.blobs,
+                   array_size=args.array_size)
+    results = run(job, repeat=args.repeat)
+
+    print('{0:>11} {1:>8} {2:>12} {3:>6} {4:>11} {5:>11}'.format(
+        'compression', 'compact', 'bytes', 'ratio', 'write MB/s',
+        'read MB/s'))
+    for r in results:
+        print('{compression:>11} {compact!s:>8} {bytes:>12d} {ratio:>6.1f} '
+              '{write_MBps:>11.1f} {read_MBps:>11.1f}'.format(**r))
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
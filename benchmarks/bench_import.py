@@ -0,0 +1,75 @@
+#!/usr/bin/env python
+# See COPYRIGHT file at the top of the source tree.
+"""Measure the import time of lsst.validate.base in fresh interpreters.
+
+Each statement runs in a new Python process, and its time is reported
+relative to the startup time of an empty interpreter.
+
+Usage::
+
+    python benchmarks/bench_import.py [--repeat N] [--max-ms MS]
+        [--output FILE]
+
+With ``--max-ms``, the exit status is 1 if importing the package takes longer
+than ``MS`` milliseconds.
+"""
+from __future__ import print_function, division
+
+import argparse
+import json
+import subprocess
+import sys
+import time
+
+
+STATEMENTS = [
+    ('package', 'import lsst.validate.base'),
+    ('classes', 'import lsst.validate.base as b; '
+                'b.Job, b.Metric, b.MeasurementBase, b.BlobBase, b.Datum'),
+    ('first use', 'import lsst.validate.base as b; '
+                  'import astropy.units as u; b.Datum(1. * u.mag).json'),
+]
+"""Statements to time, as ``(name, code)`` pairs."""
+
+
+def time_statement(code, repeat):
+    """Best wall time, in seconds, of running ``code`` in a new
+    interpreter.
+    """
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.check_call([sys.executable, '-c', code])
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=10)
+    parser.add_argument('--max-ms', type=float,
+                        help='Maximum import time of the package')
+    parser.add_argument('--output', help='Write results as JSON to this file')
+    args = parser.parse_args()
+
+    baseline = time_statement('pass', args.repeat)
+    results = []
+    print('{0:<10} {1:>8}'.format('statement', 'ms'))
+    for name, code in STATEMENTS:
+        ms = (time_statement(code, args.repeat) - baseline) * 1e3
+        results.append({'statement': name, 'code': code, 'ms': ms})
+        print('{0:<10} {1:>8.1f}'.format(name, ms))
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'interpreter_ms': baseline * 1e3, 'results': results},
+                      f, indent=2)
+
+    if args.max_ms is not None and results[0]['ms'] > args.max_ms:
+        print('Importing the package takes {0:.1f} ms, more than '
+              '{1:.1f} ms'.format(results[0]['ms'], args.max_ms))
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
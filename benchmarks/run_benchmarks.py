@@ -0,0 +1,293 @@
+#!/usr/bin/env python
+# See COPYRIGHT file at the top of the source tree.
+"""Benchmark the serialization and deserialization throughput of jobs,
+metrics and datums.
+
+Each benchmark runs on synthetic jobs and metric catalogs of several sizes
+(cases), and reports its best time, throughput in objects/s and MB/s, and
+peak memory allocated (measured in a separate, traced run). Results can be
+saved as JSON and compared against the results of another revision.
+
+Usage::
+
+    python benchmarks/run_benchmarks.py [--cases small medium]
+        [--output results.json] [--compare baseline.json]
+
+With ``--compare``, the exit status is 1 if any benchmark is slower than the
+baseline by more than ``--threshold``.
+"""
+from __future__ import print_function, division
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+import astropy
+import numpy as np
+import yaml
+
+from lsst.validate.base import Datum, Job, ResourceMonitor, load_metrics
+
+from synthetic import make_job, make_metrics_doc
+
+
+CASES = {
+    'small': {'n_measurements': 12, 'n_blobs': 1, 'array_size': 1000,
+              'n_metrics': 2},
+    'medium': {'n_measurements': 60, 'n_blobs': 4, 'array_size': 10000,
+               'n_metrics': 10},
+    'large': {'n_measurements': 240, 'n_blobs': 8, 'array_size': 100000,
+              'n_metrics': 40},
+}
+"""Parameters of the synthetic data of each case."""
+
+
+def _json_bytes(doc):
+    return len(json.dumps(doc).encode('utf-8'))
+
+
+def bench_job_json(params, tmp_dir):
+    """Serialize a job with `Job.json`."""
+    job = make_job(**params)
+    n_objects = params['n_measurements'] + params['n_blobs']
+    return (lambda: job.json), n_objects, _json_bytes(job.json)
+
+
+def bench_job_from_json(params, tmp_dir):
+    """Deserialize a job with `Job.from_json`."""
+    doc = make_job(**params).json
+    n_objects = params['n_measurements'] + params['n_blobs']
+    return (lambda: Job.from_json(doc)), n_objects, _json_bytes(doc)
+
+
+def bench_datum_from_json(params, tmp_dir):
+    """Deserialize the array datums of a job's blobs with
+    `Datum.from_json`.
+    """
+    doc = make_job(**params).json
+    datum_docs = [d for blob_doc in doc['blobs']
+                  for d in blob_doc['data'].values()]
+
+    def run():
+        for d in datum_docs:
+            Datum.from_json(d)
+
+    return run, len(datum_docs), _json_bytes(datum_docs)
+
+
+def bench_load_metrics(params, tmp_dir):
+    """Load a metric YAML catalog with `load_metrics`."""
+    path = os.path.join(tmp_dir, 'metrics.yaml')
+    with open(path, 'w') as f:
+        yaml.safe_dump(make_metrics_doc(params['n_metrics']), f)
+    return (lambda: load_metrics(path)), params['n_metrics'], \
+        os.path.getsize(path)
+
+
+def bench_get_spec(params, tmp_dir):
+    """Look up every filter-dependent specification of a metric catalog with
+    `Metric.get_spec`.
+    """
+    path = os.path.join(tmp_dir, 'metrics.yaml')
+    with open(path, 'w') as f:
+        yaml.safe_dump(make_metrics_doc(params['n_metrics']), f)
+    metrics = list(load_metrics(path).values())
+    lookups = [(metric, level, filter_name)
+               for metric in metrics
+               for level in ('design', 'minimum', 'stretch')
+               for filter_name in 'ugrizy']
+
+    def run():
+        for metric, level, filter_name in lookups:
+            metric.get_spec(level, filter_name=filter_name)
+
+    return run, len(lookups), None
+
+
+BENCHMARKS = [
+    ('Job.json', bench_job_json),
+    ('Job.from_json', bench_job_from_json),
+    ('Datum.from_json', bench_datum_from_json),
+    ('load_metrics', bench_load_metrics),
+    ('Metric.get_spec', bench_get_spec),
+]
+"""Benchmarks, as ``(name, setup)`` pairs. ``setup(params, tmp_dir)``
+returns the function to time, the number of objects it processes and the
+number of bytes it processes (`None` if not applicable).
+"""
+
+
+def run_benchmark(setup, params, repeat=5):
+    """Time a benchmark and measure its peak memory.
+
+    Returns
+    -------
+    result : `dict`
+        ``seconds`` (best of ``repeat`` runs), ``objects``, ``bytes``,
+        ``objects_per_s``, ``MBps`` and ``peak_memory`` (bytes).
+    """
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        func, n_objects, n_bytes = setup(params, tmp_dir)
+        times = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            func()
+            times.append(time.perf_counter() - start)
+        # Tracing memory slows allocations, so it gets its own run
+        with ResourceMonitor() as monitor:
+            func()
+    finally:
+        shutil.rmtree(tmp_dir)
+    seconds = min(times)
+    return {'seconds': seconds,
+            'objects': n_objects,
+            'bytes': n_bytes,
+            'objects_per_s': n_objects / seconds,
+            'MBps': n_bytes / seconds / 1e6 if n_bytes is not None else None,
+            'peak_memory': monitor.peak_memory}
+
+
+def _git_revision():
+    """Git revision of the working tree, or `None` outside of a git
+    repository.
+    """
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', 'HEAD'],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            stderr=subprocess.DEVNULL).decode('ascii').strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(cases, names=None, repeat=5):
+    """Run benchmarks.
+
+    Parameters
+    ----------
+    cases : `list` of `str`
+        Names of the cases (see `CASES`) to run.
+    names : `list` of `str`, optional
+        Names of the benchmarks to run. By default all benchmarks run.
+    repeat : `int`, optional
+        Number of timed runs of each benchmark.
+
+    Returns
+    -------
+    results : `dict`
+        ``metadata`` about the run, and a list of ``results``.
+    """
+    results = []
+    for case in cases:
+        params = CASES[case]
+        for name, setup in BENCHMARKS:
+            if names and name not in names:
+                continue
+            result = {'case': case, 'benchmark': name, 'params': params}
+            result.update(run_benchmark(setup, params, repeat=repeat))
+            results.append(result)
+            print_result(result)
+    metadata = {
+        'revision': _git_revision(),
+        'timestamp': datetime.datetime.utcnow().isoformat(),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'astropy': astropy.__version__,
+        'platform': platform.platform(),
+        'repeat': repeat}
+    return {'metadata': metadata, 'results': results}
+
+
+def print_header():
+    print('{0:<8} {1:<16} {2:>10} {3:>12} {4:>9} {5:>12}'.format(
+        'case', 'benchmark', 'seconds', 'objects/s', 'MB/s',
+        'peak MiB'))
+
+
+def print_result(r):
+    mbps = '{0:>9.1f}'.format(r['MBps']) if r['MBps'] is not None \
+        else '{0:>9}'.format('-')
+    print('{0:<8} {1:<16} {2:>10.5f} {3:>12.1f} {4} {5:>12.1f}'.format(
+        r['case'], r['benchmark'], r['seconds'], r['objects_per_s'], mbps,
+        r['peak_memory'] / 1024 ** 2))
+
+
+def compare(results, baseline, threshold=0.1):
+    """Compare benchmark results with a baseline.
+
+    Parameters
+    ----------
+    results : `dict`
+        Results, as returned by `run`.
+    baseline : `dict`
+        Baseline results, as returned by `run`.
+    threshold : `float`, optional
+        Relative slowdown above which a benchmark is a regression.
+
+    Returns
+    -------
+    regressions : `list` of `dict`
+        Results of the benchmarks that regressed.
+    """
+    base = {(r['case'], r['benchmark']): r for r in baseline['results']}
+    print('\nComparison with revision {0}'.format(
+        baseline['metadata'].get('revision')))
+    print('{0:<8} {1:<16} {2:>10} {3:>10} {4:>8} {5:>10}'.format(
+        'case', 'benchmark', 'base s', 'new s', 'time', 'memory'))
+    regressions = []
+    for r in results['results']:
+        b = base.get((r['case'], r['benchmark']))
+        if b is None:
+            continue
+        time_ratio = r['seconds'] / b['seconds']
+        memory_ratio = r['peak_memory'] / b['peak_memory'] \
+            if b['peak_memory'] else float('nan')
+        flag = ''
+        if time_ratio > 1. + threshold:
+            flag = '  REGRESSION'
+            regressions.append(r)
+        print('{0:<8} {1:<16} {2:>10.5f} {3:>10.5f} {4:>7.2f}x {5:>9.2f}x'
+              '{6}'.format(r['case'], r['benchmark'], b['seconds'],
+                           r['seconds'], time_ratio, memory_ratio, flag))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--cases', nargs='+', default=['small', 'medium'],
+                        choices=sorted(CASES))
+    parser.add_argument('--benchmarks', nargs='+',
+                        choices=[name for name, _ in BENCHMARKS],
+                        help='Benchmarks to run (default: all)')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--output', help='Write results as JSON to this file')
+    parser.add_argument('--compare',
+                        help='Compare with results saved by --output')
+    parser.add_argument('--threshold', type=float, default=0.1,
+                        help='Relative slowdown reported as a regression')
+    args = parser.parse_args()
+
+    print_header()
+    results = run(args.cases, names=args.benchmarks, repeat=args.repeat)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if compare(results, baseline, threshold=args.threshold):
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
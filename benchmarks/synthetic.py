@@ -0,0 +1,125 @@
+# See COPYRIGHT file at the top of the source tree.
+"""Synthetic, representative jobs for benchmarks."""
+from __future__ import print_function, division
+
+import numpy as np
+import astropy.units as u
+
+from lsst.validate.base import (BlobBase, Job, MeasurementBase, Metric,
+                                Specification)
+
+
+class SyntheticBlob(BlobBase):
+    """Blob with per-star catalog columns, like a matched-source catalog."""
+
+    name = 'SyntheticBlob'
+
+    def __init__(self, rng, array_size):
+        BlobBase.__init__(self)
+        self.register_datum('mag', quantity=rng.normal(20., 2., array_size) * u.mag,
+                            description='Magnitudes')
+        self.register_datum('mag_err', quantity=rng.lognormal(-4., 1., array_size) * u.mag,
+                            description='Magnitude uncertainties')
+        self.register_datum('dist', quantity=rng.exponential(10., array_size) * u.marcsec,
+                            description='Separations')
+        self.register_datum('snr', quantity=rng.uniform(5., 500., array_size) * u.dimensionless_unscaled,
+                            description='Signal to noise ratios')
+
+
+class SyntheticMeasurement(MeasurementBase):
+    """Measurement with parameters, extras and linked blobs."""
+
+    def __init__(self, metric, value, blobs, filter_name=None):
+        MeasurementBase.__init__(self)
+        self.metric = metric
+        self.quantity = value
+        self.filter_name = filter_name
+        for i, blob in enumerate(blobs):
+            setattr(self, 'blob{0:d}'.format(i), blob)
+        self.register_parameter('num_random_shuffles', 50,
+                                description='Number of random shuffles')
+        self.register_parameter('bright_snr', quantity=100. * u.dimensionless_unscaled,
+                                description='Minimum SNR of bright stars')
+        self.register_extra('rms', quantity=value * 1.1, description='RMS')
+
+
+def make_metric(name):
+    """Make a metric with design, minimum and stretch specifications."""
+    return Metric(name, 'Synthetic metric {0}'.format(name), '<=',
+                  specs=[Specification('design', 5., 'mmag'),
+                         Specification('minimum', 8., 'mmag'),
+                         Specification('stretch', 3., 'mmag')],
+                  reference_doc='LPM-17', reference_page=21)
+
+
+def make_metrics_doc(n_metrics):
+    """Make a metric YAML document, as read by
+    `lsst.validate.base.load_metrics`.
+
+    Each metric has filter-dependent ``design``, ``minimum`` and ``stretch``
+    specifications, like ``PA1`` in LPM-17.
+
+    Parameters
+    ----------
+    n_metrics : `int`
+        Number of metrics in the document.
+
+    Returns
+    -------
+    doc : `dict`
+        YAML document, keyed by metric name.
+    """
+    doc = {}
+    for i in range(n_metrics):
+        specs = []
+        for level, value in (('design', 5.), ('minimum', 8.),
+                             ('stretch', 3.)):
+            specs.append({'level': level, 'value': value, 'unit': 'mmag',
+                          'filter_names': ['g', 'r', 'i']})
+            specs.append({'level': level, 'value': value * 1.5,
+                          'unit': 'mmag', 'filter_names': ['u', 'z', 'y']})
+        doc['PA{0:d}'.format(i + 1)] = {
+            'reference': {'doc': 'LPM-17', 'url': 'http://ls.st/lpm-17',
+                          'page': 21},
+            'description': 'Synthetic metric {0:d}'.format(i + 1),
+            'operator': '<=',
+            'parameters': {'num_random_shuffles': {'value': 50}},
+            'specs': specs}
+    return doc
+
+
+def make_job(n_measurements=20, n_blobs=2, array_size=10000, n_metrics=None,
+             seed=0):
+    """Make a synthetic `Job`.
+
+    Parameters
+    ----------
+    n_measurements : `int`
+        Number of measurements, spread over ``ugrizy`` filters.
+    n_blobs : `int`
+        Number of blobs, each shared by all measurements.
+    array_size : `int`
+        Length of each of the four array datums of every blob.
+    n_metrics : `int`, optional
+        Number of distinct metrics in the job's metric catalog. Consecutive
+        groups of six measurements (one per filter) share a metric, cycling
+        through the catalog. By default every group has its own metric.
+    seed : `int`
+        Random seed.
+
+    Returns
+    -------
+    job : `lsst.validate.base.Job`
+        The job.
+    """
+    if n_metrics is None:
+        n_metrics = max((n_measurements + 5) // 6, 1)
+    rng = np.random.RandomState(seed)
+    metrics = [make_metric('PA{0:d}'.format(i + 1)) for i in range(n_metrics)]
+    blobs = [SyntheticBlob(rng, array_size) for _ in range(n_blobs)]
+    measurements = []
+    for i in range(n_measurements):
+        measurements.append(SyntheticMeasurement(
+            metrics[(i // 6) % n_metrics], rng.uniform(1., 10.) * u.mmag,
+            blobs, filter_name='ugrizy'[i % 6]))
+    return Job(measurements=measurements)
@@ -1,6 +1,9 @@
 # See COPYRIGHT file at the top of the source tree.
 """Framework for measuring and defining performance metrics that can be
 submitted to the SQUASH service.
+
+Submodules are imported lazily, when one of their names is first accessed
+as an attribute of the package, so that importing the package is fast.
 """
 
 try:
@@ -9,10 +12,63 @@ try:
 except:
     __version__ = "unknown"
 
+import importlib
+
 from .errors import *  # noqa: F403
-from .datum import *  # noqa: F403
-from .spec import *  # noqa: F403
-from .metric import *  # noqa: F403
-from .measurement import *  # noqa: F403
-from .blob import *  # noqa: F403
-from .job import *  # noqa: F403
+
+# Public names of each submodule, which must match the submodule's __all__
+_SUBMODULE_NAMES = {
+    'errors': ['ValidateError', 'ValidateSpecificationError',
+               'SquashUploadError', 'BlobStoreMissingError'],
+    'datum': ['Datum', 'QuantityAttributeMixin'],
+    'encoding': ['EncodingPolicy', 'Float32Encoding',
+                 'SignificantDigitsEncoding', 'QuantizedEncoding',
+                 'decode_array'],
+    'growable': ['GrowableDatum'],
+    'summary': ['DatumSummary'],
+    'preview': ['decimate'],
+    'spec': ['Specification'],
+    'metric': ['Metric', 'load_metrics'],
+    'instrument': ['MeasurementProfile', 'ResourceMonitor',
+                   'aggregate_profiles'],
+    'measurement': ['MeasurementBase', 'DeserializedMeasurement'],
+    'blob': ['BlobBase', 'DeserializedBlob'],
+    'blobstore': ['BlobStore'],
+    'job': ['Job'],
+    'container': ['write_job_container', 'JobContainer'],
+    'jobstore': ['JobStore'],
+    'jobdiff': ['MeasurementDiff', 'JobDiff', 'diff_jobs'],
+    'timeseries': ['MetricSeries', 'extract_metric_series'],
+    'regression': ['Regression', 'detect_regressions',
+                   'detect_catalog_regressions'],
+    'sketch': ['QuantileSketch', 'MetricSketch', 'SketchKey',
+               'SketchCollection', 'build_sketches'],
+    'squash': ['SquashUploader', 'LocalSquashServer'],
+    'aio': ['write_job_json_async', 'read_job_json_async',
+            'upload_job_async'],
+    'memo': ['MeasurementCache'],
+    'profiling': ['SerializationProfiler', 'profiled'],
+    'executor': ['MeasurementTask', 'MeasurementExecutor'],
+    'pickling': ['dumps', 'loads', 'SharedObject'],
+}
+
+_NAME_SUBMODULES = {name: submodule
+                    for submodule, names in _SUBMODULE_NAMES.items()
+                    for name in names}
+
+__all__ = [name for names in _SUBMODULE_NAMES.values() for name in names]
+
+
+def __getattr__(name):
+    try:
+        submodule = _NAME_SUBMODULES[name]
+    except KeyError:
+        raise AttributeError('module {0!r} has no attribute {1!r}'.format(
+            __name__, name))
+    value = getattr(importlib.import_module('.' + submodule, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
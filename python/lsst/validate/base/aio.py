@@ -0,0 +1,153 @@
+# See COPYRIGHT file at the top of the source tree.
+"""asyncio API for writing, reading and uploading jobs.
+
+These coroutines never block the event loop. Building and parsing `Job`
+objects, and file and network I/O, run in the loop's default (thread)
+executor. JSON encoding and decoding, the CPU-heavy steps, run in a
+configurable ``executor``; pass a `concurrent.futures.ProcessPoolExecutor` to
+encode and decode several jobs in parallel.
+"""
+from __future__ import print_function, division
+
+import asyncio
+import json
+
+from .compression import (_resolve_compression, compress_bytes,
+                          decompress_bytes, encode_json)
+from .job import Job
+
+
+__all__ = ['write_job_json_async', 'read_job_json_async',
+           'upload_job_async']
+
+
+def _encode_json(json_doc, compression, compact):
+    data = encode_json(json_doc, compact=compact).encode('utf-8')
+    return compress_bytes(data, compression)
+
+
+def _decode_json(data, compression):
+    return json.loads(decompress_bytes(data, compression).decode('utf-8'))
+
+
+def _write_bytes(filepath, data):
+    with open(filepath, 'wb') as f:
+        f.write(data)
+
+
+def _read_bytes(filepath):
+    with open(filepath, 'rb') as f:
+        return f.read()
+
+
+def _job_json(job):
+    return job.json if isinstance(job, Job) else job
+
+
+def _job_file_json(job):
+    """Document that `Job.write_json` would write."""
+    if isinstance(job, Job) and job.blob_store is not None:
+        return job.reference_json
+    return _job_json(job)
+
+
+async def write_job_json_async(job, filepath, executor=None,
+                               compression='infer', compact=False):
+    """Write a job's JSON document to a file without blocking the event
+    loop.
+
+    The file has the same content as one written by `Job.write_json`,
+    including blobs written into the job's `~Job.blob_store`.
+
+    Parameters
+    ----------
+    job : `Job` or `dict`
+        A `Job`, or a `Job` JSON document (as produced by `Job.json`).
+    filepath : `str`
+        Destination file name for JSON output.
+    executor : `concurrent.futures.Executor`, optional
+        Executor that encodes (and compresses) the JSON document. The loop's
+        default executor is used by default.
+    compression : `str`, optional
+        Compression codec: ``'gzip'``, ``'bz2'``, ``'lzma'`` or `None`. By
+        default the codec is inferred from the extension of ``filepath``.
+    compact : `bool`, optional
+        If `True`, write JSON without indentation or whitespace, and without
+        sorting keys.
+
+    Raises
+    ------
+    ValueError
+        Raised if ``compression`` is unknown, before anything is written.
+    """
+    # Checked before any work, so that unknown codecs raise the same error
+    # as the synchronous functions
+    compression = _resolve_compression(filepath, compression)
+    loop = asyncio.get_running_loop()
+    if isinstance(job, Job) and job.blob_store is not None:
+        await loop.run_in_executor(None, job.write_blobs)
+    json_doc = await loop.run_in_executor(None, _job_file_json, job)
+    data = await loop.run_in_executor(executor, _encode_json, json_doc,
+                                      compression, compact)
+    await loop.run_in_executor(None, _write_bytes, filepath, data)
+
+
+async def read_job_json_async(filepath, executor=None, compression='infer',
+                              blob_store=None):
+    """Read a job from a JSON file without blocking the event loop.
+
+    Parameters
+    ----------
+    filepath : `str`
+        Path of a `Job` JSON file.
+    executor : `concurrent.futures.Executor`, optional
+        Executor that decompresses and decodes the JSON document. The loop's
+        default executor is used by default.
+    compression : `str`, optional
+        Compression codec: ``'gzip'``, ``'bz2'``, ``'lzma'`` or `None`. By
+        default the codec is inferred from the extension of ``filepath``.
+    blob_store : `BlobStore`, optional
+        Blob store that holds the data of blobs that are only referenced by
+        the file.
+
+    Returns
+    -------
+    job : `Job`
+        Job from the JSON file.
+
+    Raises
+    ------
+    ValueError
+        Raised if ``compression`` is unknown.
+    """
+    # Checked before any work, so that unknown codecs raise the same error
+    # as the synchronous functions
+    compression = _resolve_compression(filepath, compression)
+    loop = asyncio.get_running_loop()
+    data = await loop.run_in_executor(None, _read_bytes, filepath)
+    json_doc = await loop.run_in_executor(executor, _decode_json, data,
+                                          compression)
+    return await loop.run_in_executor(
+        None, lambda: Job.from_json(json_doc, blob_store=blob_store))
+
+
+async def upload_job_async(uploader, job):
+    """Upload a job without blocking the event loop.
+
+    Parameters
+    ----------
+    uploader : `SquashUploader`
+        Uploader connected to the SQUASH service. An uploader can be shared by
+        concurrent uploads; its connection pool bounds the number of open
+        connections.
+    job : `Job` or `dict`
+        A `Job`, or a `Job` JSON document (as produced by `Job.json`).
+
+    Returns
+    -------
+    job_id : `str`
+        Identifier of the job assigned by the SQUASH service.
+    """
+    loop = asyncio.get_running_loop()
+    json_doc = await loop.run_in_executor(None, _job_json, job)
+    return await loop.run_in_executor(None, uploader.upload, json_doc)
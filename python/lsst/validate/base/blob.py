@@ -2,16 +2,27 @@
 from __future__ import print_function, division
 
 import abc
+import hashlib
 import uuid
 
+from .errors import BlobStoreMissingError, ValidateError
 from .jsonmixin import JsonSerializationMixin
 from .datummixin import DatumAttributeMixin
 from .datum import Datum
+from .lazy import lazy_import
+from .preview import DEFAULT_PREVIEW_SIZE, decimate
+from .summary import DatumSummary
+from .profiling import profiled, class_type, instance_type, json_data_size, \
+    result_size
 
 
 __all__ = ['BlobBase', 'DeserializedBlob']
 
 
+np = lazy_import('numpy')
+u = lazy_import('astropy.units')
+
+
 class BlobBase(JsonSerializationMixin, DatumAttributeMixin):
     """Base class for blobs: flexible containers of data that are serialized
     to JSON.
@@ -29,19 +40,55 @@ class BlobBase(JsonSerializationMixin, DatumAttributeMixin):
     subclass. Keys in `datums` and attributes share the same names.
     """
 
+    content_addressed = False
+    """If `True`, the blob's `identifier` is its `content_hash` rather than a
+    random UUID4.
+
+    Blobs with identical contents then share an identifier, so a `Job` (and
+    the `JobStore`) stores them only once. Set this as a class attribute of a
+    `BlobBase` subclass, or on individual instances.
+    """
+
+    encoding = None
+    """Encoding of the blob's floating-point array datums in JSON
+    (`~lsst.validate.base.encoding.EncodingPolicy` or `None`).
+
+    Datums with their own `Datum.encoding` keep it. Set this as a class
+    attribute of a `BlobBase` subclass, or on individual instances.
+    """
+
+    summarize = False
+    """If `True`, `json` and `reference_json` include a `DatumSummary` of
+    each numeric array datum, in a ``summaries`` field.
+
+    Blobs deserialized from these documents answer `summary` queries from
+    the stored summaries, without loading (or, for references, reading)
+    their data. Set this as a class attribute of a `BlobBase` subclass, or
+    on individual instances.
+    """
+
+    _summaries = None
+
+    _preview = None
+
+    _content_hash_cache = None
+
     def __init__(self):
         self.datums = {}
         self._id = uuid.uuid4().hex
 
     def __getattr__(self, key):
-        if key in self.datums:
-            return self.datums[key].quantity
-        else:
-            raise AttributeError("%r object has no attribute %r" %
-                                 (self.__class__, key))
+        # Private and special names are never datums; skipping them keeps
+        # unpickling from loading datums that don't exist yet.
+        if not key.startswith('_'):
+            datums = self.datums
+            if datums is not None and key in datums:
+                return datums[key].quantity
+        raise AttributeError("%r object has no attribute %r" %
+                             (self.__class__, key))
 
     def __setattr__(self, key, value):
-        if key != 'datums' and key in self.datums:
+        if key != 'datums' and not key.startswith('_') and key in self.datums:
             # Setting value of a serialized Datum
             self.datums[key].quantity = value
         else:
@@ -54,37 +101,247 @@ class BlobBase(JsonSerializationMixin, DatumAttributeMixin):
 
     @property
     def identifier(self):
-        """Unique UUID4-based identifier for this blob (`str`)."""
+        """Unique identifier for this blob (`str`).
+
+        The identifier is UUID4-based, unless `content_addressed` is `True`
+        in which case it is the `content_hash`.
+        """
+        if self.content_addressed:
+            return self.content_hash
         return self._id
 
+    @property
+    def content_hash(self):
+        """Hash of the blob's contents (`str`).
+
+        The hash covers the blob's `name` and, for each `Datum`, its name,
+        label, unit and value. Array values are hashed from their raw buffers,
+        along with their dtype and shape. Descriptions are not included.
+
+        The hash is cached until a datum is registered, or a datum's
+        quantity or label is set. Arrays modified in place are not detected:
+        set the datum's quantity again after modifying its array.
+        """
+        state = (self.name, tuple(sorted((k, d._version)
+                                         for k, d in self.datums.items())))
+        if self._content_hash_cache is not None and \
+                self._content_hash_cache[0] == state:
+            return self._content_hash_cache[1]
+        content_hash = self._compute_content_hash()
+        self._content_hash_cache = (state, content_hash)
+        return content_hash
+
+    def _compute_content_hash(self):
+        hasher = hashlib.sha256()
+        hasher.update(repr(self.name).encode('utf-8'))
+        for key in sorted(self.datums):
+            datum = self.datums[key]
+            hasher.update(repr((key, datum.label, datum.unit_str)).encode(
+                'utf-8'))
+            q = datum.quantity
+            if isinstance(q, u.Quantity):
+                value = np.ascontiguousarray(q.value)
+                hasher.update(repr((value.dtype.str, value.shape)).encode(
+                    'utf-8'))
+                hasher.update(value.tobytes())
+            else:
+                hasher.update(repr((type(q).__name__, q)).encode('utf-8'))
+        # Truncated to the length of a UUID4 hex string
+        return hasher.hexdigest()[:32]
+
     @classmethod
-    def from_json(cls, json_data):
+    @profiled('from_json', type_name=class_type, size=json_data_size)
+    def from_json(cls, json_data, blob_store=None):
         """Construct a Blob from a JSON dataset.
 
         Parameters
         ----------
         json_data : `dict`
-            Blob JSON object.
+            Blob JSON object. If the object is a reference to a blob in a
+            `BlobStore` (it has no ``data`` field), the blob's data are read
+            from ``blob_store`` on first access. Summaries in a
+            ``summaries`` field are kept (see `BlobBase.summary`), and so
+            are the decimation details in a ``preview`` field (see
+            `BlobBase.preview_json`).
+        blob_store : `BlobStore`, optional
+            Blob store that holds the data of referenced blobs.
 
         Returns
         -------
         blob : `BlobBase`-type
             Blob from JSON.
         """
-        datums = {k: Datum.from_json(v) for k, v in json_data['data'].items()}
-        return cls(json_data['name'], json_data['identifier'], datums)
+        if 'data' in json_data:
+            datums = {k: Datum.from_json(v)
+                      for k, v in json_data['data'].items()}
+        else:
+            datums = None
+        summaries = json_data.get('summaries')
+        if summaries is not None:
+            summaries = {k: DatumSummary.from_json(v)
+                         for k, v in summaries.items()}
+        return cls(json_data['name'], json_data['identifier'], datums,
+                   blob_store=blob_store, summaries=summaries,
+                   preview=json_data.get('preview'))
+
+    def summary(self, name):
+        """Summary statistics of an array datum.
+
+        Parameters
+        ----------
+        name : `str`
+            Name of the `Datum`.
+
+        Returns
+        -------
+        summary : `DatumSummary`
+            The summary stored with the blob's JSON document if there is one
+            (the blob's data are then not accessed), or else a summary
+            computed from the datum's values.
+
+        Raises
+        ------
+        KeyError
+            Raised if the blob has no such datum.
+        lsst.validate.base.ValidateError
+            Raised if the datum is not a numeric array.
+        """
+        if self._summaries is not None and name in self._summaries:
+            return self._summaries[name]
+        return self.datums[name].summarize()
+
+    @property
+    def summaries(self):
+        """`dict` of the `DatumSummary` of each numeric array datum, keyed
+        by datum name.
+
+        As with `summary`, stored summaries are returned if the blob was
+        deserialized with them.
+        """
+        if self._summaries is not None:
+            return dict(self._summaries)
+        return self._compute_summaries()
+
+    def _compute_summaries(self):
+        return {k: d.summarize() for k, d in self.datums.items()
+                if d.is_numeric_array}
+
+    @property
+    def reference_json(self):
+        """Reference to this blob in a `BlobStore`, as a JSON-serializable
+        `dict` without the blob's data.
+
+        If `summarize` is `True`, the reference includes the blob's
+        ``summaries``.
+        """
+        json_doc = {'identifier': self.identifier, 'name': self.name}
+        if self.summarize:
+            json_doc['summaries'] = {k: s.json
+                                     for k, s in self.summaries.items()}
+        return json_doc
 
     @property
+    @profiled('json', type_name=instance_type, size=result_size)
     def json(self):
         """Job data as a JSON-serializable `dict`."""
-        json_doc = JsonSerializationMixin.jsonify_dict({
-            'identifier': self.identifier,
-            'name': self.name,
-            'data': self.datums})
-        return json_doc
+        data = {k: d._encode_json(d.encoding if d.encoding is not None
+                                  else self.encoding)
+                for k, d in self.datums.items()}
+        json_doc = {'identifier': self.identifier,
+                    'name': self.name,
+                    'data': data}
+        if self.is_preview:
+            json_doc['preview'] = self._preview
+        if self.summarize:
+            # The data are at hand, so summaries are computed afresh, unless
+            # the data are decimated
+            summaries = self.summaries if self.is_preview \
+                else self._compute_summaries()
+            json_doc['summaries'] = {k: s.json
+                                     for k, s in summaries.items()}
+        return JsonSerializationMixin.jsonify_dict(json_doc)
+
+    @property
+    def is_loaded(self):
+        """`True` if the blob's datums are in memory (`bool`).
+
+        Only blobs deserialized from references to a `BlobStore` can be
+        unloaded.
+        """
+        return True
+
+    @property
+    def is_preview(self):
+        """`True` if the blob was deserialized from a preview document (see
+        `preview_json`), whose large array datums are decimated (`bool`).
+        """
+        return self._preview is not None
+
+    def preview_json(self, size=DEFAULT_PREVIEW_SIZE, method='uniform',
+                     seed=0):
+        """Blob as a JSON-serializable `dict`, with decimated arrays.
+
+        Numeric array datums with more than ``size`` rows are decimated (see
+        `~lsst.validate.base.preview.decimate`); other datums are serialized
+        as in `json`. A ``preview`` field records, for each decimated datum,
+        the ``method`` used, the ``length`` of the full array, and the
+        ``indices`` of the selected rows in the full array. The blob keeps
+        its `identifier`, which locates its full data in a `BlobStore` or
+        `JobContainer`. The preview also has summaries of the full arrays
+        (see `summary`): of all array datums if `summarize` is `True`, and
+        otherwise of the decimated ones.
+
+        Parameters
+        ----------
+        size : `int`, optional
+            Maximum number of rows of array datums.
+        method : `str`, optional
+            Decimation method: ``'uniform'``, ``'random'`` or
+            ``'envelope'``.
+        seed : `int`, optional
+            Seed of the ``'random'`` method.
+
+        Returns
+        -------
+        json_data : `dict`
+            Preview of the blob, which `DeserializedBlob.from_json` reads as
+            a blob whose `is_preview` is `True`.
+
+        Raises
+        ------
+        lsst.validate.base.ValidateError
+            Raised if the blob is already a preview, or if the method is
+            unknown.
+        """
+        if self.is_preview:
+            raise ValidateError('Blob {0!r} is already a preview'.format(
+                self.identifier))
+        data = {}
+        preview = {}
+        for k, d in self.datums.items():
+            encoding = d.encoding if d.encoding is not None else self.encoding
+            if d.is_numeric_array:
+                q, indices, used_method = decimate(d.quantity, size=size,
+                                                   method=method, seed=seed)
+                if indices is not None:
+                    preview[k] = {'method': used_method,
+                                  'length': len(d.quantity),
+                                  'indices': indices.tolist()}
+                    d = Datum(q, label=d.label, description=d.description)
+            data[k] = d._encode_json(encoding)
+        json_doc = {'identifier': self.identifier,
+                    'name': self.name,
+                    'data': data,
+                    'preview': preview}
+        if self.summarize:
+            summaries = self.summaries
+        else:
+            summaries = {k: self.summary(k) for k in preview}
+        json_doc['summaries'] = {k: s.json for k, s in summaries.items()}
+        return JsonSerializationMixin.jsonify_dict(json_doc)
 
     def register_datum(self, name, quantity=None, label=None,
-                       description=None, datum=None):
+                       description=None, datum=None, encoding=None):
         """Register a new `Datum` to be contained by, and serialized via,
         this blob.
 
@@ -116,22 +373,99 @@ class BlobBase(JsonSerializationMixin, DatumAttributeMixin):
         datum : `Datum`, optional
             If a `Datum` is provided, its value, units and label will be
             used unless overriden by other arguments to `register_datum`.
+            A `GrowableDatum` is registered itself rather than copied, so
+            that values appended to it later are serialized with the blob.
+        encoding : `~lsst.validate.base.encoding.EncodingPolicy`, optional
+            Encoding of the `Datum`'s values in JSON, overriding the blob's
+            `encoding`.
         """
         self._register_datum_attribute(self.datums, name,
                                        quantity=quantity, label=label,
-                                       description=description, datum=datum)
+                                       description=description, datum=datum,
+                                       encoding=encoding)
 
 
 class DeserializedBlob(BlobBase):
     """A concrete Blob deserialized from JSON.
 
+    If the blob was deserialized from a reference to a `BlobStore`, its
+    `datums` are read from the store the first time they are accessed (for
+    example, through an attribute). If it was deserialized from a preview
+    (see `BlobBase.preview_json`), `load_full_data` reads its full data from
+    the store.
+
     This class should only be used internally.
     """
 
     name = None
 
-    def __init__(self, name, id_, datums):
+    _datums = None
+
+    _blob_store = None
+
+    def __init__(self, name, id_, datums, blob_store=None, summaries=None,
+                 preview=None):
         BlobBase.__init__(self)
+        self._preview = preview
         self.name = name
         self._id = id_
+        self._blob_store = blob_store
+        if summaries is not None:
+            # Serialized again with its summaries. Set before the datums,
+            # which setting attributes would otherwise load.
+            self._summaries = summaries
+            self.summarize = True
         self.datums = datums
+
+    def __getattr__(self, key):
+        # Checked before delegating, since the datums property raising an
+        # AttributeError falls back to __getattr__
+        if self._datums is None and self._blob_store is None and \
+                not key.startswith('_'):
+            raise BlobStoreMissingError(
+                '{0!r} object has no attribute {1!r}: blob {2!r} is a '
+                'reference, but no blob store was provided'.format(
+                    self.__class__, key, self._id))
+        return BlobBase.__getattr__(self, key)
+
+    @property
+    def datums(self):
+        """`dict` of `Datum` instances contained by the blob instance.
+
+        Accessing the datums of a reference reads them from the blob store,
+        and raises `BlobStoreMissingError` if the blob has no blob store.
+        """
+        if self._datums is None:
+            self._datums = self._load_datums()
+        return self._datums
+
+    @datums.setter
+    def datums(self, value):
+        self._datums = value
+
+    @property
+    def is_loaded(self):
+        """`True` if the blob's datums are in memory (`bool`)."""
+        return self._datums is not None
+
+    def load_full_data(self):
+        """Replace the decimated datums of a preview (see `is_preview`)
+        with the full-resolution data, read from the blob store.
+
+        Raises
+        ------
+        lsst.validate.base.BlobStoreMissingError
+            Raised if the blob has no blob store.
+        """
+        if self.is_preview:
+            self._datums = self._load_datums()
+            self._preview = None
+
+    def _load_datums(self):
+        """Read the datums of a referenced blob from its blob store."""
+        if self._blob_store is None:
+            raise BlobStoreMissingError(
+                'Blob {0!r} is a reference, but no blob store was '
+                'provided'.format(self._id))
+        json_data = self._blob_store.get_json(self._id)
+        return {k: Datum.from_json(v) for k, v in json_data['data'].items()}
@@ -0,0 +1,126 @@
+# See COPYRIGHT file at the top of the source tree.
+from __future__ import print_function, division
+
+import json
+import os
+import tempfile
+
+from .errors import ValidateError
+from .blob import DeserializedBlob
+
+
+__all__ = ['BlobStore']
+
+
+class BlobStore(object):
+    """A local directory of blob JSON documents, keyed by blob identifier.
+
+    A `Job` with a `~Job.blob_store` writes its blobs into the store and only
+    references them from its JSON document. Blobs read back with
+    `Job.from_json` load their data from the store on first access.
+
+    Parameters
+    ----------
+    root : `str`
+        Root directory of the store. It is created if it does not exist.
+    """
+
+    def __init__(self, root):
+        self.root = root
+        if not os.path.isdir(root):
+            os.makedirs(root)
+
+    def _path(self, identifier):
+        # Shard by identifier prefix to keep directories small
+        return os.path.join(self.root, identifier[:2], identifier + '.json')
+
+    def __contains__(self, identifier):
+        return os.path.exists(self._path(identifier))
+
+    def put(self, blob):
+        """Write a blob into the store.
+
+        Blobs that are already stored are not rewritten if they are
+        content-addressed, or if their data were never loaded from a store
+        (see `BlobBase.is_loaded`), so that rewriting a job read from the
+        store does not read and write every blob again.
+
+        Parameters
+        ----------
+        blob : `BlobBase`-type object
+            A blob object.
+
+        Raises
+        ------
+        lsst.validate.base.ValidateError
+            Raised if the blob is a preview (see `BlobBase.is_preview`) that
+            is not stored; its decimated data would replace the full data.
+        """
+        identifier = blob.identifier
+        if identifier in self and (blob.content_addressed or
+                                   blob.is_preview or not blob.is_loaded):
+            return
+        if blob.is_preview:
+            raise ValidateError('Blob {0!r} is a preview, whose full data '
+                                'are not stored'.format(identifier))
+        self.put_json(blob.json)
+
+    def put_json(self, json_data):
+        """Write a blob JSON document into the store.
+
+        Parameters
+        ----------
+        json_data : `dict`
+            Blob JSON object (as produced by `BlobBase.json`).
+        """
+        path = self._path(json_data['identifier'])
+        dirname = os.path.dirname(path)
+        if not os.path.isdir(dirname):
+            os.makedirs(dirname)
+        # Write to a temporary file and rename it so that readers never see a
+        # partially-written blob.
+        fd, tmp_path = tempfile.mkstemp(dir=dirname, suffix='.tmp')
+        with os.fdopen(fd, 'w') as f:
+            json.dump(json_data, f)
+        os.replace(tmp_path, path)
+
+    def get_json(self, identifier):
+        """Read a blob JSON document from the store.
+
+        Parameters
+        ----------
+        identifier : `str`
+            Blob identifier.
+
+        Returns
+        -------
+        json_data : `dict`
+            Blob JSON object.
+
+        Raises
+        ------
+        lsst.validate.base.ValidateError
+            Raised if the blob is not in the store.
+        """
+        try:
+            with open(self._path(identifier)) as f:
+                return json.load(f)
+        except IOError:
+            raise ValidateError(
+                'Blob {0!r} is not in the blob store {1!r}'.format(
+                    identifier, self.root))
+
+    def get(self, identifier):
+        """Read a blob from the store.
+
+        Parameters
+        ----------
+        identifier : `str`
+            Blob identifier.
+
+        Returns
+        -------
+        blob : `DeserializedBlob`
+            Blob from the store.
+        """
+        return DeserializedBlob.from_json(self.get_json(identifier))
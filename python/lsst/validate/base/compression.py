@@ -0,0 +1,190 @@
+# See COPYRIGHT file at the top of the source tree.
+"""Reading and writing JSON files through gzip, bz2 or lzma compression."""
+from __future__ import print_function, division
+
+import bz2
+import gzip
+import io
+import json
+import lzma
+import os
+
+
+__all__ = ['infer_compression', 'open_compressed', 'compress_bytes',
+           'decompress_bytes', 'encode_json', 'read_json', 'write_json']
+
+
+_OPENERS = {'gzip': gzip.open,
+            'bz2': bz2.open,
+            'lzma': lzma.open}
+
+_COMPRESSORS = {'gzip': gzip.compress,
+                'bz2': bz2.compress,
+                'lzma': lzma.compress}
+
+_DECOMPRESSORS = {'gzip': gzip.decompress,
+                  'bz2': bz2.decompress,
+                  'lzma': lzma.decompress}
+
+_EXTENSIONS = {'.gz': 'gzip',
+               '.gzip': 'gzip',
+               '.bz2': 'bz2',
+               '.xz': 'lzma',
+               '.lzma': 'lzma'}
+
+
+def infer_compression(filepath):
+    """Infer a compression codec from a file name's extension.
+
+    Parameters
+    ----------
+    filepath : `str`
+        File name.
+
+    Returns
+    -------
+    compression : `str` or `None`
+        ``'gzip'`` (``.gz``), ``'bz2'`` (``.bz2``), ``'lzma'`` (``.xz`` or
+        ``.lzma``), or `None` for any other extension.
+    """
+    return _EXTENSIONS.get(os.path.splitext(filepath)[1].lower())
+
+
+def _resolve_compression(filepath, compression):
+    if compression == 'infer':
+        return infer_compression(filepath)
+    if compression is not None and compression not in _OPENERS:
+        raise ValueError('Unknown compression {0!r}; use one of {1}'.format(
+            compression, sorted(_OPENERS)))
+    return compression
+
+
+def open_compressed(filepath, mode='r', compression='infer'):
+    """Open a text file, compressed or not.
+
+    Parameters
+    ----------
+    filepath : `str`
+        File name.
+    mode : `str`, optional
+        ``'r'`` to read or ``'w'`` to write.
+    compression : `str`, optional
+        ``'gzip'``, ``'bz2'``, ``'lzma'``, `None` (no compression) or
+        ``'infer'`` to pick a codec from the extension of ``filepath`` (see
+        `infer_compression`).
+
+    Returns
+    -------
+    f : file object
+        Text-mode file object that compresses or decompresses as it is
+        written or read.
+    """
+    compression = _resolve_compression(filepath, compression)
+    if compression is None:
+        return io.open(filepath, mode, encoding='utf-8')
+    return _OPENERS[compression](filepath, mode + 't', encoding='utf-8')
+
+
+def compress_bytes(data, compression):
+    """Compress a `bytes` payload with a codec (`None` for no compression).
+    """
+    if compression is None:
+        return data
+    return _COMPRESSORS[compression](data)
+
+
+def decompress_bytes(data, compression):
+    """Decompress a `bytes` payload with a codec (`None` for no
+    compression).
+    """
+    if compression is None:
+        return data
+    return _DECOMPRESSORS[compression](data)
+
+
+def _iter_compact_json(json_doc):
+    """Iterate over chunks of a compact JSON encoding of ``json_doc``.
+
+    Top-level list items (such as a job's measurements and blobs) are encoded
+    one at a time with the C encoder, which keeps memory bounded while
+    avoiding the slower pure-Python streaming encoder.
+    """
+    if not isinstance(json_doc, dict):
+        yield json.dumps(json_doc, separators=(',', ':'))
+        return
+    yield '{'
+    for i, (key, value) in enumerate(json_doc.items()):
+        if i > 0:
+            yield ','
+        yield json.dumps(key) + ':'
+        if isinstance(value, list):
+            yield '['
+            for j, item in enumerate(value):
+                if j > 0:
+                    yield ','
+                yield json.dumps(item, separators=(',', ':'))
+            yield ']'
+        else:
+            yield json.dumps(value, separators=(',', ':'))
+    yield '}'
+
+
+def encode_json(json_doc, compact=False):
+    """Encode a JSON document as `str`.
+
+    Parameters
+    ----------
+    json_doc : obj
+        JSON-serializable object.
+    compact : `bool`, optional
+        If `True`, the encoding has no indentation or whitespace and keys
+        keep their order. Otherwise keys are sorted and indented by two
+        spaces (the format of `JsonSerializationMixin.write_json`).
+    """
+    if compact:
+        return ''.join(_iter_compact_json(json_doc))
+    return json.dumps(json_doc, sort_keys=True, indent=2)
+
+
+def write_json(json_doc, filepath, compression='infer', compact=False):
+    """Write a JSON document to a file, streaming it through a compressor.
+
+    Parameters
+    ----------
+    json_doc : obj
+        JSON-serializable object.
+    filepath : `str`
+        Destination file name.
+    compression : `str`, optional
+        ``'gzip'``, ``'bz2'``, ``'lzma'``, `None` (no compression) or
+        ``'infer'`` to pick a codec from the extension of ``filepath``.
+    compact : `bool`, optional
+        If `True`, write without indentation or whitespace and without
+        sorting keys. Otherwise keys are sorted and indented by two spaces.
+    """
+    with open_compressed(filepath, 'w', compression=compression) as f:
+        if compact:
+            for chunk in _iter_compact_json(json_doc):
+                f.write(chunk)
+        else:
+            json.dump(json_doc, f, sort_keys=True, indent=2)
+
+
+def read_json(filepath, compression='infer'):
+    """Read a JSON document from a file, decompressing it if necessary.
+
+    Parameters
+    ----------
+    filepath : `str`
+        File name.
+    compression : `str`, optional
+        ``'gzip'``, ``'bz2'``, ``'lzma'``, `None` (no compression) or
+        ``'infer'`` to pick a codec from the extension of ``filepath``.
+
+    Returns
+    -------
+    json_doc : obj
+        The decoded JSON document.
+    """
+    with open_compressed(filepath, 'r', compression=compression) as f:
+        return json.load(f)
@@ -0,0 +1,416 @@
+# See COPYRIGHT file at the top of the source tree.
+"""Random-access container files for jobs.
+
+A container file holds the same measurement and blob documents as a `Job`
+JSON file, but each one is a separate frame, located by an index. Readers
+only decode the frames they need, so that a single measurement or blob can
+be read from a multi-GB job without parsing the rest of it.
+
+The file layout is:
+
+- a 24-byte header: the magic bytes ``LSSTVJC1``, then the byte offset and
+  length of the index, as little-endian unsigned 64-bit integers;
+- the frames: measurement and blob JSON documents (as produced by
+  `MeasurementBase.json` and `BlobBase.json`), UTF-8 encoded and optionally
+  compressed;
+- the index: an uncompressed JSON document with the ``compression`` codec
+  of the frames, the job's ``profile`` section, and the ``measurements`` and
+  ``blobs`` entries that locate each frame and describe its object (blob
+  entries also hold the blob's ``summaries``, if it has any).
+"""
+from __future__ import print_function, division
+
+import json
+import mmap
+import struct
+
+from .blob import DeserializedBlob
+from .compression import compress_bytes, decompress_bytes
+from .errors import ValidateError
+from .instrument import MeasurementProfile
+from .job import Job
+from .measurement import DeserializedMeasurement
+
+
+__all__ = ['write_job_container', 'JobContainer']
+
+
+MAGIC = b'LSSTVJC1'
+"""Magic bytes at the start of container files."""
+
+_HEADER = struct.Struct('<8sQQ')
+
+
+def _encode_frame(json_doc, compression):
+    return compress_bytes(json.dumps(json_doc, separators=(',', ':')).encode(
+        'utf-8'), compression)
+
+
+def write_job_container(job, filepath, compression=None):
+    """Write a `Job` into a random-access container file.
+
+    Measurements and blobs are serialized one at a time, so memory use is
+    bounded by the largest object rather than by the whole job.
+
+    Parameters
+    ----------
+    job : `Job`
+        Job to write. If the job has a `~Job.blob_store`, its blobs are
+        written into the store (see `Job.write_blobs`) and the container only
+        references them.
+    filepath : `str`
+        Destination file name.
+    compression : `str`, optional
+        Codec that compresses each frame: ``'gzip'``, ``'bz2'``, ``'lzma'``
+        or `None` (no compression).
+    """
+    if compression not in (None, 'gzip', 'bz2', 'lzma'):
+        raise ValueError('Unknown compression {0!r}'.format(compression))
+    # As in Job.json, blobs are registered before their measurements, so the
+    # blob snapshot covers every measurement of the measurement snapshot
+    measurements = job._measurements[:]
+    blobs = job._unique_blobs()
+    if job.blob_store is not None:
+        job.write_blobs()
+
+    measurement_entries = []
+    blob_entries = []
+    with open(filepath, 'wb') as f:
+        f.write(_HEADER.pack(MAGIC, 0, 0))
+        offset = _HEADER.size
+        for m in measurements:
+            doc = m.json
+            frame = _encode_frame(doc, compression)
+            f.write(frame)
+            measurement_entries.append({
+                'identifier': doc['identifier'],
+                'metric': doc['metric']['name'],
+                'spec_name': doc['spec_name'],
+                'filter_name': doc['filter_name'],
+                'blobs': doc['blobs'],
+                'offset': offset,
+                'length': len(frame)})
+            offset += len(frame)
+        for b in blobs:
+            doc = b.reference_json if job.blob_store is not None else b.json
+            frame = _encode_frame(doc, compression)
+            f.write(frame)
+            entry = {'identifier': doc['identifier'],
+                     'name': doc['name'],
+                     'offset': offset,
+                     'length': len(frame)}
+            if 'summaries' in doc:
+                entry['summaries'] = doc['summaries']
+            blob_entries.append(entry)
+            offset += len(frame)
+
+        index = {'version': 1,
+                 'compression': compression,
+                 'measurements': measurement_entries,
+                 'blobs': blob_entries,
+                 'profile': [m.profile.json for m in measurements
+                             if m.profile is not None]}
+        index_frame = json.dumps(index, separators=(',', ':')).encode('utf-8')
+        f.write(index_frame)
+        f.seek(0)
+        f.write(_HEADER.pack(MAGIC, offset, len(index_frame)))
+
+
+class JobContainer(object):
+    """Reader of a container file written by `write_job_container`.
+
+    Only the index is read when the container is opened. Measurements and
+    blobs are decoded on request from a memory map of the file, so a
+    container can be shared by many threads.
+
+    Measurements are read without the data of their blobs, which are only
+    decoded when first accessed; the container acts as the `BlobStore` of
+    those blobs.
+
+    Parameters
+    ----------
+    filepath : `str`
+        Path of the container file.
+    blob_store : `BlobStore`, optional
+        Blob store that holds the data of blobs that the container only
+        references.
+
+    Raises
+    ------
+    lsst.validate.base.ValidateError
+        Raised if the file is not a container file, or if it is truncated
+        (for example, because it was not completely written) or its index is
+        invalid.
+
+    Examples
+    --------
+    >>> with JobContainer('job.vjc') as container:  # doctest: +SKIP
+    ...     for m in container.find_measurements('PA1', filter_name='r'):
+    ...         print(m.quantity)
+    """
+
+    def __init__(self, filepath, blob_store=None):
+        self.filepath = filepath
+        self.blob_store = blob_store
+        with open(filepath, 'rb') as f:
+            header = f.read(_HEADER.size)
+            if len(header) < _HEADER.size or header[:len(MAGIC)] != MAGIC:
+                raise ValidateError('{0!r} is not a job container '
+                                    'file'.format(filepath))
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            self._read_index(header)
+        except BaseException:
+            self._map.close()
+            raise
+
+    def _read_index(self, header):
+        _, index_offset, index_length = _HEADER.unpack(header)
+        # The header of a partially written file still has the placeholder
+        # offset and length
+        if index_offset < _HEADER.size or \
+                index_offset + index_length > len(self._map):
+            raise ValidateError('Job container {0!r} is truncated or was not '
+                                'completely written'.format(self.filepath))
+        try:
+            self.index = json.loads(
+                self._map[index_offset:index_offset + index_length])
+            self.compression = self.index['compression']
+            self._measurements = {e['identifier']: e
+                                  for e in self.index['measurements']}
+            self._blobs = {e['identifier']: e for e in self.index['blobs']}
+            self._profiles = {doc['measurement']: doc
+                              for doc in self.index['profile']}
+        except (ValueError, KeyError, TypeError) as e:
+            raise ValidateError('Invalid index in job container {0!r}: '
+                                '{1!s}'.format(self.filepath, e))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """Close the file.
+
+        Blobs linked to measurements read from the container must have been
+        loaded (for example, by accessing one of their attributes) before the
+        container is closed.
+        """
+        self._map.close()
+
+    def __len__(self):
+        return len(self._measurements)
+
+    @property
+    def measurement_ids(self):
+        """Identifiers of the measurements, in registration order
+        (`list`).
+        """
+        return [e['identifier'] for e in self.index['measurements']]
+
+    @property
+    def blob_ids(self):
+        """Identifiers of the blobs (`list`)."""
+        return [e['identifier'] for e in self.index['blobs']]
+
+    @property
+    def metric_names(self):
+        """Names of the measured metrics, in order of first measurement
+        (`list`).
+        """
+        names = []
+        for e in self.index['measurements']:
+            if e['metric'] not in names:
+                names.append(e['metric'])
+        return names
+
+    def _read_frame(self, entry):
+        if self._map.closed:
+            raise ValidateError('Job container {0!r} is closed'.format(
+                self.filepath))
+        offset = entry['offset']
+        data = decompress_bytes(self._map[offset:offset + entry['length']],
+                                self.compression)
+        return json.loads(data)
+
+    def read_measurement_json(self, identifier):
+        """Read the JSON document of a measurement.
+
+        Parameters
+        ----------
+        identifier : `str`
+            Identifier of the measurement.
+
+        Returns
+        -------
+        json_data : `dict`
+            Measurement JSON object (as produced by `MeasurementBase.json`).
+
+        Raises
+        ------
+        KeyError
+            Raised if the container has no such measurement.
+        """
+        return self._read_frame(self._measurements[identifier])
+
+    def read_blob_json(self, identifier):
+        """Read the JSON document of a blob.
+
+        Parameters
+        ----------
+        identifier : `str`
+            Identifier of the blob.
+
+        Returns
+        -------
+        json_data : `dict`
+            Blob JSON object (as produced by `BlobBase.json`, or
+            `BlobBase.reference_json` if the job had a blob store).
+
+        Raises
+        ------
+        KeyError
+            Raised if the container has no such blob.
+        """
+        return self._read_frame(self._blobs[identifier])
+
+    def get_blob(self, identifier):
+        """Read a blob.
+
+        Parameters
+        ----------
+        identifier : `str`
+            Identifier of the blob.
+
+        Returns
+        -------
+        blob : `DeserializedBlob`
+            The blob.
+
+        Raises
+        ------
+        KeyError
+            Raised if the container has no such blob.
+        """
+        return DeserializedBlob.from_json(self.get_json(identifier))
+
+    def get_json(self, identifier):
+        """Read the JSON document of a blob, with its data.
+
+        Unlike `read_blob_json`, blobs that the container only references are
+        read from the container's `blob_store`. With this method, a
+        container is a blob store for the blobs it holds.
+
+        Parameters
+        ----------
+        identifier : `str`
+            Identifier of the blob.
+
+        Returns
+        -------
+        json_data : `dict`
+            Blob JSON object (as produced by `BlobBase.json`).
+
+        Raises
+        ------
+        KeyError
+            Raised if the container has no such blob.
+        lsst.validate.base.ValidateError
+            Raised if the blob is only referenced, and the container has no
+            blob store.
+        """
+        json_data = self.read_blob_json(identifier)
+        if 'data' not in json_data:
+            if self.blob_store is None:
+                raise ValidateError(
+                    'Blob {0!r} is a reference, but no blob store was '
+                    'provided'.format(identifier))
+            json_data = self.blob_store.get_json(identifier)
+        return json_data
+
+    def _blob_reference_json(self, identifier):
+        entry = self._blobs[identifier]
+        json_data = {'identifier': identifier, 'name': entry['name']}
+        if 'summaries' in entry:
+            json_data['summaries'] = entry['summaries']
+        return json_data
+
+    def get_measurement(self, identifier):
+        """Read a measurement.
+
+        The blobs linked to the measurement are only read from the container
+        when their data are first accessed. Their summaries (see
+        `BlobBase.summary`) are read from the index.
+
+        Parameters
+        ----------
+        identifier : `str`
+            Identifier of the measurement.
+
+        Returns
+        -------
+        measurement : `DeserializedMeasurement`
+            The measurement.
+
+        Raises
+        ------
+        KeyError
+            Raised if the container has no such measurement.
+        """
+        entry = self._measurements[identifier]
+        # References, whose data the blobs load from the container itself
+        blobs_json = [self._blob_reference_json(id_)
+                      for id_ in set(entry['blobs'].values())
+                      if id_ in self._blobs]
+        m = DeserializedMeasurement.from_json(self._read_frame(entry),
+                                              blobs_json=blobs_json,
+                                              blob_store=self)
+        if identifier in self._profiles:
+            m.profile = MeasurementProfile.from_json(
+                self._profiles[identifier])
+        return m
+
+    def find_measurements(self, metric_name, spec_name=None,
+                          filter_name=None):
+        """Read the measurements of a metric.
+
+        Only the index is searched; the frames of other measurements are not
+        read.
+
+        Parameters
+        ----------
+        metric_name : `str`
+            Name of the `Metric`.
+        spec_name : `str`, optional
+            Only read measurements of this specification level.
+        filter_name : `str`, optional
+            Only read measurements of this optical filter.
+
+        Returns
+        -------
+        measurements : `list` of `DeserializedMeasurement`
+            Matching measurements, in registration order.
+        """
+        return [self.get_measurement(e['identifier'])
+                for e in self.index['measurements']
+                if e['metric'] == metric_name and
+                (spec_name is None or e['spec_name'] == spec_name) and
+                (filter_name is None or e['filter_name'] == filter_name)]
+
+    def read_job(self):
+        """Read the whole job.
+
+        Returns
+        -------
+        job : `Job`
+            The job, as `Job.from_json` would build it from a JSON file.
+        """
+        json_data = {
+            'measurements': [self._read_frame(e)
+                             for e in self.index['measurements']],
+            'blobs': [self._read_frame(e) for e in self.index['blobs']]}
+        if self.index['profile']:
+            json_data['profile'] = self.index['profile']
+        return Job.from_json(json_data, blob_store=self.blob_store)
@@ -1,17 +1,32 @@
 # See COPYRIGHT file at the top of the source tree.
 from __future__ import print_function, division
-from builtins import object
-from past.builtins import basestring
 
-import numpy as np
-import astropy.units as u
+import itertools
 
+from .encoding import EncodingPolicy, decode_array
+from .errors import ValidateError
 from .jsonmixin import JsonSerializationMixin
+from .lazy import lazy_import
+from .summary import DatumSummary, DEFAULT_PERCENTILES, DEFAULT_BINS
 
 
 __all__ = ['Datum', 'QuantityAttributeMixin']
 
 
+np = lazy_import('numpy')
+u = lazy_import('astropy.units')
+masked = lazy_import('astropy.utils.masked')
+
+
+_versions = itertools.count(1)
+"""Source of `Datum` versions, unique within a process."""
+
+
+def _parse_unit(unit):
+    """Parse a serialized unit string into an `astropy.units.Unit`."""
+    return u.Unit(unit)
+
+
 class QuantityAttributeMixin(object):
     """Mixin with common attributes for classes that wrap an
     `astropy.units.Quantity`.
@@ -31,7 +46,7 @@ class QuantityAttributeMixin(object):
     def _is_non_quantity_type(q):
         """Test if a quantity is a acceptable (`str`, `bool`, `int`, or
         `None`), but not `astropy.quantity`."""
-        return isinstance(q, basestring) or isinstance(q, bool) or \
+        return isinstance(q, str) or isinstance(q, bool) or \
             isinstance(q, int) or q is None
 
     @quantity.setter
@@ -74,7 +89,8 @@ class QuantityAttributeMixin(object):
             return ''
 
     @staticmethod
-    def _rebuild_quantity(value, unit):
+    def _rebuild_quantity(value, unit, dtype=None, shape=None, mask=None,
+                          encoding=None):
         """Rebuild a quantity from the value and unit serialized to JSON.
 
         Parameters
@@ -83,6 +99,16 @@ class QuantityAttributeMixin(object):
             Serialized quantity value.
         unit : `str`
             Serialized quantity unit string.
+        dtype : `str`, optional
+            Serialized dtype name of an array quantity. If `None`, the dtype
+            is inferred from ``value``.
+        shape : `list`, optional
+            Serialized shape of an array quantity.
+        mask : `list` or `bool`, optional
+            Serialized mask of a masked quantity.
+        encoding : `dict`, optional
+            Serialized encoding of an array quantity's values (see
+            `~lsst.validate.base.encoding.decode_array`).
 
         Returns
         -------
@@ -92,13 +118,49 @@ class QuantityAttributeMixin(object):
         if QuantityAttributeMixin._is_non_quantity_type(value):
             _quantity = value
         elif isinstance(value, list):
-            # an astropy quantity array
-            _quantity = np.array(value) * u.Unit(unit)
+            # an astropy quantity array, allocated only once
+            if encoding is not None:
+                array = decode_array(value, encoding, dtype=dtype)
+            else:
+                array = np.array(value, dtype=dtype)
+                if dtype is None and array.dtype.kind in 'biu':
+                    # As documents that predate dtypes were always read
+                    array = array.astype(float)
+            if shape is not None:
+                array = array.reshape(shape)
+            _quantity = QuantityAttributeMixin._view_quantity(
+                array, _parse_unit(unit))
         else:
             # scalar astropy quantity
-            _quantity = value * u.Unit(unit)
+            _quantity = value * _parse_unit(unit)
+        if mask is not None and isinstance(_quantity, u.Quantity):
+            _quantity = masked.Masked(_quantity, mask=np.array(mask, bool))
         return _quantity
 
+    @staticmethod
+    def _view_quantity(array, unit):
+        """Attach a unit to an array without copying it.
+
+        Parameters
+        ----------
+        array : `numpy.ndarray`
+            Values. Unlike the default `astropy.units.Quantity` constructor,
+            integer arrays are not converted to floats.
+        unit : `astropy.units.Unit`
+            Unit of the values.
+
+        Returns
+        -------
+        q : `astropy.units.Quantity`
+            Quantity that is a view of ``array``.
+        """
+        return u.Quantity(array, unit, dtype=array.dtype, copy=False)
+
+    @staticmethod
+    def _is_masked(q):
+        """Test if a quantity is an `astropy.utils.masked.Masked` quantity."""
+        return hasattr(q, 'unmasked')
+
 
 class Datum(QuantityAttributeMixin, JsonSerializationMixin):
     """A value annotated with units, a plot label and description.
@@ -119,19 +181,47 @@ class Datum(QuantityAttributeMixin, JsonSerializationMixin):
         Label suitable for plot axes (without units).
     description : `str`, optional
         Extended description of the `Datum`.
+    encoding : `EncodingPolicy`, optional
+        Encoding of floating-point array values in JSON (see `encoding`).
+    copy : `bool`, optional
+        If `False`, and ``quantity`` is an array with a ``unit``, the datum's
+        quantity is a view of ``quantity`` (with its dtype) rather than a
+        copy: the caller's array and the datum share their values, so
+        changes to either are seen by both. Other values, such as lists, are
+        converted into a new array. An `astropy.units.Quantity` is never
+        copied.
+    """
+
+    _version = 0
+    """Version of the datum's quantity and label, which changes whenever
+    either is set (but not when an array is modified in place). Versions are
+    unique across datums.
+    """
+
+    encoding = None
+    """Encoding of floating-point array values in JSON
+    (`~lsst.validate.base.encoding.EncodingPolicy` or `None`).
+
+    If `None`, values are serialized at full precision.
     """
-    def __init__(self, quantity=None, unit=None, label=None, description=None):
+
+    def __init__(self, quantity=None, unit=None, label=None, description=None,
+                 encoding=None, copy=True):
         self._label = None
         self._description = None
 
         self.label = label
         self.description = description
+        self.encoding = encoding
 
         self._quantity = None
 
         if isinstance(quantity, u.Quantity) or \
                 QuantityAttributeMixin._is_non_quantity_type(quantity):
             self.quantity = quantity
+        elif unit is not None and not copy:
+            self.quantity = QuantityAttributeMixin._view_quantity(
+                np.asarray(quantity), u.Unit(unit))
         elif unit is not None:
             self.quantity = u.Quantity(quantity, unit=unit)
         else:
@@ -139,6 +229,25 @@ class Datum(QuantityAttributeMixin, JsonSerializationMixin):
                              'if `quantity` is not an astropy.unit.Quantity, '
                              'str, bool, int or None.')
 
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        q = state['_quantity']
+        if not QuantityAttributeMixin._is_non_quantity_type(q) and \
+                type(q) is u.Quantity:
+            # Pickle the array apart from its unit: with pickle protocol 5,
+            # numpy can then pass the array's buffer out-of-band.
+            state['_quantity'] = (q.view(np.ndarray), q.unit)
+        return state
+
+    def __setstate__(self, state):
+        if isinstance(state['_quantity'], tuple):
+            value, unit = state['_quantity']
+            state['_quantity'] = QuantityAttributeMixin._view_quantity(value,
+                                                                       unit)
+        self.__dict__.update(state)
+        # Versions are only unique within a process
+        self._version = next(_versions)
+
     @classmethod
     def from_json(cls, json_data):
         """Construct a Datum from a JSON dataset.
@@ -153,20 +262,55 @@ class Datum(QuantityAttributeMixin, JsonSerializationMixin):
         datum : `Datum`
             Datum from JSON.
         """
-        q = Datum._rebuild_quantity(json_data['value'], json_data['unit'])
+        q = Datum._rebuild_quantity(json_data['value'], json_data['unit'],
+                                    dtype=json_data.get('dtype'),
+                                    shape=json_data.get('shape'),
+                                    mask=json_data.get('mask'),
+                                    encoding=json_data.get('encoding'))
+        encoding = json_data.get('encoding')
+        if encoding is not None:
+            # Keep the policy, so that the datum is encoded again likewise
+            encoding = EncodingPolicy.from_json(encoding)
         d = cls(quantity=q, label=json_data['label'],
-                description=json_data['description'])
+                description=json_data['description'], encoding=encoding)
         return d
 
     @property
     def json(self):
-        """Datum as a `dict` compatible with overall `Job` JSON schema."""
-        if QuantityAttributeMixin._is_non_quantity_type(self.quantity):
-            v = self.quantity
-        elif len(self.quantity.shape) > 0:
-            v = self.quantity.value.tolist()
+        """Datum as a `dict` compatible with overall `Job` JSON schema.
+
+        Array quantities also have ``dtype`` and ``shape`` fields, and masked
+        quantities a ``mask`` field, so that `from_json` rebuilds them
+        exactly. The ``value`` field holds the unmasked values, so readers
+        that ignore these optional fields still get the values as before.
+
+        Floating-point arrays are serialized according to the `encoding`
+        policy, which is then recorded in an ``encoding`` field.
+        """
+        return self._encode_json(self.encoding)
+
+    def _encode_json(self, encoding):
+        """Datum as a JSON-serializable `dict`, with floating-point array
+        values serialized according to an `EncodingPolicy` (or at full
+        precision if ``encoding`` is `None`).
+        """
+        q = self.quantity
+        is_masked = Datum._is_masked(q)
+        if is_masked:
+            q = q.unmasked
+
+        is_array = not QuantityAttributeMixin._is_non_quantity_type(q) and \
+            len(q.shape) > 0
+        encoding_doc = None
+        if not is_array:
+            v = q if QuantityAttributeMixin._is_non_quantity_type(q) \
+                else q.value
+            dtype = None
+        elif encoding is not None and q.dtype.kind == 'f':
+            v, encoding_doc, dtype = encoding.encode(q.value, q.unit)
         else:
-            v = self.quantity.value
+            v = q.value.tolist()
+            dtype = q.dtype
 
         d = {
             'value': v,
@@ -174,8 +318,57 @@ class Datum(QuantityAttributeMixin, JsonSerializationMixin):
             'label': self.label,
             'description': self.description
         }
+        if is_array:
+            d['dtype'] = dtype.name
+            d['shape'] = list(q.shape)
+        if encoding_doc is not None:
+            d['encoding'] = encoding_doc
+        if is_masked:
+            d['mask'] = self.quantity.mask.tolist()
         return d
 
+    @property
+    def is_numeric_array(self):
+        """`True` if the quantity is an array of numbers or booleans, which
+        can be summarized (`bool`).
+        """
+        q = self.quantity
+        return not QuantityAttributeMixin._is_non_quantity_type(q) and \
+            len(q.shape) > 0 and q.dtype.kind in 'biuf'
+
+    def summarize(self, percentiles=DEFAULT_PERCENTILES, bins=DEFAULT_BINS):
+        """Compute summary statistics of an array quantity.
+
+        Parameters
+        ----------
+        percentiles : sequence of `float`, optional
+            Percentile ranks to compute, between 0 and 100.
+        bins : `int`, optional
+            Number of histogram bins.
+
+        Returns
+        -------
+        summary : `~lsst.validate.base.summary.DatumSummary`
+            Count, extrema, mean, standard deviation, percentiles and
+            histogram of the finite values.
+
+        Raises
+        ------
+        lsst.validate.base.ValidateError
+            Raised if the quantity is not a numeric array (see
+            `is_numeric_array`).
+        """
+        if not self.is_numeric_array:
+            raise ValidateError('Only numeric array datums can be '
+                                'summarized, not {0!r}'.format(self.quantity))
+        return DatumSummary.compute(self.quantity, percentiles=percentiles,
+                                    bins=bins)
+
+    @QuantityAttributeMixin.quantity.setter
+    def quantity(self, q):
+        QuantityAttributeMixin.quantity.fset(self, q)
+        self._version = next(_versions)
+
     @property
     def label(self):
         """Label for plotting (without units)."""
@@ -183,8 +376,9 @@ class Datum(QuantityAttributeMixin, JsonSerializationMixin):
 
     @label.setter
     def label(self, value):
-        assert isinstance(value, basestring) or value is None
+        assert isinstance(value, str) or value is None
         self._label = value
+        self._version = next(_versions)
 
     @property
     def description(self):
@@ -193,5 +387,5 @@ class Datum(QuantityAttributeMixin, JsonSerializationMixin):
 
     @description.setter
     def description(self, value):
-        assert isinstance(value, basestring) or value is None
+        assert isinstance(value, str) or value is None
         self._description = value
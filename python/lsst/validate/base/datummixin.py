@@ -1,14 +1,17 @@
 # See COPYRIGHT file at the top of the source tree.
 from __future__ import print_function, division
-from builtins import object
 
-import astropy.units
 from .datum import Datum
+from .growable import GrowableDatum
+from .lazy import lazy_import
 
 
 __all__ = ['DatumAttributeMixin']
 
 
+u = lazy_import('astropy.units')
+
+
 class DatumAttributeMixin(object):
     """Mixin that provides a `~lsst.validate.base.Datum`-like API to
     non-`~lsst.validate.base.Datum` classes.
@@ -16,19 +19,32 @@ class DatumAttributeMixin(object):
 
     def _register_datum_attribute(self, attribute, key, quantity=None,
                                   label=None, description=None,
-                                  datum=None):
+                                  datum=None, encoding=None):
         _value = None
         _label = None
         _description = None
+        _encoding = None
+
+        if isinstance(datum, GrowableDatum):
+            # Registered as is, so that values appended later are serialized
+            if label is not None or datum.label is None:
+                datum.label = label if label is not None else key
+            if description is not None:
+                datum.description = description
+            if encoding is not None:
+                datum.encoding = encoding
+            attribute[key] = datum
+            return
 
         if datum is not None:
             assert isinstance(datum, Datum)
             _value = datum.quantity
             _label = datum.label
             _description = datum.description
+            _encoding = datum.encoding
 
         if quantity is not None and _value is None:
-            assert isinstance(quantity, astropy.units.Quantity) or \
+            assert isinstance(quantity, u.Quantity) or \
                 isinstance(quantity, str) or isinstance(quantity, bool) or \
                 isinstance(quantity, int)
             _value = quantity
@@ -39,8 +55,12 @@ class DatumAttributeMixin(object):
         if label is not None:
             _label = label
 
+        if encoding is not None:
+            _encoding = encoding
+
         # Use parameter name as label if necessary
         if _label is None:
             _label = key
 
-        attribute[key] = Datum(_value, label=_label, description=_description)
+        attribute[key] = Datum(_value, label=_label, description=_description,
+                               encoding=_encoding)
@@ -0,0 +1,246 @@
+# See COPYRIGHT file at the top of the source tree.
+"""Compact encodings of array `Datum` values in JSON.
+
+By default an array `Datum` is serialized at the full ``repr`` precision of
+its values. An encoding policy, set on a `Datum` or on a whole blob (see
+`BlobBase.encoding`), serializes floating-point arrays with only the precision
+they need. The policy is recorded in the datum's JSON document, so that
+`Datum.from_json` decodes the values correctly.
+"""
+from __future__ import print_function, division
+
+import abc
+
+from .errors import ValidateError
+from .lazy import lazy_import
+
+
+__all__ = ['EncodingPolicy', 'Float32Encoding', 'SignificantDigitsEncoding',
+           'QuantizedEncoding', 'decode_array']
+
+
+np = lazy_import('numpy')
+u = lazy_import('astropy.units')
+
+
+def _round_significant(x, digits):
+    """Round an array to a number of significant digits.
+
+    Non-finite values and zeros are unchanged. Each value is rounded by a
+    power of ten, so that its ``repr`` has at most ``digits`` significant
+    digits (up to the last bit for exponents beyond 1e22, whose powers of
+    ten are inexact in double precision).
+    """
+    x = np.asarray(x, dtype=float)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        exponent = digits - 1 - np.floor(np.log10(np.abs(x)))
+    finite = np.isfinite(exponent)
+    exponent = np.where(finite, exponent, 0.)
+    power = 10. ** np.abs(exponent)
+    with np.errstate(invalid='ignore', over='ignore'):
+        rounded = np.where(exponent >= 0, np.round(x * power) / power,
+                           np.round(x / power) * power)
+    return np.where(finite, rounded, x)
+
+
+class EncodingPolicy(metaclass=abc.ABCMeta):
+    """Base class for encodings of floating-point `Datum` arrays in JSON.
+
+    Policies only apply to arrays of floating-point quantities; other
+    values are serialized as usual.
+    """
+
+    name = None
+    """Name of the encoding in JSON documents (`str`)."""
+
+    @abc.abstractmethod
+    def encode(self, values, unit):
+        """Encode an array.
+
+        Parameters
+        ----------
+        values : `numpy.ndarray`
+            Floating-point values.
+        unit : `astropy.units.Unit`
+            Unit of the values.
+
+        Returns
+        -------
+        value : `list`
+            Encoded values, as nested lists with the shape of ``values``.
+        encoding : `dict`
+            JSON-serializable description of the encoding, with a ``name``
+            field, that `decode_array` uses to decode ``value``.
+        dtype : `numpy.dtype`
+            dtype of the decoded array.
+        """
+        pass
+
+    @classmethod
+    def from_json(cls, encoding):
+        """Rebuild the policy that produced an encoding.
+
+        Parameters
+        ----------
+        encoding : `dict`
+            Description of the encoding, as recorded in the JSON document.
+
+        Returns
+        -------
+        policy : `EncodingPolicy`
+            Encoding policy.
+
+        Raises
+        ------
+        lsst.validate.base.ValidateError
+            Raised if the encoding is unknown.
+        """
+        try:
+            policy_class = _POLICIES[encoding['name']]
+        except KeyError:
+            raise ValidateError('Unknown array encoding {0!r}'.format(
+                encoding['name']))
+        return policy_class._from_json(encoding)
+
+
+class Float32Encoding(EncodingPolicy):
+    """Downcast values to single precision.
+
+    Values are written with the 9 significant digits that identify a
+    ``float32`` value, and decoded as a ``float32`` array.
+    """
+
+    name = 'float32'
+
+    def encode(self, values, unit):
+        values = np.asarray(values, dtype=np.float32)
+        return (_round_significant(values, 9).tolist(), {'name': self.name},
+                values.dtype)
+
+    @classmethod
+    def _from_json(cls, encoding):
+        return cls()
+
+    def __repr__(self):
+        return 'Float32Encoding()'
+
+
+class SignificantDigitsEncoding(EncodingPolicy):
+    """Round values to a number of significant digits.
+
+    Parameters
+    ----------
+    digits : `int`
+        Number of significant digits of each value.
+    """
+
+    name = 'significant_digits'
+
+    def __init__(self, digits):
+        if digits < 1:
+            raise ValidateError('digits must be positive, not {0!r}'.format(
+                digits))
+        self.digits = int(digits)
+
+    def encode(self, values, unit):
+        values = np.asarray(values)
+        return (_round_significant(values, self.digits).tolist(),
+                {'name': self.name, 'digits': self.digits},
+                values.dtype)
+
+    @classmethod
+    def _from_json(cls, encoding):
+        return cls(encoding['digits'])
+
+    def __repr__(self):
+        return 'SignificantDigitsEncoding({0:d})'.format(self.digits)
+
+
+class QuantizedEncoding(EncodingPolicy):
+    """Quantize values as integers with a scale and offset.
+
+    Each value is encoded as the integer ``round((value - offset) / scale)``,
+    where ``offset`` is the smallest value and ``scale`` is twice the
+    tolerance, so that decoded values are within ``tolerance`` of the
+    original values. Non-finite values are encoded as ``null`` and decoded as
+    ``NaN``.
+
+    Parameters
+    ----------
+    tolerance : `float` or `astropy.units.Quantity`
+        Largest absolute error of decoded values. A `float` is in the unit of
+        the encoded `Datum`.
+    """
+
+    name = 'quantized'
+
+    def __init__(self, tolerance):
+        if np.any(u.Quantity(tolerance).value <= 0):
+            raise ValidateError('tolerance must be positive, not {0!r}'.format(
+                tolerance))
+        self.tolerance = tolerance
+
+    def encode(self, values, unit):
+        values = np.asarray(values)
+        if isinstance(self.tolerance, u.Quantity):
+            tolerance = self.tolerance.to(unit).value
+        else:
+            tolerance = float(self.tolerance)
+        scale = 2. * tolerance
+        finite = np.isfinite(values)
+        offset = float(np.min(values[finite])) if finite.any() else 0.
+        with np.errstate(invalid='ignore'):
+            codes = np.round((values - offset) / scale)
+        codes = np.where(finite, codes, 0).astype(np.int64)
+        if finite.all():
+            value = codes.tolist()
+        else:
+            value = np.where(finite, codes, None).tolist()
+        encoding = {'name': self.name, 'scale': scale, 'offset': offset,
+                    'tolerance': tolerance}
+        return value, encoding, values.dtype
+
+    @classmethod
+    def _from_json(cls, encoding):
+        return cls(encoding['tolerance'])
+
+    def __repr__(self):
+        return 'QuantizedEncoding({0!r})'.format(self.tolerance)
+
+
+_POLICIES = {policy.name: policy for policy in
+             (Float32Encoding, SignificantDigitsEncoding, QuantizedEncoding)}
+
+
+def decode_array(value, encoding, dtype=None):
+    """Decode an array encoded by an `EncodingPolicy`.
+
+    Parameters
+    ----------
+    value : `list`
+        Encoded values.
+    encoding : `dict`
+        Description of the encoding, as recorded in the JSON document.
+    dtype : `str` or `numpy.dtype`, optional
+        dtype of the decoded array.
+
+    Returns
+    -------
+    array : `numpy.ndarray`
+        Decoded values.
+
+    Raises
+    ------
+    lsst.validate.base.ValidateError
+        Raised if the encoding is unknown.
+    """
+    name = encoding['name']
+    if name == QuantizedEncoding.name:
+        codes = np.array(value, dtype=float)
+        array = codes * encoding['scale'] + encoding['offset']
+        return array.astype(dtype, copy=False) if dtype is not None \
+            else array
+    elif name in _POLICIES:
+        # Values are plain numbers with reduced precision
+        return np.array(value, dtype=dtype)
+    raise ValidateError('Unknown array encoding {0!r}'.format(name))
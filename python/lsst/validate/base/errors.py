@@ -2,7 +2,9 @@
 """Exceptions for the lsst.validate namespace."""
 
 __all__ = ['ValidateError',
-           'ValidateSpecificationError']
+           'ValidateSpecificationError',
+           'SquashUploadError',
+           'BlobStoreMissingError']
 
 
 class ValidateError(Exception):
@@ -13,3 +15,17 @@ class ValidateError(Exception):
 class ValidateSpecificationError(ValidateError):
     """Error accessing or using requirement specifications."""
     pass
+
+
+class SquashUploadError(ValidateError):
+    """Error uploading a job to the SQUASH service."""
+    pass
+
+
+class BlobStoreMissingError(ValidateError, AttributeError):
+    """Error loading the data of a referenced blob that has no blob store.
+
+    It is also an `AttributeError`, so that `hasattr` and `getattr` with a
+    default treat the datums of such a blob as missing.
+    """
+    pass
@@ -0,0 +1,233 @@
+# See COPYRIGHT file at the top of the source tree.
+from __future__ import print_function, division
+
+from concurrent.futures import (ProcessPoolExecutor, FIRST_COMPLETED,
+                                wait)
+
+from .errors import ValidateError
+from .instrument import MeasurementProfile, ResourceMonitor
+from .job import Job
+
+
+__all__ = ['MeasurementTask', 'MeasurementExecutor']
+
+
+class MeasurementTask(object):
+    """A measurement to be computed by a `MeasurementExecutor`.
+
+    Parameters
+    ----------
+    name : `str`
+        Unique name of the task.
+    factory : callable
+        Callable that computes and returns a `MeasurementBase`-type object,
+        typically a measurement class. The factory must be picklable (for
+        example, a module-level function or class) to run in a process pool.
+    args : `tuple`, optional
+        Positional arguments of ``factory``.
+    kwargs : `dict`, optional
+        Keyword arguments of ``factory``.
+    requires : `list` of `str`, optional
+        Names of tasks whose measurements this task needs. Each required
+        measurement is passed to ``factory`` as a keyword argument named after
+        the required task.
+    """
+
+    def __init__(self, name, factory, args=(), kwargs=None, requires=None):
+        self.name = name
+        self.factory = factory
+        self.args = tuple(args)
+        self.kwargs = dict(kwargs) if kwargs else {}
+        self.requires = list(requires) if requires else []
+
+    def __repr__(self):
+        return 'MeasurementTask({0!r})'.format(self.name)
+
+
+def _run_task(factory, args, kwargs, inputs, instrument=False,
+              trace_memory=True, thread_time=False):
+    """Compute a measurement in a worker.
+
+    ``inputs`` holds the measurements of required tasks. With
+    ``instrument``, the call to ``factory`` is profiled, unless the
+    measurement already instrumented itself.
+
+    Measurements, with their blobs, are pickled to and from worker
+    processes by the pool.
+    """
+    kwargs = dict(kwargs)
+    kwargs.update(inputs)
+    if instrument:
+        with ResourceMonitor(trace_memory=trace_memory,
+                             thread_time=thread_time) as monitor:
+            m = factory(*args, **kwargs)
+        if m.profile is None:
+            m.profile = MeasurementProfile.from_monitor(m, monitor)
+    else:
+        m = factory(*args, **kwargs)
+    return m
+
+
+class MeasurementExecutor(object):
+    """Compute measurements in parallel, respecting dependencies between
+    them.
+
+    Tasks run as soon as the measurements they require are complete, and
+    each completed measurement (with its blobs) is registered in a `Job` as
+    soon as it finishes.
+
+    Parameters
+    ----------
+    max_workers : `int`, optional
+        Number of worker processes. Defaults to the number of CPUs.
+    executor : `concurrent.futures.Executor`, optional
+        Executor to run tasks in, instead of a new process pool. The executor
+        is not shut down by `MeasurementExecutor`.
+    instrument : `bool`, optional
+        Record the wall time, CPU time and peak memory of each task in the
+        `~MeasurementBase.profile` of its measurement (see
+        `MeasurementBase.instrument`).
+    trace_memory : `bool`, optional
+        Record peak memory when instrumenting tasks. Memory tracing slows
+        down memory allocations, and peak memory is not meaningful when
+        tasks run in threads of the same process.
+    thread_time : `bool`, optional
+        Record the CPU time of the worker thread, rather than of the worker
+        process, when instrumenting tasks. Use it when ``executor`` runs
+        tasks in threads, which otherwise see each other's CPU time.
+
+    Examples
+    --------
+    >>> tasks = [MeasurementTask('PA1', PA1Measurement, args=(blob,)),
+    ...          MeasurementTask('PA2', PA2Measurement, args=(blob,),
+    ...                          requires=['PA1'])]  # doctest: +SKIP
+    >>> job = MeasurementExecutor(max_workers=8).run(tasks)  # doctest: +SKIP
+    """
+
+    def __init__(self, max_workers=None, executor=None, instrument=False,
+                 trace_memory=True, thread_time=False):
+        self.max_workers = max_workers
+        self.executor = executor
+        self.instrument = instrument
+        self.trace_memory = trace_memory
+        self.thread_time = thread_time
+
+    @staticmethod
+    def _check_tasks(tasks):
+        """Index tasks by name, and check that their dependencies exist and
+        are acyclic.
+        """
+        by_name = {}
+        for task in tasks:
+            if task.name in by_name:
+                raise ValidateError(
+                    'Duplicate measurement task {0!r}'.format(task.name))
+            by_name[task.name] = task
+        for task in tasks:
+            for name in task.requires:
+                if name not in by_name:
+                    raise ValidateError(
+                        'Task {0!r} requires unknown task {1!r}'.format(
+                            task.name, name))
+
+        # Depth-first search for cycles
+        state = {}
+
+        def visit(name, path):
+            if state.get(name) == 'done':
+                return
+            if state.get(name) == 'visiting':
+                raise ValidateError('Cyclic measurement task dependencies: '
+                                    '{0}'.format(' -> '.join(path + [name])))
+            state[name] = 'visiting'
+            for required in by_name[name].requires:
+                visit(required, path + [name])
+            state[name] = 'done'
+
+        for task in tasks:
+            visit(task.name, [])
+        return by_name
+
+    def iter_completed(self, tasks):
+        """Run tasks, yielding measurements as they complete.
+
+        Parameters
+        ----------
+        tasks : `list` of `MeasurementTask`
+            Tasks to run.
+
+        Yields
+        ------
+        name : `str`
+            Name of the completed task.
+        measurement : `MeasurementBase`-type
+            The completed measurement, with its linked blobs.
+
+        Raises
+        ------
+        lsst.validate.base.ValidateError
+            Raised if tasks have duplicate names, or unknown or cyclic
+            dependencies.
+        """
+        tasks = list(tasks)
+        self._check_tasks(tasks)
+
+        if self.executor is None:
+            pool = ProcessPoolExecutor(max_workers=self.max_workers)
+        else:
+            pool = self.executor
+
+        completed = {}
+        waiting = list(tasks)
+        running = {}
+        try:
+            while waiting or running:
+                ready = [t for t in waiting
+                         if all(r in completed for r in t.requires)]
+                for task in ready:
+                    waiting.remove(task)
+                    inputs = {r: completed[r] for r in task.requires}
+                    future = pool.submit(_run_task, task.factory, task.args,
+                                         task.kwargs, inputs,
+                                         instrument=self.instrument,
+                                         trace_memory=self.trace_memory,
+                                         thread_time=self.thread_time)
+                    running[future] = task.name
+
+                done, _ = wait(list(running), return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    measurement = future.result()
+                    completed[name] = measurement
+                    yield name, measurement
+                # Release measurements that no waiting task requires
+                for name in list(completed):
+                    if not any(name in t.requires for t in waiting):
+                        del completed[name]
+        finally:
+            for future in running:
+                future.cancel()
+            if self.executor is None:
+                pool.shutdown(wait=True)
+
+    def run(self, tasks, job=None):
+        """Run tasks, registering measurements in a `Job` as they complete.
+
+        Parameters
+        ----------
+        tasks : `list` of `MeasurementTask`
+            Tasks to run.
+        job : `Job`, optional
+            Job to register measurements in. A new `Job` is created by
+            default.
+
+        Returns
+        -------
+        job : `Job`
+            The job, with all measurements and their blobs registered.
+        """
+        if job is None:
+            job = Job()
+        for _, measurement in self.iter_completed(tasks):
+            job.register_measurement(measurement)
+        return job
@@ -0,0 +1,230 @@
+# See COPYRIGHT file at the top of the source tree.
+from __future__ import print_function, division
+
+import tempfile
+
+from .datum import Datum, _versions
+from .errors import ValidateError
+from .lazy import lazy_import
+
+
+__all__ = ['GrowableDatum']
+
+
+np = lazy_import('numpy')
+u = lazy_import('astropy.units')
+
+
+class GrowableDatum(Datum):
+    """An array `Datum` that grows as chunks of data are appended.
+
+    Chunks are copied into a preallocated NumPy buffer whose capacity doubles
+    when it is full, so appending takes amortized constant time per element
+    and no intermediate Python lists are needed. Beyond ``spill_threshold``
+    bytes, the buffer moves to a memory-mapped temporary file.
+
+    A `GrowableDatum` registered in a blob (see `BlobBase.register_datum`)
+    stays live: the blob serializes whatever has been appended so far. Call
+    `finalize` once all chunks are appended to release the unused capacity.
+
+    Parameters
+    ----------
+    unit : `str` or `astropy.units.Unit`
+        Unit of the values.
+    dtype : `numpy.dtype`, optional
+        dtype of the values. By default, the dtype of the first chunk.
+    label : `str`, optional
+        Label suitable for plot axes (without units).
+    description : `str`, optional
+        Extended description of the `Datum`.
+    encoding : `EncodingPolicy`, optional
+        Encoding of the values in JSON (see `Datum.encoding`).
+    capacity : `int`, optional
+        Initial number of rows of the buffer.
+    spill_threshold : `int`, optional
+        Size, in bytes, beyond which the buffer is memory-mapped to a
+        temporary file rather than held in memory. By default the buffer is
+        always in memory.
+    spill_dir : `str`, optional
+        Directory of the temporary file. By default, the system's temporary
+        directory.
+
+    Examples
+    --------
+    >>> residuals = GrowableDatum('mmag', label='residuals')  # doctest: +SKIP
+    >>> for visit in visits:  # doctest: +SKIP
+    ...     residuals.append(compute_residuals(visit))
+    >>> blob.register_datum('residuals', datum=residuals)  # doctest: +SKIP
+    """
+
+    def __init__(self, unit, dtype=None, label=None, description=None,
+                 encoding=None, capacity=1024, spill_threshold=None,
+                 spill_dir=None):
+        self._unit = u.Unit(unit)
+        self._dtype = np.dtype(dtype) if dtype is not None else None
+        self._initial_capacity = max(int(capacity), 1)
+        self.spill_threshold = spill_threshold
+        self.spill_dir = spill_dir
+        self._buffer = None
+        self._file = None
+        self._size = 0
+        self._finalized = False
+        Datum.__init__(self, None, label=label, description=description,
+                       encoding=encoding)
+
+    def __len__(self):
+        return self._size
+
+    @property
+    def quantity(self):
+        """Values appended so far (`astropy.units.Quantity`).
+
+        The quantity is a view of the buffer, which is only valid until the
+        next `append`.
+        """
+        if self._buffer is None:
+            dtype = self._dtype if self._dtype is not None else float
+            return self._view_quantity(np.empty(0, dtype=dtype), self._unit)
+        return self._view_quantity(
+            self._buffer[:self._size].view(np.ndarray), self._unit)
+
+    @quantity.setter
+    def quantity(self, q):
+        """Replace the values with those of an array, or clear them if
+        ``q`` is `None`.
+        """
+        self._check_not_finalized()
+        self._size = 0
+        self._version = next(_versions)
+        if q is not None:
+            self.append(q)
+
+    @property
+    def capacity(self):
+        """Number of rows the buffer can hold before it grows (`int`)."""
+        return 0 if self._buffer is None else len(self._buffer)
+
+    @property
+    def is_spilled(self):
+        """`True` if the buffer is memory-mapped to a file (`bool`)."""
+        return self._file is not None
+
+    def _check_not_finalized(self):
+        if self._finalized:
+            raise ValidateError('Cannot modify a finalized GrowableDatum')
+
+    def append(self, chunk):
+        """Append values.
+
+        Parameters
+        ----------
+        chunk : `astropy.units.Quantity` or array-like
+            A value, or an array of values to append along the first axis.
+            Quantities are converted into the datum's `unit`; other values are
+            assumed to be in that unit. All values must share the shape of
+            the first chunk's rows.
+
+        Raises
+        ------
+        lsst.validate.base.ValidateError
+            Raised if the datum is finalized, or if the chunk's rows have the
+            wrong shape.
+        astropy.units.UnitConversionError
+            Raised if the chunk's unit cannot be converted into the datum's
+            unit.
+        """
+        self._check_not_finalized()
+        if isinstance(chunk, u.Quantity):
+            chunk = chunk.to_value(self._unit)
+        chunk = np.asarray(chunk)
+        if chunk.ndim == 0:
+            chunk = chunk.reshape(1)
+
+        if self._buffer is None:
+            if self._dtype is None:
+                self._dtype = chunk.dtype
+            self._buffer = np.empty((0,) + chunk.shape[1:],
+                                    dtype=self._dtype)
+        elif chunk.shape[1:] != self._buffer.shape[1:]:
+            raise ValidateError(
+                'Cannot append rows of shape {0} to a GrowableDatum with rows '
+                'of shape {1}'.format(chunk.shape[1:],
+                                      self._buffer.shape[1:]))
+
+        end = self._size + len(chunk)
+        if end > len(self._buffer):
+            self._grow(max(2 * len(self._buffer), end,
+                           self._initial_capacity))
+        self._buffer[self._size:end] = chunk
+        self._size = end
+        self._version = next(_versions)
+
+    def _row_nbytes(self):
+        return self._dtype.itemsize * int(np.prod(self._buffer.shape[1:]))
+
+    def _map(self, n_rows):
+        """Memory-map the first ``n_rows`` rows of the spill file."""
+        return np.memmap(self._file, dtype=self._dtype, mode='r+',
+                         shape=(n_rows,) + self._buffer.shape[1:])
+
+    def _grow(self, n_rows):
+        """Grow the buffer to ``n_rows`` rows."""
+        nbytes = n_rows * self._row_nbytes()
+        if self._file is not None:
+            # The file grows in place; remapping it does not copy the data
+            self._buffer.flush()
+            self._file.truncate(nbytes)
+            self._buffer = self._map(n_rows)
+        elif self.spill_threshold is not None and \
+                nbytes > self.spill_threshold:
+            self._file = tempfile.TemporaryFile(dir=self.spill_dir)
+            self._file.truncate(nbytes)
+            buffer = self._map(n_rows)
+            buffer[:self._size] = self._buffer[:self._size]
+            self._buffer = buffer
+        else:
+            buffer = np.empty((n_rows,) + self._buffer.shape[1:],
+                              dtype=self._dtype)
+            buffer[:self._size] = self._buffer[:self._size]
+            self._buffer = buffer
+
+    def finalize(self):
+        """Release the unused capacity, and return the values as a `Datum`.
+
+        Once finalized, no more values can be appended.
+
+        Returns
+        -------
+        datum : `Datum`
+            Datum with the values, label, description and encoding of this
+            datum. If the buffer was spilled to a file, the quantity is
+            memory-mapped to that file, which is deleted once the quantity
+            is no longer referenced.
+        """
+        if not self._finalized and self._buffer is not None:
+            if self._file is not None:
+                self._buffer.flush()
+                if self._size > 0:
+                    self._file.truncate(self._size * self._row_nbytes())
+                    self._buffer = self._map(self._size)
+                else:
+                    # Empty files cannot be memory-mapped
+                    self._buffer = self._buffer[:0].copy()
+            elif self._size < len(self._buffer):
+                shape = (self._size,) + self._buffer.shape[1:]
+                try:
+                    # Shrinks the allocation in place if nothing else
+                    # references the buffer
+                    self._buffer.resize(shape)
+                except ValueError:
+                    self._buffer = self._buffer[:self._size].copy()
+        self._finalized = True
+        return Datum(self.quantity, label=self.label,
+                     description=self.description, encoding=self.encoding)
+
+    def __reduce__(self):
+        # Buffers and spill files are not picklable, so a GrowableDatum is
+        # pickled as a Datum of its current values
+        datum = Datum(self.quantity, label=self.label,
+                      description=self.description, encoding=self.encoding)
+        return (Datum.__new__, (Datum,), datum.__getstate__())
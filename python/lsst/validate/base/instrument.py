@@ -0,0 +1,243 @@
+# See COPYRIGHT file at the top of the source tree.
+from __future__ import print_function, division
+
+import threading
+import time
+
+from .jsonmixin import JsonSerializationMixin
+from .lazy import lazy_import
+
+
+__all__ = ['MeasurementProfile', 'ResourceMonitor', 'aggregate_profiles']
+
+
+tracemalloc = lazy_import('tracemalloc')
+
+
+class ResourceMonitor(object):
+    """Context manager that records the wall time, CPU time and peak memory
+    allocated by a block of code.
+
+    Peak memory is measured with `tracemalloc`, which is started while
+    monitors are active if it isn't already tracing. Memory is counted
+    relative to the memory already allocated when the block starts.
+    `tracemalloc` slows down memory allocation, so memory tracing can be
+    disabled.
+
+    Monitors can be nested: the peak memory of an enclosing block includes
+    the peaks of the blocks it encloses. `tracemalloc` traces the whole
+    process, so the peak memory of blocks running concurrently in other
+    threads also includes each other's allocations. Before Python 3.9,
+    `tracemalloc` can't reset its peak, so the peak memory of a block
+    starting while memory is already traced is an upper bound that may
+    include earlier peaks.
+
+    CPU time is the CPU time of the whole process by default, which includes
+    the time of other threads, such as those of a thread pool running
+    monitored blocks concurrently. Monitors entered in threads of a pool can
+    record the CPU time of their own thread instead; that time doesn't
+    include threads that the block starts itself (for example, multithreaded
+    numerical libraries).
+
+    Parameters
+    ----------
+    trace_memory : `bool`, optional
+        Record peak memory with `tracemalloc`.
+    thread_time : `bool`, optional
+        Record the CPU time of the current thread (`time.thread_time`)
+        rather than of the process (`time.process_time`).
+
+    Examples
+    --------
+    >>> with ResourceMonitor() as monitor:
+    ...     data = list(range(100000))
+    >>> monitor.wall_time > 0.
+    True
+    """
+
+    _active = []
+    """Monitors currently tracing memory (`list`)."""
+
+    _lock = threading.Lock()
+
+    _started_tracing = False
+    """Whether monitors started `tracemalloc`, so that it is stopped when
+    the last active monitor exits.
+    """
+
+    def __init__(self, trace_memory=True, thread_time=False):
+        self.trace_memory = trace_memory
+        self.thread_time = thread_time
+        self.wall_time = None
+        """Elapsed wall-clock time, in seconds (`float`)."""
+        self.cpu_time = None
+        """CPU time of the process, or of the current thread with
+        ``thread_time``, in seconds (`float`).
+        """
+        self.peak_memory = None
+        """Peak memory allocated by Python in the block, in bytes (`int`), or
+        `None` if memory was not traced.
+        """
+
+    @staticmethod
+    def _record_peak():
+        """Keep the current peak of traced memory in all active monitors."""
+        peak = tracemalloc.get_traced_memory()[1]
+        for monitor in ResourceMonitor._active:
+            monitor._peak = max(monitor._peak, peak)
+
+    def __enter__(self):
+        if self.trace_memory:
+            with ResourceMonitor._lock:
+                if not ResourceMonitor._active:
+                    ResourceMonitor._started_tracing = \
+                        not tracemalloc.is_tracing()
+                    if ResourceMonitor._started_tracing:
+                        tracemalloc.start()
+                # The peak is reset for the whole process, so active
+                # monitors keep the peak reached so far
+                self._record_peak()
+                self._baseline = tracemalloc.get_traced_memory()[0]
+                self._peak = self._baseline
+                if hasattr(tracemalloc, 'reset_peak'):
+                    # Python 3.9+
+                    tracemalloc.reset_peak()
+                ResourceMonitor._active.append(self)
+        self._cpu_clock = time.thread_time if self.thread_time else \
+            time.process_time
+        self._wall_start = time.perf_counter()
+        self._cpu_start = self._cpu_clock()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.cpu_time = self._cpu_clock() - self._cpu_start
+        self.wall_time = time.perf_counter() - self._wall_start
+        if self.trace_memory:
+            with ResourceMonitor._lock:
+                self._record_peak()
+                ResourceMonitor._active.remove(self)
+                if not ResourceMonitor._active and \
+                        ResourceMonitor._started_tracing:
+                    tracemalloc.stop()
+                    ResourceMonitor._started_tracing = False
+            self.peak_memory = max(self._peak - self._baseline, 0)
+
+
+class MeasurementProfile(JsonSerializationMixin):
+    """Resources used to compute a measurement.
+
+    Profiles are serialized in the ``profile`` section of `Job.json`.
+
+    Parameters
+    ----------
+    measurement_id : `str`
+        `~MeasurementBase.identifier` of the measurement.
+    metric_name : `str`
+        Name of the measured `Metric`.
+    spec_name : `str`, optional
+        Specification level name of the measurement.
+    filter_name : `str`, optional
+        Optical filter name of the measurement.
+    wall_time : `float`
+        Wall-clock time, in seconds.
+    cpu_time : `float`
+        CPU time, in seconds. This is the CPU time of the whole process
+        while the measurement was computed, including that of other threads,
+        unless the measurement was instrumented with ``thread_time``, in which
+        case it is the CPU time of the computing thread only (see
+        `ResourceMonitor`).
+    peak_memory : `int`, optional
+        Peak memory allocated, in bytes.
+    """
+
+    def __init__(self, measurement_id, metric_name, spec_name=None,
+                 filter_name=None, wall_time=None, cpu_time=None,
+                 peak_memory=None):
+        self.measurement_id = measurement_id
+        self.metric_name = metric_name
+        self.spec_name = spec_name
+        self.filter_name = filter_name
+        self.wall_time = wall_time
+        self.cpu_time = cpu_time
+        self.peak_memory = peak_memory
+
+    @classmethod
+    def from_monitor(cls, measurement, monitor):
+        """Make the profile of a measurement from a `ResourceMonitor`."""
+        return cls(measurement.identifier, measurement.metric.name,
+                   spec_name=measurement.spec_name,
+                   filter_name=measurement.filter_name,
+                   wall_time=monitor.wall_time, cpu_time=monitor.cpu_time,
+                   peak_memory=monitor.peak_memory)
+
+    @classmethod
+    def from_json(cls, json_data):
+        """Construct a MeasurementProfile from a JSON dataset.
+
+        Parameters
+        ----------
+        json_data : `dict`
+            MeasurementProfile JSON object.
+
+        Returns
+        -------
+        profile : `MeasurementProfile`
+            MeasurementProfile from JSON.
+        """
+        return cls(json_data['measurement'], json_data['metric'],
+                   spec_name=json_data['spec_name'],
+                   filter_name=json_data['filter_name'],
+                   wall_time=json_data['wall_time'],
+                   cpu_time=json_data['cpu_time'],
+                   peak_memory=json_data['peak_memory'])
+
+    @property
+    def json(self):
+        """`dict` that can be serialized as JSON."""
+        return JsonSerializationMixin.jsonify_dict({
+            'measurement': self.measurement_id,
+            'metric': self.metric_name,
+            'spec_name': self.spec_name,
+            'filter_name': self.filter_name,
+            'wall_time': self.wall_time,
+            'cpu_time': self.cpu_time,
+            'peak_memory': self.peak_memory})
+
+
+def aggregate_profiles(jobs):
+    """Aggregate measurement profiles of many jobs by metric.
+
+    Parameters
+    ----------
+    jobs : iterable of `Job` or `dict`
+        Jobs, or `Job` JSON documents.
+
+    Returns
+    -------
+    summary : `dict`
+        Dictionary keyed by metric name. Each value is a `dict` with the
+        ``count`` of profiled measurements, the ``total`` and ``mean`` of
+        ``wall_time`` and ``cpu_time`` (seconds), and the ``max`` of
+        ``peak_memory`` (bytes; `None` if memory was not traced).
+        Metrics are ordered by decreasing total wall time, so the most
+        expensive metrics come first.
+    """
+    stats = {}
+    for job in jobs:
+        docs = job.get('profile', []) if isinstance(job, dict) else \
+            [p.json for p in job.profiles]
+        for doc in docs:
+            s = stats.setdefault(doc['metric'], {
+                'count': 0, 'total_wall_time': 0., 'total_cpu_time': 0.,
+                'max_peak_memory': None})
+            s['count'] += 1
+            s['total_wall_time'] += doc['wall_time']
+            s['total_cpu_time'] += doc['cpu_time']
+            if doc['peak_memory'] is not None:
+                s['max_peak_memory'] = max(s['max_peak_memory'] or 0,
+                                           doc['peak_memory'])
+    for s in stats.values():
+        s['mean_wall_time'] = s['total_wall_time'] / s['count']
+        s['mean_cpu_time'] = s['total_cpu_time'] / s['count']
+    return dict(sorted(stats.items(),
+                       key=lambda item: -item[1]['total_wall_time']))
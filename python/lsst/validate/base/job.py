@@ -1,9 +1,17 @@
 # See COPYRIGHT file at the top of the source tree.
 from __future__ import print_function, division
 
+import threading
+
+from .compression import read_json, write_json as _write_json
+from .errors import ValidateError
+from .instrument import MeasurementProfile
 from .jsonmixin import JsonSerializationMixin
 from .blob import BlobBase, DeserializedBlob
 from .measurement import MeasurementBase, DeserializedMeasurement
+from .preview import DEFAULT_PREVIEW_SIZE
+from .profiling import profiled, class_type, instance_type, json_data_size, \
+    result_size
 
 
 __all__ = ['Job']
@@ -27,6 +35,11 @@ class Job(JsonSerializationMixin):
     Typically, `Job`\ s are uploaded to SQUASH separately for each tested
     dataset.
 
+    Measurements and blobs can be registered concurrently from many threads.
+    Iterating over `measurements` or `blobs`, and serializing the job, work
+    on a snapshot of the registered objects, so they are safe while other
+    threads keep registering.
+
     Parameters
     ----------
     measurements : `list`, optional
@@ -35,8 +48,20 @@ class Job(JsonSerializationMixin):
     blobs : `list`, optional
         List of `BlobBase`-derived objects. Additional blobs can be added
         with the `register_blob` method.
+    blob_store : `BlobStore`, optional
+        Blob store that holds the job's blobs. If set, `write_json` writes
+        blob data into the store (see `write_blobs`), and the file only
+        references them.
+    """
+
+    blob_store = None
+    """`BlobStore` that holds the data of this job's blobs, or `None` if
+    blobs are serialized inline.
     """
-    def __init__(self, measurements=None, blobs=None):
+
+    def __init__(self, measurements=None, blobs=None, blob_store=None):
+        self.blob_store = blob_store
+        self._init_locks()
         self._measurements = []
         self._measurement_ids = set()
         self._blobs = []
@@ -50,6 +75,23 @@ class Job(JsonSerializationMixin):
             for b in blobs:
                 self.register_blob(b)
 
+    def _init_locks(self):
+        # Registration holds the measurement lock, then the blob lock. The
+        # lists of measurements and blobs are append-only, so readers take
+        # lock-free snapshots by slicing them.
+        self._measurement_lock = threading.Lock()
+        self._blob_lock = threading.Lock()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['_measurement_lock']
+        del state['_blob_lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._init_locks()
+
     def register_measurement(self, m):
         """Add a measurement object to the `Job`.
 
@@ -62,17 +104,21 @@ class Job(JsonSerializationMixin):
             A measurement object.
         """
         assert isinstance(m, MeasurementBase)
-        if m.identifier not in self._measurement_ids:
-            self._measurements.append(m)
-            self._measurement_ids.add(m.identifier)
-            for name, b in m.blobs.items():
-                self.register_blob(b)
+        with self._measurement_lock:
+            if m.identifier not in self._measurement_ids:
+                # Blobs are registered first, so that readers never see a
+                # measurement without its blobs
+                for name, b in m.blobs.items():
+                    self.register_blob(b)
+                self._measurements.append(m)
+                self._measurement_ids.add(m.identifier)
 
     @property
     def measurements(self):
-        """Measurement iterator."""
-        for m in self._measurements:
-            yield m
+        """Measurement iterator, over the measurements registered when
+        iteration starts.
+        """
+        return iter(self._measurements[:])
 
     def get_measurement(self, metric_name, spec_name=None, filter_name=None):
         """Get a measurement corresponding to the given criteria.
@@ -100,7 +146,8 @@ class Job(JsonSerializationMixin):
             measurement exists or because the request is ambiguous
             (``spec_name`` or ``filter_name`` need to be set).
         """
-        candidates = [m for m in self._measurements if m.label == metric_name]
+        candidates = [m for m in self._measurements[:]
+                      if m.label == metric_name]
         if len(candidates) == 1:
             candidate = candidates[0]
             if spec_name is not None and candidate.spec_name is not None:
@@ -130,57 +177,277 @@ class Job(JsonSerializationMixin):
     def register_blob(self, b):
         """Add a blob object to the `Job`.
 
+        A blob is only added once, even if it is registered several times.
+        Distinct blob objects are all kept, even if they are
+        `~BlobBase.content_addressed` with identical content: their content
+        may diverge later. Blobs with identical content are only stored once
+        when the job is serialized.
+
         Parameters
         ----------
         b : `BlobBase`-type object
             A blob object.
         """
         assert isinstance(b, BlobBase)
-        if b.identifier not in self._blob_ids:
-            self._blobs.append(b)
-            self._blob_ids.add(b.identifier)
+        with self._blob_lock:
+            # The UUID4 (or deserialized identifier) identifies the object,
+            # unlike a content-addressed identifier
+            if b._id not in self._blob_ids:
+                self._blobs.append(b)
+                self._blob_ids.add(b._id)
+
+    @property
+    def profiles(self):
+        """`list` of the `MeasurementProfile`\ s of instrumented
+        measurements (see `MeasurementBase.instrument`).
+        """
+        return [m.profile for m in self._measurements[:]
+                if m.profile is not None]
 
     @property
     def blobs(self):
-        """Blob iterator."""
-        for b in self._blobs:
-            yield b
+        """Blob iterator, over the blobs registered when iteration
+        starts.
+        """
+        return iter(self._blobs[:])
+
+    def _unique_blobs(self):
+        """Registered blobs, without duplicate identifiers.
+
+        Content-addressed blobs with identical content are only deduplicated
+        here, at serialization time, since their content may change after
+        registration.
+        """
+        blobs = []
+        blob_ids = set()
+        for b in self._blobs[:]:
+            identifier = b.identifier
+            if identifier not in blob_ids:
+                blobs.append(b)
+                blob_ids.add(identifier)
+        return blobs
+
+    def write_blobs(self):
+        """Write the job's blobs into its `blob_store`.
+
+        Raises
+        ------
+        lsst.validate.base.ValidateError
+            Raised if the job has no `blob_store`.
+        """
+        if self.blob_store is None:
+            raise ValidateError('Job has no blob store')
+        for b in self._unique_blobs():
+            self.blob_store.put(b)
+
+    def write_json(self, filepath, compression='infer', compact=False):
+        """Write JSON to a file.
+
+        If the job has a `blob_store`, the blobs are written into the store
+        (see `write_blobs`) and the file only references them (see
+        `reference_json`).
+
+        Parameters
+        ----------
+        filepath : `str`
+            Destination file name for JSON output.
+        compression : `str`, optional
+            Compression codec: ``'gzip'``, ``'bz2'``, ``'lzma'`` or `None`.
+            By default the codec is inferred from the extension of
+            ``filepath`` (``.gz``, ``.bz2``, ``.xz``), and other extensions
+            are written uncompressed.
+        compact : `bool`, optional
+            If `True`, write JSON without indentation or whitespace, and
+            without sorting keys.
+        """
+        if self.blob_store is None:
+            JsonSerializationMixin.write_json(self, filepath,
+                                              compression=compression,
+                                              compact=compact)
+        else:
+            self.write_blobs()
+            _write_json(self.reference_json, filepath,
+                        compression=compression, compact=compact)
 
     @classmethod
-    def from_json(cls, json_data):
+    def read_json(cls, filepath, compression='infer', blob_store=None):
+        """Read a Job from a JSON file written by `write_json`.
+
+        Parameters
+        ----------
+        filepath : `str`
+            Path of the JSON file.
+        compression : `str`, optional
+            Compression codec: ``'gzip'``, ``'bz2'``, ``'lzma'`` or `None`.
+            By default the codec is inferred from the extension of
+            ``filepath``.
+        blob_store : `BlobStore`, optional
+            Blob store that holds the data of blobs that are only referenced
+            by the file.
+
+        Returns
+        -------
+        job : `Job`-type
+            Job from the JSON file.
+        """
+        return cls.from_json(read_json(filepath, compression=compression),
+                             blob_store=blob_store)
+
+    @classmethod
+    @profiled('from_json', type_name=class_type, size=json_data_size)
+    def from_json(cls, json_data, blob_store=None):
         """Construct a Job and constituent objects from a JSON dataset.
 
         Parameters
         ----------
         json_data : `dict`
             Job JSON object (as produced by `json`).
+        blob_store : `BlobStore`, optional
+            Blob store that holds the data of blobs that are only referenced
+            by ``json_data``. Those blobs read their data from the store on
+            first access. The store also becomes the job's `blob_store`.
 
         Returns
         -------
         job : `Job`-type
             Job from JSON.
         """
-        blobs = [DeserializedBlob.from_json(doc) for doc in json_data['blobs']]
+        blobs = [DeserializedBlob.from_json(doc, blob_store=blob_store)
+                 for doc in json_data['blobs']]
         measurements = [
             DeserializedMeasurement.from_json(doc,
-                                              blobs_json=json_data['blobs'])
+                                              blobs_json=json_data['blobs'],
+                                              blob_store=blob_store)
             for doc in json_data['measurements']]
-        job = cls(measurements=measurements, blobs=blobs)
+        if 'profile' in json_data:
+            by_id = {m.identifier: m for m in measurements}
+            for doc in json_data['profile']:
+                if doc['measurement'] in by_id:
+                    by_id[doc['measurement']].profile = \
+                        MeasurementProfile.from_json(doc)
+        job = cls(measurements=measurements, blobs=blobs,
+                  blob_store=blob_store)
         return job
 
     @property
+    @profiled('json', type_name=instance_type, size=result_size)
     def json(self):
-        """`Job` data as a JSON-serialiable `dict`."""
-        doc = JsonSerializationMixin.jsonify_dict({
-            'measurements': self._measurements,
-            'blobs': self._blobs})
+        """`Job` data as a JSON-serialiable `dict`.
+
+        Blobs are always serialized with their data, even if the job has a
+        `blob_store` (see `reference_json`).
+
+        If measurements were instrumented, their `MeasurementProfile`\ s are
+        listed in a ``profile`` section.
+        """
+        return self._json(references=False)
+
+    @property
+    def reference_json(self):
+        """`Job` data as a JSON-serializable `dict`, with blobs represented
+        by references (see `BlobBase.reference_json`) rather than by their
+        data.
+
+        This is the document that `write_json` writes for a job with a
+        `blob_store`. The blobs are not written into the store: call
+        `write_blobs` first, so that readers can load their data.
+        """
+        return self._json(references=True)
+
+    def _json(self, references):
+        # Blobs are registered before their measurements, so the blob
+        # snapshot covers every measurement of the measurement snapshot
+        measurements = self._measurements[:]
+        blobs = self._unique_blobs()
+        if references:
+            blobs = [b.reference_json for b in blobs]
+        object_doc = {'measurements': measurements,
+                      'blobs': blobs}
+        profiles = [m.profile for m in measurements if m.profile is not None]
+        if profiles:
+            object_doc['profile'] = profiles
+        doc = JsonSerializationMixin.jsonify_dict(object_doc)
         return doc
 
+    def preview_json(self, size=DEFAULT_PREVIEW_SIZE, method='uniform',
+                     seed=0, source=None):
+        """Lightweight preview of the job, as a JSON-serializable `dict`.
+
+        The preview is the `json` document, except that blobs are always
+        serialized inline with their large array datums decimated (see
+        `BlobBase.preview_json`). A ``preview`` section records the
+        decimation parameters and the ``source`` of the full data.
+
+        The preview is read with `from_json`. Pass the `BlobStore` (or
+        `JobContainer`) that holds the full data as the ``blob_store``, so
+        that `DeserializedBlob.load_full_data` can read the full data of a
+        blob.
+
+        Parameters
+        ----------
+        size : `int`, optional
+            Maximum number of rows of array datums.
+        method : `str`, optional
+            Decimation method: ``'uniform'``, ``'random'`` or
+            ``'envelope'`` (see `~lsst.validate.base.preview.decimate`).
+        seed : `int`, optional
+            Seed of the ``'random'`` method.
+        source : `str`, optional
+            Location of the full data, such as the path of the job's JSON
+            file, container file or blob store.
+
+        Returns
+        -------
+        json_data : `dict`
+            Preview of the job.
+        """
+        measurements = self._measurements[:]
+        blobs = [b.preview_json(size=size, method=method, seed=seed)
+                 for b in self._unique_blobs()]
+        object_doc = {'measurements': measurements,
+                      'blobs': blobs,
+                      'preview': {'size': size, 'method': method,
+                                  'seed': seed, 'source': source}}
+        profiles = [m.profile for m in measurements if m.profile is not None]
+        if profiles:
+            object_doc['profile'] = profiles
+        return JsonSerializationMixin.jsonify_dict(object_doc)
+
+    def write_preview_json(self, filepath, size=DEFAULT_PREVIEW_SIZE,
+                           method='uniform', seed=0, source=None,
+                           compression='infer', compact=False):
+        """Write a preview of the job (see `preview_json`) to a file.
+
+        Parameters
+        ----------
+        filepath : `str`
+            Destination file name for JSON output.
+        size : `int`, optional
+            Maximum number of rows of array datums.
+        method : `str`, optional
+            Decimation method: ``'uniform'``, ``'random'`` or
+            ``'envelope'``.
+        seed : `int`, optional
+            Seed of the ``'random'`` method.
+        source : `str`, optional
+            Location of the full data.
+        compression : `str`, optional
+            Compression codec: ``'gzip'``, ``'bz2'``, ``'lzma'`` or `None`.
+            By default the codec is inferred from the extension of
+            ``filepath``.
+        compact : `bool`, optional
+            If `True`, write JSON without indentation or whitespace, and
+            without sorting keys.
+        """
+        _write_json(self.preview_json(size=size, method=method, seed=seed,
+                                      source=source),
+                    filepath, compression=compression, compact=compact)
+
     @property
     def metric_names(self):
         """Names of `Metric`\ s measured in this `Job` (`list`)."""
         metric_names = []
-        for m in self._measurements:
+        for m in self._measurements[:]:
             if m.quantity is not None:
                 if m.metric.name not in metric_names:
                     metric_names.append(m.metric.name)
@@ -192,7 +459,7 @@ class Job(JsonSerializationMixin):
         `Metric`\ s measured in this `Job`.
         """
         spec_names = []
-        for m in self._measurements:
+        for m in self._measurements[:]:
             for spec in m.metric.specs:
                 if spec.name not in spec_names:
                     spec_names.append(spec.name)
@@ -0,0 +1,331 @@
+# See COPYRIGHT file at the top of the source tree.
+from __future__ import print_function, division
+
+from .datum import Datum, QuantityAttributeMixin
+from .jsonmixin import JsonSerializationMixin
+from .lazy import lazy_import
+from .metric import Metric
+
+
+__all__ = ['MeasurementDiff', 'JobDiff', 'diff_jobs']
+
+
+np = lazy_import('numpy')
+u = lazy_import('astropy.units')
+
+
+class _Entry(object):
+    """A measurement indexed for comparison, built either from a measurement
+    object or from a measurement's JSON document.
+
+    The metric of a JSON document is only deserialized if needed, and then
+    only once per metric name and job (``metric_cache``).
+    """
+
+    def __init__(self, quantity, parameters, metric=None, metric_doc=None,
+                 metric_cache=None):
+        self.quantity = quantity
+        self.parameters = parameters
+        self._metric = metric
+        self._metric_doc = metric_doc
+        self._metric_cache = metric_cache
+
+    @classmethod
+    def from_measurement(cls, m):
+        return cls(m.quantity,
+                   {k: d.quantity for k, d in m.parameters.items()},
+                   metric=m.metric)
+
+    @classmethod
+    def from_json(cls, doc, metric_cache):
+        q = QuantityAttributeMixin._rebuild_quantity(doc['value'],
+                                                     doc['unit'])
+        params = {k: Datum.from_json(d).quantity
+                  for k, d in doc['parameters'].items()}
+        return cls(q, params, metric_doc=doc['metric'],
+                   metric_cache=metric_cache)
+
+    @property
+    def metric(self):
+        if self._metric is None:
+            name = self._metric_doc['name']
+            if name not in self._metric_cache:
+                self._metric_cache[name] = Metric.from_json(self._metric_doc)
+            self._metric = self._metric_cache[name]
+        return self._metric
+
+
+def _index_job(job):
+    """Index a job's measurements by ``(metric, spec_name, filter_name)``,
+    and its blobs by identifier.
+
+    Returns
+    -------
+    measurements : `dict`
+        Lists of `_Entry`, in registration order, keyed by measurement key.
+    blobs : `dict`
+        Blob names keyed by identifier.
+    """
+    measurements = {}
+    if isinstance(job, dict):
+        metric_cache = {}
+        for doc in job['measurements']:
+            key = (doc['metric']['name'], doc['spec_name'],
+                   doc['filter_name'])
+            measurements.setdefault(key, []).append(
+                _Entry.from_json(doc, metric_cache))
+        # Only identifiers and names are read, so blob data are untouched
+        blobs = {doc['identifier']: doc['name'] for doc in job['blobs']}
+    else:
+        for m in job.measurements:
+            key = (m.metric.name, m.spec_name, m.filter_name)
+            measurements.setdefault(key, []).append(
+                _Entry.from_measurement(m))
+        blobs = {b.identifier: b.name for b in job.blobs}
+    return measurements, blobs
+
+
+def _is_quantity(q):
+    return not QuantityAttributeMixin._is_non_quantity_type(q) and \
+        isinstance(q, u.Quantity)
+
+
+def _values_equal(old, new):
+    """Compare two values, converting quantities with compatible units."""
+    if _is_quantity(old) and _is_quantity(new):
+        try:
+            new = new.to(old.unit)
+        except u.UnitConversionError:
+            return False
+        return old.shape == new.shape and bool(np.all(old == new))
+    if _is_quantity(old) or _is_quantity(new):
+        return False
+    return old == new
+
+
+class MeasurementDiff(JsonSerializationMixin):
+    """Differences between two measurements of the same metric,
+    specification level and filter.
+
+    Parameters
+    ----------
+    metric_name : `str`
+        Name of the `Metric`.
+    spec_name : `str`
+        Specification level name of the measurements, or `None`.
+    filter_name : `str`
+        Optical filter name of the measurements, or `None`.
+    old : `astropy.units.Quantity`, `str`, `bool`, `int` or `None`
+        Value of the old measurement.
+    new : `astropy.units.Quantity`, `str`, `bool`, `int` or `None`
+        Value of the new measurement.
+    delta : `astropy.units.Quantity` or `None`
+        ``new - old``, in the unit of ``old``, or `None` if the values are
+        not quantities with compatible units and the same shape.
+    parameter_changes : `dict`
+        ``(old, new)`` values of the parameters that changed, keyed by
+        parameter name. Parameters that only exist in one of the
+        measurements have a `None` value in the other.
+    spec_flips : `dict`
+        ``(old_passed, new_passed)`` of the specification levels whose
+        pass/fail outcome changed, keyed by specification level name.
+    """
+
+    def __init__(self, metric_name, spec_name, filter_name, old, new, delta,
+                 parameter_changes, spec_flips):
+        self.metric_name = metric_name
+        self.spec_name = spec_name
+        self.filter_name = filter_name
+        self.old = old
+        self.new = new
+        self.delta = delta
+        self.parameter_changes = parameter_changes
+        self.spec_flips = spec_flips
+
+    @property
+    def key(self):
+        """``(metric_name, spec_name, filter_name)`` (`tuple`)."""
+        return (self.metric_name, self.spec_name, self.filter_name)
+
+    @property
+    def value_changed(self):
+        """`True` if the measured value changed (`bool`)."""
+        return not _values_equal(self.old, self.new)
+
+    @property
+    def changed(self):
+        """`True` if the value, parameters or specification outcomes changed
+        (`bool`).
+        """
+        return self.value_changed or bool(self.parameter_changes) or \
+            bool(self.spec_flips)
+
+    @classmethod
+    def _compare(cls, key, old, new):
+        """Compare two indexed measurements."""
+        delta = None
+        if _is_quantity(old.quantity) and _is_quantity(new.quantity) and \
+                old.quantity.shape == new.quantity.shape:
+            try:
+                delta = new.quantity.to(old.quantity.unit) - old.quantity
+            except u.UnitConversionError:
+                pass
+
+        parameter_changes = {}
+        for name in set(old.parameters) | set(new.parameters):
+            old_param = old.parameters.get(name)
+            new_param = new.parameters.get(name)
+            if not _values_equal(old_param, new_param):
+                parameter_changes[name] = (old_param, new_param)
+
+        spec_flips = {}
+        metric_name, _, filter_name = key
+        if _is_quantity(old.quantity) and _is_quantity(new.quantity):
+            old_passed = _check_specs(old.metric, old.quantity, filter_name)
+            new_passed = _check_specs(new.metric, new.quantity, filter_name)
+            for spec_name in set(old_passed) & set(new_passed):
+                if old_passed[spec_name] != new_passed[spec_name]:
+                    spec_flips[spec_name] = (old_passed[spec_name],
+                                             new_passed[spec_name])
+
+        return cls(metric_name, key[1], filter_name, old.quantity,
+                   new.quantity, delta, parameter_changes, spec_flips)
+
+    @property
+    def json(self):
+        """`dict` that can be serialized as JSON."""
+        return JsonSerializationMixin.jsonify_dict({
+            'metric': self.metric_name,
+            'spec_name': self.spec_name,
+            'filter_name': self.filter_name,
+            'old': Datum(self.old),
+            'new': Datum(self.new),
+            'delta': Datum(self.delta),
+            'parameter_changes': {
+                k: [Datum(old), Datum(new)]
+                for k, (old, new) in self.parameter_changes.items()},
+            'spec_flips': {k: list(v) for k, v in self.spec_flips.items()}})
+
+
+def _check_specs(metric, quantity, filter_name):
+    """Pass/fail outcomes of a value against each specification level of a
+    metric, keyed by level name.
+    """
+    passed = {}
+    for spec_name in metric.get_spec_names(filter_name=filter_name):
+        try:
+            passed[spec_name] = bool(metric.check_spec(
+                quantity, spec_name, filter_name=filter_name))
+        except (RuntimeError, ValueError, u.UnitConversionError):
+            # Ambiguous specification, array value, or incompatible units
+            continue
+    return passed
+
+
+class JobDiff(JsonSerializationMixin):
+    """Differences between two `Job`\ s.
+
+    Use `diff_jobs` to compare jobs.
+
+    Parameters
+    ----------
+    measurements : `list` of `MeasurementDiff`
+        Comparisons of the measurements found in both jobs.
+    added : `list` of `tuple`
+        ``(metric_name, spec_name, filter_name)`` keys of measurements only
+        in the new job.
+    removed : `list` of `tuple`
+        Keys of measurements only in the old job.
+    blobs_added : `dict`
+        Names of the blobs only in the new job, keyed by identifier.
+    blobs_removed : `dict`
+        Names of the blobs only in the old job, keyed by identifier.
+    """
+
+    def __init__(self, measurements, added, removed, blobs_added,
+                 blobs_removed):
+        self.measurements = measurements
+        self.added = added
+        self.removed = removed
+        self.blobs_added = blobs_added
+        self.blobs_removed = blobs_removed
+
+    @property
+    def changed(self):
+        """`MeasurementDiff`\ s of the measurements that changed
+        (`list`).
+        """
+        return [d for d in self.measurements if d.changed]
+
+    @property
+    def spec_flips(self):
+        """`MeasurementDiff`\ s of the measurements whose specification
+        outcomes changed (`list`).
+        """
+        return [d for d in self.measurements if d.spec_flips]
+
+    @property
+    def json(self):
+        """`dict` that can be serialized as JSON."""
+        return JsonSerializationMixin.jsonify_dict({
+            'measurements': self.changed,
+            'added': [list(k) for k in self.added],
+            'removed': [list(k) for k in self.removed],
+            'blobs_added': self.blobs_added,
+            'blobs_removed': self.blobs_removed})
+
+
+def diff_jobs(old, new):
+    """Compare two jobs.
+
+    Measurements are matched by metric name, specification level name and
+    filter name. Matching takes linear time in the number of measurements.
+
+    Parameters
+    ----------
+    old : `Job` or `dict`
+        Old job, or its JSON document (as produced by `Job.json`, or read
+        from a file). JSON documents are compared without deserializing the
+        job: blob data are never read, and each metric is only deserialized
+        if its specifications need to be checked.
+    new : `Job` or `dict`
+        New job, or its JSON document.
+
+    Returns
+    -------
+    diff : `JobDiff`
+        Differences between the jobs.
+
+    Notes
+    -----
+    Blobs are matched by identifier. Unless blobs are
+    `~BlobBase.content_addressed`, each run gives its blobs new identifiers,
+    so all blobs are reported as removed and added.
+
+    Examples
+    --------
+    >>> with open('last_night.json') as f:  # doctest: +SKIP
+    ...     old_doc = json.load(f)
+    >>> diff = diff_jobs(old_doc, tonights_job)  # doctest: +SKIP
+    >>> for d in diff.spec_flips:  # doctest: +SKIP
+    ...     print(d.metric_name, d.filter_name, d.spec_flips)
+    """
+    old_measurements, old_blobs = _index_job(old)
+    new_measurements, new_blobs = _index_job(new)
+
+    diffs = []
+    added = []
+    removed = []
+    for key, old_entries in old_measurements.items():
+        new_entries = new_measurements.get(key, [])
+        # Measurements that share a key are paired in registration order
+        for old_entry, new_entry in zip(old_entries, new_entries):
+            diffs.append(MeasurementDiff._compare(key, old_entry, new_entry))
+        removed.extend([key] * (len(old_entries) - len(new_entries)))
+    for key, new_entries in new_measurements.items():
+        n_old = len(old_measurements.get(key, []))
+        added.extend([key] * (len(new_entries) - n_old))
+
+    blobs_added = {k: v for k, v in new_blobs.items() if k not in old_blobs}
+    blobs_removed = {k: v for k, v in old_blobs.items() if k not in new_blobs}
+    return JobDiff(diffs, added, removed, blobs_added, blobs_removed)
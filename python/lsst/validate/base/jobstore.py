@@ -0,0 +1,533 @@
+# See COPYRIGHT file at the top of the source tree.
+from __future__ import print_function, division
+
+import datetime
+import hashlib
+import json
+import os
+import sqlite3
+import uuid
+
+from .compression import infer_compression, read_json
+from .errors import ValidateError
+from .measurement import DeserializedMeasurement
+from .job import Job
+
+
+__all__ = ['JobStore']
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    job_id TEXT PRIMARY KEY,
+    run_time TEXT
+);
+CREATE INDEX IF NOT EXISTS jobs_run_time ON jobs (run_time);
+
+CREATE TABLE IF NOT EXISTS metrics (
+    metric_id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    digest TEXT NOT NULL UNIQUE,
+    operator_str TEXT,
+    doc TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS metrics_name ON metrics (name);
+
+CREATE TABLE IF NOT EXISTS specs (
+    metric_id INTEGER NOT NULL REFERENCES metrics (metric_id),
+    name TEXT NOT NULL,
+    value REAL,
+    unit TEXT,
+    filter_names TEXT
+);
+CREATE INDEX IF NOT EXISTS specs_metric ON specs (metric_id, name);
+
+CREATE TABLE IF NOT EXISTS measurements (
+    measurement_id TEXT NOT NULL,
+    job_id TEXT NOT NULL REFERENCES jobs (job_id),
+    metric_id INTEGER NOT NULL REFERENCES metrics (metric_id),
+    metric_name TEXT NOT NULL,
+    spec_name TEXT,
+    filter_name TEXT,
+    value REAL,
+    value_json TEXT,
+    unit TEXT,
+    extras TEXT,
+    PRIMARY KEY (job_id, measurement_id)
+);
+CREATE INDEX IF NOT EXISTS measurements_metric
+    ON measurements (metric_name, filter_name, spec_name);
+
+CREATE TABLE IF NOT EXISTS parameters (
+    job_id TEXT NOT NULL,
+    measurement_id TEXT NOT NULL,
+    name TEXT NOT NULL,
+    doc TEXT NOT NULL,
+    FOREIGN KEY (job_id, measurement_id)
+        REFERENCES measurements (job_id, measurement_id)
+);
+CREATE INDEX IF NOT EXISTS parameters_measurement
+    ON parameters (job_id, measurement_id);
+
+CREATE TABLE IF NOT EXISTS blobs (
+    blob_id TEXT PRIMARY KEY,
+    name TEXT,
+    doc TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS job_blobs (
+    job_id TEXT NOT NULL REFERENCES jobs (job_id),
+    blob_id TEXT NOT NULL REFERENCES blobs (blob_id),
+    PRIMARY KEY (job_id, blob_id)
+);
+
+CREATE TABLE IF NOT EXISTS measurement_blobs (
+    job_id TEXT NOT NULL,
+    measurement_id TEXT NOT NULL,
+    key TEXT NOT NULL,
+    blob_id TEXT NOT NULL REFERENCES blobs (blob_id),
+    PRIMARY KEY (job_id, measurement_id, key),
+    FOREIGN KEY (job_id, measurement_id)
+        REFERENCES measurements (job_id, measurement_id)
+);
+"""
+
+
+class JobStore(object):
+    """A local, SQLite-backed archive of `Job` JSON documents.
+
+    Jobs are ingested into normalized tables (jobs, metrics, specs,
+    measurements, parameters and blobs) that are indexed by metric name,
+    specification name, filter name and job run time. Cross-run queries are
+    answered from those indexes, and `DeserializedMeasurement` or `Job`
+    objects are only rebuilt for the rows that match.
+
+    Measurements are keyed by job and measurement identifier, so the same
+    `Job` document can be ingested several times under different job
+    identifiers.
+
+    Parameters
+    ----------
+    path : `str`, optional
+        Path of the SQLite database file. The database is created if it does
+        not exist. By default the store is held in memory.
+
+    Examples
+    --------
+    >>> store = JobStore('jobs.sqlite3')  # doctest: +SKIP
+    >>> store.ingest_file('Cfht_output_r.json',
+    ...                   run_time='2017-03-01T00:00:00')  # doctest: +SKIP
+    >>> store.query_measurements('PA1', filter_name='r',
+    ...                          since='2016-09-01')  # doctest: +SKIP
+    """
+
+    def __init__(self, path=':memory:'):
+        self.path = path
+        self._conn = sqlite3.connect(path)
+        self._conn.executescript(_SCHEMA)
+
+    def close(self):
+        """Close the underlying database connection."""
+        self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def ingest(self, job, job_id=None, run_time=None):
+        """Add a job to the store.
+
+        Parameters
+        ----------
+        job : `Job` or `dict`
+            A `Job`, or a `Job` JSON document (as produced by `Job.json`).
+        job_id : `str`, optional
+            Identifier for the job. A UUID4-based identifier is generated by
+            default.
+        run_time : `datetime.datetime` or `str`, optional
+            Time of the validation run, as a `datetime.datetime` or an ISO 8601
+            string. The current UTC time is used by default.
+
+        Returns
+        -------
+        job_id : `str`
+            Identifier of the ingested job.
+
+        Raises
+        ------
+        lsst.validate.base.ValidateError
+            Raised if a job with the same ``job_id`` is already stored.
+        """
+        if isinstance(job, Job):
+            job = job.json
+        if job_id is None:
+            job_id = uuid.uuid4().hex
+        run_time = self._format_time(run_time)
+        if run_time is None:
+            run_time = self._format_time(datetime.datetime.utcnow())
+
+        with self._conn:
+            try:
+                self._conn.execute(
+                    'INSERT INTO jobs (job_id, run_time) VALUES (?, ?)',
+                    (job_id, run_time))
+            except sqlite3.IntegrityError:
+                raise ValidateError('Job {0!r} is already stored'.format(job_id))
+
+            for blob_doc in job['blobs']:
+                self._conn.execute(
+                    'INSERT OR IGNORE INTO blobs (blob_id, name, doc) '
+                    'VALUES (?, ?, ?)',
+                    (blob_doc['identifier'], blob_doc['name'],
+                     json.dumps(blob_doc)))
+                self._conn.execute(
+                    'INSERT OR IGNORE INTO job_blobs (job_id, blob_id) '
+                    'VALUES (?, ?)',
+                    (job_id, blob_doc['identifier']))
+
+            for meas_doc in job['measurements']:
+                self._insert_measurement(job_id, meas_doc)
+
+        return job_id
+
+    def ingest_file(self, filepath, job_id=None, run_time=None,
+                    compression='infer'):
+        """Add a job stored as a JSON file (written by `Job.write_json`).
+
+        Parameters
+        ----------
+        filepath : `str`
+            Path of the `Job` JSON file.
+        job_id : `str`, optional
+            Identifier for the job. Defaults to the file name, without its
+            extensions (including any compression extension).
+        run_time : `datetime.datetime` or `str`, optional
+            Time of the validation run. Defaults to the file's modification
+            time.
+        compression : `str`, optional
+            Compression codec of the file (see `Job.read_json`). By default
+            the codec is inferred from the file's extension.
+
+        Returns
+        -------
+        job_id : `str`
+            Identifier of the ingested job.
+        """
+        if job_id is None:
+            job_id = os.path.basename(filepath)
+            if infer_compression(job_id) is not None:
+                job_id = os.path.splitext(job_id)[0]
+            job_id = os.path.splitext(job_id)[0]
+        if run_time is None:
+            run_time = datetime.datetime.utcfromtimestamp(
+                os.path.getmtime(filepath))
+        job_doc = read_json(filepath, compression=compression)
+        return self.ingest(job_doc, job_id=job_id, run_time=run_time)
+
+    def _insert_measurement(self, job_id, meas_doc):
+        metric_id = self._insert_metric(meas_doc['metric'])
+        value = meas_doc['value']
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            numeric_value = None
+        else:
+            numeric_value = value
+        self._conn.execute(
+            'INSERT INTO measurements (measurement_id, job_id, metric_id, '
+            'metric_name, spec_name, filter_name, value, value_json, unit, '
+            'extras) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+            (meas_doc['identifier'], job_id, metric_id,
+             meas_doc['metric']['name'], meas_doc['spec_name'],
+             meas_doc['filter_name'], numeric_value, json.dumps(value),
+             meas_doc['unit'], json.dumps(meas_doc['extras'])))
+        self._conn.executemany(
+            'INSERT INTO parameters (job_id, measurement_id, name, doc) '
+            'VALUES (?, ?, ?, ?)',
+            [(job_id, meas_doc['identifier'], k, json.dumps(v))
+             for k, v in meas_doc['parameters'].items()])
+        self._conn.executemany(
+            'INSERT INTO measurement_blobs (job_id, measurement_id, key, '
+            'blob_id) VALUES (?, ?, ?, ?)',
+            [(job_id, meas_doc['identifier'], k, blob_id)
+             for k, blob_id in meas_doc['blobs'].items()])
+
+    def _insert_metric(self, metric_doc):
+        doc = json.dumps(metric_doc, sort_keys=True)
+        digest = hashlib.sha1(doc.encode('utf-8')).hexdigest()
+        row = self._conn.execute(
+            'SELECT metric_id FROM metrics WHERE digest = ?',
+            (digest,)).fetchone()
+        if row is not None:
+            return row[0]
+
+        cursor = self._conn.execute(
+            'INSERT INTO metrics (name, digest, operator_str, doc) '
+            'VALUES (?, ?, ?, ?)',
+            (metric_doc['name'], digest, metric_doc['operator_str'], doc))
+        metric_id = cursor.lastrowid
+        self._conn.executemany(
+            'INSERT INTO specs (metric_id, name, value, unit, filter_names) '
+            'VALUES (?, ?, ?, ?, ?)',
+            [(metric_id, s['name'], s['value'], s['unit'],
+              json.dumps(s['filter_names']))
+             for s in metric_doc['specifications']])
+        return metric_id
+
+    @staticmethod
+    def _format_time(t):
+        """Normalize a run time into a sortable ISO 8601 `str`."""
+        if t is None:
+            return None
+        if isinstance(t, datetime.datetime):
+            return t.strftime('%Y-%m-%dT%H:%M:%S.%f')
+        if isinstance(t, datetime.date):
+            return t.strftime('%Y-%m-%dT00:00:00.000000')
+        # Reformat strings so that they sort consistently with other times
+        for fmt in ('%Y-%m-%dT%H:%M:%S.%f', '%Y-%m-%dT%H:%M:%S',
+                    '%Y-%m-%d %H:%M:%S', '%Y-%m-%d'):
+            try:
+                parsed = datetime.datetime.strptime(t, fmt)
+            except ValueError:
+                continue
+            return parsed.strftime('%Y-%m-%dT%H:%M:%S.%f')
+        raise ValueError('Cannot parse run time {0!r}'.format(t))
+
+    def _select(self, columns, metric_name=None, spec_name=None,
+                filter_name=None, since=None, until=None, job_id=None):
+        """Run a SELECT over measurements joined to their jobs, constrained
+        by the indexed columns.
+        """
+        clauses = []
+        args = []
+        if metric_name is not None:
+            clauses.append('m.metric_name = ?')
+            args.append(metric_name)
+        if spec_name is not None:
+            clauses.append('m.spec_name = ?')
+            args.append(spec_name)
+        if filter_name is not None:
+            clauses.append('m.filter_name = ?')
+            args.append(filter_name)
+        if since is not None:
+            clauses.append('j.run_time >= ?')
+            args.append(self._format_time(since))
+        if until is not None:
+            clauses.append('j.run_time < ?')
+            args.append(self._format_time(until))
+        if job_id is not None:
+            clauses.append('m.job_id = ?')
+            args.append(job_id)
+
+        sql = ('SELECT {0} FROM measurements AS m '
+               'JOIN jobs AS j ON m.job_id = j.job_id').format(columns)
+        if clauses:
+            sql += ' WHERE ' + ' AND '.join(clauses)
+        sql += ' ORDER BY j.run_time, m.rowid'
+        return self._conn.execute(sql, args)
+
+    @property
+    def job_ids(self):
+        """Identifiers of all stored jobs, ordered by run time (`list`)."""
+        rows = self._conn.execute(
+            'SELECT job_id FROM jobs ORDER BY run_time, rowid')
+        return [row[0] for row in rows]
+
+    def get_run_time(self, job_id):
+        """Get the run time of a stored job.
+
+        Parameters
+        ----------
+        job_id : `str`
+            Identifier of the job.
+
+        Returns
+        -------
+        run_time : `datetime.datetime`
+            Run time of the job.
+        """
+        row = self._conn.execute('SELECT run_time FROM jobs WHERE job_id = ?',
+                                 (job_id,)).fetchone()
+        if row is None:
+            raise ValidateError('Job {0!r} is not stored'.format(job_id))
+        return datetime.datetime.strptime(row[0], '%Y-%m-%dT%H:%M:%S.%f')
+
+    def iter_values(self, metric_name=None, spec_name=None,
+                    filter_name=None, since=None, until=None):
+        """Iterate over measurement values without rebuilding measurement
+        objects.
+
+        Rows are read from the database as they are consumed, so that
+        archives with many measurements are not held in memory at once.
+        Arguments are those of `query_values`.
+
+        Yields
+        ------
+        row : `tuple`
+            ``(job_id, run_time, metric_name, spec_name, filter_name, value,
+            unit)`` row of a measurement, ordered by run time (see
+            `query_values`).
+        """
+        cursor = self._select(
+            'm.job_id, j.run_time, m.metric_name, m.spec_name, '
+            'm.filter_name, m.value, m.value_json, m.unit',
+            metric_name=metric_name, spec_name=spec_name,
+            filter_name=filter_name, since=since, until=until)
+        for (job_id, run_time, name, spec, filter_, value, value_json,
+             unit) in cursor:
+            if value is None:
+                value = json.loads(value_json)
+            yield job_id, run_time, name, spec, filter_, value, unit
+
+    def query_values(self, metric_name=None, spec_name=None,
+                     filter_name=None, since=None, until=None):
+        """Query measurement values without rebuilding measurement objects.
+
+        Parameters
+        ----------
+        metric_name : `str`, optional
+            Name of the `Metric`.
+        spec_name : `str`, optional
+            Name of the specification level.
+        filter_name : `str`, optional
+            Name of the optical filter.
+        since : `datetime.datetime` or `str`, optional
+            Only include jobs run at or after this time.
+        until : `datetime.datetime` or `str`, optional
+            Only include jobs run before this time.
+
+        Returns
+        -------
+        rows : `list` of `tuple`
+            One ``(job_id, run_time, metric_name, spec_name, filter_name,
+            value, unit)`` tuple per measurement, ordered by run time.
+            ``value`` is the JSON-deserialized measurement value.
+        """
+        return list(self.iter_values(metric_name=metric_name,
+                                     spec_name=spec_name,
+                                     filter_name=filter_name, since=since,
+                                     until=until))
+
+    def query_measurements(self, metric_name=None, spec_name=None,
+                           filter_name=None, since=None, until=None,
+                           job_id=None, load_blobs=True):
+        """Query stored measurements.
+
+        Parameters
+        ----------
+        metric_name : `str`, optional
+            Name of the `Metric`.
+        spec_name : `str`, optional
+            Name of the specification level.
+        filter_name : `str`, optional
+            Name of the optical filter.
+        since : `datetime.datetime` or `str`, optional
+            Only include jobs run at or after this time.
+        until : `datetime.datetime` or `str`, optional
+            Only include jobs run before this time.
+        job_id : `str`, optional
+            Only include measurements of this job.
+        load_blobs : `bool`, optional
+            Rebuild the blobs linked to each measurement. Set to `False` to
+            skip reading blob data.
+
+        Returns
+        -------
+        measurements : `list` of `DeserializedMeasurement`
+            Matching measurements, ordered by run time.
+        """
+        cursor = self._select(
+            'm.job_id, m.measurement_id', metric_name=metric_name,
+            spec_name=spec_name, filter_name=filter_name, since=since,
+            until=until, job_id=job_id)
+        return [DeserializedMeasurement.from_json(doc, blobs_json=blobs_doc)
+                for doc, blobs_doc in
+                self._measurement_docs(cursor.fetchall(),
+                                       load_blobs=load_blobs)]
+
+    def _measurement_docs(self, keys, load_blobs=True):
+        """Rebuild measurement JSON documents (and the documents of their
+        linked blobs) from the normalized tables, given their
+        ``(job_id, measurement_id)`` keys.
+        """
+        metric_docs = {}
+        for job_id, measurement_id in keys:
+            (metric_id, spec_name, filter_name, value_json, unit,
+             extras) = self._conn.execute(
+                'SELECT metric_id, spec_name, filter_name, value_json, unit, '
+                'extras FROM measurements '
+                'WHERE job_id = ? AND measurement_id = ?',
+                (job_id, measurement_id)).fetchone()
+            if metric_id not in metric_docs:
+                metric_docs[metric_id] = json.loads(self._conn.execute(
+                    'SELECT doc FROM metrics WHERE metric_id = ?',
+                    (metric_id,)).fetchone()[0])
+
+            parameters = {
+                name: json.loads(doc) for name, doc in self._conn.execute(
+                    'SELECT name, doc FROM parameters '
+                    'WHERE job_id = ? AND measurement_id = ?',
+                    (job_id, measurement_id))}
+            blob_rows = self._conn.execute(
+                'SELECT mb.key, b.blob_id, b.doc FROM measurement_blobs AS mb '
+                'JOIN blobs AS b ON mb.blob_id = b.blob_id '
+                'WHERE mb.job_id = ? AND mb.measurement_id = ?',
+                (job_id, measurement_id)).fetchall()
+
+            doc = {'metric': metric_docs[metric_id],
+                   'identifier': measurement_id,
+                   'value': json.loads(value_json),
+                   'unit': unit,
+                   'parameters': parameters,
+                   'extras': json.loads(extras),
+                   'blobs': {key: blob_id for key, blob_id, _ in blob_rows},
+                   'spec_name': spec_name,
+                   'filter_name': filter_name}
+            if load_blobs:
+                blobs_doc = [json.loads(blob_doc)
+                             for _, _, blob_doc in blob_rows]
+            else:
+                blobs_doc = None
+            yield doc, blobs_doc
+
+    def get_job_json(self, job_id):
+        """Rebuild the JSON document of a stored job.
+
+        Parameters
+        ----------
+        job_id : `str`
+            Identifier of the job.
+
+        Returns
+        -------
+        json_data : `dict`
+            `Job` JSON document.
+        """
+        if self._conn.execute('SELECT 1 FROM jobs WHERE job_id = ?',
+                              (job_id,)).fetchone() is None:
+            raise ValidateError('Job {0!r} is not stored'.format(job_id))
+        keys = self._conn.execute(
+            'SELECT job_id, measurement_id FROM measurements WHERE job_id = ? '
+            'ORDER BY rowid', (job_id,)).fetchall()
+        measurements = [doc for doc, _ in
+                        self._measurement_docs(keys, load_blobs=False)]
+        blobs = [json.loads(row[0]) for row in self._conn.execute(
+            'SELECT b.doc FROM job_blobs AS jb '
+            'JOIN blobs AS b ON jb.blob_id = b.blob_id '
+            'WHERE jb.job_id = ? ORDER BY jb.rowid', (job_id,))]
+        return {'measurements': measurements, 'blobs': blobs}
+
+    def get_job(self, job_id):
+        """Rebuild a stored job.
+
+        Parameters
+        ----------
+        job_id : `str`
+            Identifier of the job.
+
+        Returns
+        -------
+        job : `Job`
+            The job, with its measurements and blobs.
+        """
+        return Job.from_json(self.get_job_json(job_id))
@@ -1,16 +1,16 @@
 # See COPYRIGHT file at the top of the source tree.
 from __future__ import print_function, division
-from builtins import object
 
 import abc
-import json
-from future.utils import with_metaclass
+
+from .compression import write_json as _write_json
+from .profiling import profiled, result_size
 
 
 __all__ = ['JsonSerializationMixin']
 
 
-class JsonSerializationMixin(with_metaclass(abc.ABCMeta, object)):
+class JsonSerializationMixin(metaclass=abc.ABCMeta):
     """Mixin that provides JSON serialization support to subclasses.
 
     Subclasses must implement the `json` method. The method returns a `dict`
@@ -27,6 +27,7 @@ class JsonSerializationMixin(with_metaclass(abc.ABCMeta, object)):
         pass
 
     @staticmethod
+    @profiled('jsonify_dict', size=result_size)
     def jsonify_dict(d):
         """Recursively build JSON-renderable objects on all values in a dict.
 
@@ -79,13 +80,22 @@ class JsonSerializationMixin(with_metaclass(abc.ABCMeta, object)):
         else:
             return v
 
-    def write_json(self, filepath):
+    def write_json(self, filepath, compression='infer', compact=False):
         """Write JSON to a file.
 
         Parameters
         ----------
         filepath : `str`
             Destination file name for JSON output.
+        compression : `str`, optional
+            Compression codec: ``'gzip'``, ``'bz2'``, ``'lzma'`` or `None`.
+            By default the codec is inferred from the extension of
+            ``filepath`` (``.gz``, ``.bz2``, ``.xz``), and other extensions
+            are written uncompressed.
+        compact : `bool`, optional
+            If `True`, write JSON without indentation or whitespace, and
+            without sorting keys. This is smaller and faster to write than the
+            default indented output.
         """
-        with open(filepath, 'w') as outfile:
-            json.dump(self.json, outfile, sort_keys=True, indent=2)
+        _write_json(self.json, filepath, compression=compression,
+                    compact=compact)
@@ -0,0 +1,73 @@
+# See COPYRIGHT file at the top of the source tree.
+"""Deferred imports of heavy dependencies.
+
+Importing astropy, numpy and yaml dominates the import time of
+lsst.validate.base, and many processes never use them. Modules bind these
+dependencies with `lazy_import` instead of ``import``, so that they are only
+imported when one of their attributes is first accessed::
+
+    u = lazy_import('astropy.units')  # instead of import astropy.units as u
+"""
+from __future__ import print_function, division
+
+import importlib
+import sys
+import types
+
+
+__all__ = ['lazy_import']
+
+
+class LazyModule(types.ModuleType):
+    """Module proxy that imports the module on first attribute access.
+
+    Once imported, the module's attributes are copied into the proxy, so that
+    later accesses are plain attribute lookups.
+
+    Parameters
+    ----------
+    name : `str`
+        Full name of the module.
+    """
+
+    def __init__(self, name):
+        super(LazyModule, self).__init__(name)
+        self.__dict__['_lazy_loaded'] = False
+
+    def _load(self):
+        module = importlib.import_module(self.__name__)
+        self.__dict__.update(module.__dict__)
+        self.__dict__['_lazy_loaded'] = True
+        return module
+
+    def __getattr__(self, name):
+        # Only called for attributes that aren't in the proxy's __dict__,
+        # such as submodules imported after the proxy was loaded.
+        return getattr(self._load(), name)
+
+    def __dir__(self):
+        return dir(self._load())
+
+    def __repr__(self):
+        if self._lazy_loaded:
+            return repr(sys.modules[self.__name__])
+        return '<lazy module {0!r}>'.format(self.__name__)
+
+
+def lazy_import(name):
+    """Import a module when one of its attributes is first accessed.
+
+    Parameters
+    ----------
+    name : `str`
+        Full name of the module, such as ``'astropy.units'``.
+
+    Returns
+    -------
+    module : `types.ModuleType`
+        The module if it is already imported, otherwise a proxy that imports
+        it on first attribute access.
+    """
+    if name in sys.modules:
+        return sys.modules[name]
+    return LazyModule(name)
@@ -1,27 +1,29 @@
 # See COPYRIGHT file at the top of the source tree.
 from __future__ import print_function, division
-from future.utils import with_metaclass
 
 import abc
+import contextlib
 import uuid
 
-import astropy.units as u
 from .datummixin import DatumAttributeMixin
 from .jsonmixin import JsonSerializationMixin
 from .blob import BlobBase, DeserializedBlob
 from .datum import Datum, QuantityAttributeMixin
+from .instrument import MeasurementProfile, ResourceMonitor
+from .lazy import lazy_import
 from .metric import Metric
+from .profiling import profiled, class_type, instance_type, json_data_size, \
+    result_size
 
 
 __all__ = ['MeasurementBase', 'DeserializedMeasurement']
 
 
-class MeasurementBase(with_metaclass(abc.ABCMeta,
-                                     type('NewBase',
-                                          (QuantityAttributeMixin,
-                                           JsonSerializationMixin,
-                                           DatumAttributeMixin),
-                                          {}))):
+u = lazy_import('astropy.units')
+
+
+class MeasurementBase(QuantityAttributeMixin, JsonSerializationMixin,
+                      DatumAttributeMixin, metaclass=abc.ABCMeta):
     """Base class for Measurement classes.
 
     This class isn't instantiated directly. Instead, developers should
@@ -71,6 +73,12 @@ class MeasurementBase(with_metaclass(abc.ABCMeta,
     `None` if a measurement is not filter-dependent.
     """
 
+    profile = None
+    """`MeasurementProfile` of the resources used to compute this
+    measurement, or `None` if the computation was not instrumented (see
+    `instrument`).
+    """
+
     def __init__(self):
         self._quantity = None
         self.parameters = {}
@@ -81,16 +89,20 @@ class MeasurementBase(with_metaclass(abc.ABCMeta,
         self.filter_name = None
 
     def __getattr__(self, key):
-        if key in self.parameters:
+        # Only instance attributes are consulted, and not for private or
+        # special names, since they don't exist yet while unpickling.
+        attrs = self.__dict__
+        if key.startswith('_'):
+            pass
+        elif key in (attrs.get('parameters') or {}):
             # Requesting a serializable parameter
-            return self.parameters[key].quantity
-        elif key in self.extras:
-            return self.extras[key].quantity
-        elif key in self._linked_blobs:
-            return self._linked_blobs[key]
-        else:
-            raise AttributeError("%r object has no attribute %r" %
-                                 (self.__class__, key))
+            return attrs['parameters'][key].quantity
+        elif key in (attrs.get('extras') or {}):
+            return attrs['extras'][key].quantity
+        elif key in attrs.get('_linked_blobs', {}):
+            return attrs['_linked_blobs'][key]
+        raise AttributeError("%r object has no attribute %r" %
+                             (self.__class__, key))
 
     def __setattr__(self, key, value):
         # avoiding __setattr__ loops by not handling names in _bootstrap
@@ -191,6 +203,45 @@ class MeasurementBase(with_metaclass(abc.ABCMeta,
                                        description=description,
                                        datum=datum)
 
+    @contextlib.contextmanager
+    def instrument(self, trace_memory=True, thread_time=False):
+        """Context manager that records the wall time, CPU time and peak
+        memory used to compute this measurement into its `profile`.
+
+        Instrumentation is opt-in: wrap the computation of the measurement,
+        typically in the measurement class's ``__init__``::
+
+            class PA1Measurement(MeasurementBase):
+
+                def __init__(self, matched_data_blob):
+                    MeasurementBase.__init__(self)
+                    self.metric = Metric.from_yaml('PA1', yaml_path=yaml_path)
+                    with self.instrument():
+                        self.quantity = compute_pa1(matched_data_blob)
+
+        Profiles are serialized with the `Job` that the measurement is
+        registered in.
+
+        Parameters
+        ----------
+        trace_memory : `bool`, optional
+            Record peak memory with `tracemalloc`, which slows down memory
+            allocations in the block.
+        thread_time : `bool`, optional
+            Record the CPU time of the current thread rather than of the
+            whole process, when measurements are computed concurrently in
+            threads.
+
+        Yields
+        ------
+        monitor : `ResourceMonitor`
+            Monitor of the block.
+        """
+        with ResourceMonitor(trace_memory=trace_memory,
+                             thread_time=thread_time) as monitor:
+            yield monitor
+        self.profile = MeasurementProfile.from_monitor(self, monitor)
+
     @property
     def metric(self):
         """`Metric` that this measurement is associated to.
@@ -217,6 +268,8 @@ class MeasurementBase(with_metaclass(abc.ABCMeta,
                      description=self.metric.description)
 
     @property
+    @profiled('json', type_name=instance_type,
+              metric_name=lambda args: args[0].metric.name, size=result_size)
     def json(self):
         """A `dict` that can be serialized as semantic SQUASH JSON."""
         if isinstance(self.quantity, u.Quantity):
@@ -237,7 +290,10 @@ class MeasurementBase(with_metaclass(abc.ABCMeta,
         return json_doc
 
     @classmethod
-    def from_json(cls, json_data, blobs_json=None):
+    @profiled('from_json', type_name=class_type,
+              metric_name=lambda args: args[1]['metric']['name'],
+              size=json_data_size)
+    def from_json(cls, json_data, blobs_json=None, blob_store=None):
         """Construct a measurement from a JSON dataset.
 
         Parameters
@@ -247,6 +303,9 @@ class MeasurementBase(with_metaclass(abc.ABCMeta,
         blobs_json : `list`
             JSON serialization of blobs. This is the ``blobs`` object
             produced by `Job.json`.
+        blob_store : `BlobStore`, optional
+            Blob store holding the data of blobs that ``blobs_json`` only
+            references.
 
         Returns
         -------
@@ -265,7 +324,8 @@ class MeasurementBase(with_metaclass(abc.ABCMeta,
             for k, id_ in json_data['blobs'].items():
                 for blob_doc in blobs_json:
                     if blob_doc['identifier'] == id_:
-                        blob = DeserializedBlob.from_json(blob_doc)
+                        blob = DeserializedBlob.from_json(
+                            blob_doc, blob_store=blob_store)
                         linked_blobs[k] = blob
 
         m = cls(quantity=q,
@@ -0,0 +1,181 @@
+# See COPYRIGHT file at the top of the source tree.
+from __future__ import print_function, division
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+
+from .blob import DeserializedBlob
+from .datum import Datum
+
+
+__all__ = ['MeasurementCache']
+
+
+class MeasurementCache(object):
+    """On-disk cache of measurement results, keyed on the measurement's
+    metric, parameters and inputs.
+
+    A measurement class consults the cache once its parameters are
+    registered, and only computes its `~MeasurementBase.quantity` on a
+    cache miss::
+
+        class PA1Measurement(MeasurementBase):
+
+            def __init__(self, matched_data_blob, cache=None, fingerprint=None):
+                MeasurementBase.__init__(self)
+                self.metric = Metric.from_yaml('PA1', yaml_path=yaml_path)
+                self.register_parameter('num_random_shuffles', 50)
+                self.register_extra('rms', description='RMS')
+
+                if cache is not None and cache.restore(self, fingerprint):
+                    return
+                # ... compute self.quantity, extras and blobs
+                if cache is not None:
+                    cache.save(self, fingerprint)
+
+    A cache hit restores the `~MeasurementBase.quantity`,
+    `~MeasurementBase.extras` and linked blobs of the measurement.
+
+    The cache is bounded in size: when it grows beyond ``max_bytes``, the
+    least recently used entries are evicted.
+
+    Parameters
+    ----------
+    cache_dir : `str`
+        Directory of the cache. It is created if it does not exist.
+    max_bytes : `int`, optional
+        Maximum total size of the cache entries, in bytes.
+    """
+
+    def __init__(self, cache_dir, max_bytes=1024 ** 3):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        if not os.path.isdir(cache_dir):
+            os.makedirs(cache_dir)
+
+    @staticmethod
+    def key(measurement, input_fingerprint=None):
+        """Compute the cache key of a measurement.
+
+        Parameters
+        ----------
+        measurement : `MeasurementBase`-type object
+            Measurement, with its `~MeasurementBase.metric`,
+            `~MeasurementBase.spec_name`, `~MeasurementBase.filter_name` and
+            `~MeasurementBase.parameters` set.
+        input_fingerprint : `str` or `bytes`, optional
+            Caller-supplied fingerprint of the measurement's input datasets,
+            such as a hash of the input files or a data repository version.
+
+        Returns
+        -------
+        key : `str`
+            Hex digest that identifies the measurement's result.
+        """
+        params = {k: {'value': d.json['value'], 'unit': d.unit_str}
+                  for k, d in measurement.parameters.items()}
+        doc = json.dumps([measurement.metric.name,
+                          measurement.spec_name,
+                          measurement.filter_name,
+                          params],
+                         sort_keys=True)
+        hasher = hashlib.sha256(doc.encode('utf-8'))
+        if input_fingerprint is not None:
+            if not isinstance(input_fingerprint, bytes):
+                input_fingerprint = input_fingerprint.encode('utf-8')
+            hasher.update(input_fingerprint)
+        return hasher.hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key + '.json')
+
+    def restore(self, measurement, input_fingerprint=None):
+        """Restore a measurement's results from the cache.
+
+        Parameters
+        ----------
+        measurement : `MeasurementBase`-type object
+            Measurement to restore; see `key`.
+        input_fingerprint : `str` or `bytes`, optional
+            Fingerprint of the measurement's input datasets.
+
+        Returns
+        -------
+        hit : `bool`
+            `True` if the measurement was restored from the cache, `False` if
+            it has to be computed.
+        """
+        path = self._path(self.key(measurement, input_fingerprint))
+        try:
+            with open(path) as f:
+                entry = json.load(f)
+        except (IOError, ValueError):
+            return False
+        # Mark the entry as recently used. The entry was read, so a cache
+        # that cannot be touched (read-only, or the entry was evicted
+        # meanwhile) still serves it
+        try:
+            os.utime(path, None)
+        except OSError:
+            pass
+
+        measurement.quantity = Datum._rebuild_quantity(entry['value'],
+                                                       entry['unit'])
+        for k, v in entry['extras'].items():
+            measurement.extras[k] = Datum.from_json(v)
+        for k, v in entry['blobs'].items():
+            setattr(measurement, k, DeserializedBlob.from_json(v))
+        return True
+
+    def save(self, measurement, input_fingerprint=None):
+        """Save a measurement's results to the cache.
+
+        Parameters
+        ----------
+        measurement : `MeasurementBase`-type object
+            Measurement with computed results; see `key`.
+        input_fingerprint : `str` or `bytes`, optional
+            Fingerprint of the measurement's input datasets.
+        """
+        doc = measurement.json
+        entry = {'value': doc['value'],
+                 'unit': doc['unit'],
+                 'extras': doc['extras'],
+                 'blobs': {k: b.json for k, b in measurement.blobs.items()}}
+        path = self._path(self.key(measurement, input_fingerprint))
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+        with os.fdopen(fd, 'w') as f:
+            json.dump(entry, f)
+        os.replace(tmp_path, path)
+        self.evict()
+
+    def evict(self):
+        """Remove least recently used entries until the cache fits in
+        ``max_bytes``.
+        """
+        entries = []
+        total_bytes = 0
+        for entry in os.scandir(self.cache_dir):
+            if not entry.name.endswith('.json'):
+                continue
+            stat = entry.stat()
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+            total_bytes += stat.st_size
+        entries.sort()
+        for _, size, path in entries:
+            if total_bytes <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                # Removed concurrently by another process
+                pass
+            total_bytes -= size
+
+    def clear(self):
+        """Remove all cache entries."""
+        shutil.rmtree(self.cache_dir)
+        os.makedirs(self.cache_dir)
@@ -1,19 +1,23 @@
 # See COPYRIGHT file at the top of the source tree.
 from __future__ import print_function, division
-from past.builtins import basestring
 
 import operator
 from collections import OrderedDict
-import yaml
 
 from .jsonmixin import JsonSerializationMixin
+from .lazy import lazy_import
 from .datum import Datum
 from .spec import Specification
+from .profiling import profiled, class_type, instance_type, json_data_size, \
+    result_size
 
 
 __all__ = ['Metric', 'load_metrics']
 
 
+yaml = lazy_import('yaml')
+
+
 class Metric(JsonSerializationMixin):
     """Container for the definition of a metric and its specification levels.
 
@@ -93,7 +97,7 @@ class Metric(JsonSerializationMixin):
         else:
             assert isinstance(parameters, dict)
             for key, value in parameters.items():
-                assert isinstance(key, basestring)
+                assert isinstance(key, str)
                 assert isinstance(value, Datum)
             self.parameters = parameters
 
@@ -158,7 +162,7 @@ class Metric(JsonSerializationMixin):
             if 'dependencies' in spec_doc and resolve_dependencies:
                 deps = {}
                 for dep_item in spec_doc['dependencies']:
-                    if isinstance(dep_item, basestring):
+                    if isinstance(dep_item, str):
                         # This is a metric
                         name = dep_item
                         d = Metric.from_yaml(name, yaml_doc=yaml_doc,
@@ -187,6 +191,8 @@ class Metric(JsonSerializationMixin):
         return m
 
     @classmethod
+    @profiled('from_json', type_name=class_type,
+              metric_name=lambda args: args[1]['name'], size=json_data_size)
     def from_json(cls, json_data, resolve_dependencies=True):
         """Construct a Metric from a JSON dataset.
 
@@ -209,7 +215,7 @@ class Metric(JsonSerializationMixin):
             if 'dependencies' in spec_doc and resolve_dependencies:
                 deps = {}
                 for dep_item in spec_doc['dependencies']:
-                    if isinstance(dep_item, basestring):
+                    if isinstance(dep_item, str):
                             # This is a metric
                             name = dep_item
                             d = Metric.from_json(spec_doc['dependencies'][name],
@@ -250,11 +256,13 @@ class Metric(JsonSerializationMixin):
         return m
 
     def __getattr__(self, key):
-        if key in self.parameters:
-            return self.parameters[key]
-        else:
-            raise AttributeError("%r object has no attribute %r" %
-                                 (self.__class__, key))
+        # Only instance attributes are consulted, since they don't exist yet
+        # while unpickling.
+        parameters = self.__dict__.get('parameters')
+        if not key.startswith('_') and parameters and key in parameters:
+            return parameters[key]
+        raise AttributeError("%r object has no attribute %r" %
+                             (self.__class__, key))
 
     @property
     def reference(self):
@@ -459,6 +467,8 @@ class Metric(JsonSerializationMixin):
         return self.operator(quantity, spec.quantity)
 
     @property
+    @profiled('json', type_name=instance_type,
+              metric_name=lambda args: args[0].name, size=result_size)
     def json(self):
         """`dict` that can be serialized as semantic JSON, compatible with
         the SQUASH metric service.
@@ -508,12 +518,18 @@ def load_metrics(yaml_path):
     return OrderedDict(metrics)
 
 
-def _load_ordered_yaml(stream, Loader=yaml.Loader,
+def _load_ordered_yaml(stream, Loader=None,
                        object_pairs_hook=OrderedDict):
     """Load a YAML document into an OrderedDict
 
     Solution from http://stackoverflow.com/a/21912744
+
+    ``Loader`` defaults to ``yaml.Loader``, which is resolved at call time so
+    that yaml is only imported when needed.
     """
+    if Loader is None:
+        Loader = yaml.Loader
+
     class OrderedLoader(Loader):
         pass
 
@@ -0,0 +1,231 @@
+# See COPYRIGHT file at the top of the source tree.
+"""Pickling of jobs, measurements, blobs and datums with out-of-band array
+buffers.
+
+Datums pickle their arrays separately from their units, so that with
+pickle protocol 5 the array buffers travel out-of-band rather than being
+copied into the pickle stream. `dumps` and `loads` expose those buffers, and
+`SharedObject` places them in shared memory, so that other processes can
+load the object without copying its arrays.
+
+Pickle protocol 5 and `multiprocessing.shared_memory` are only available
+from Python 3.8, so this module requires Python 3.8 or later, while the rest
+of the package supports Python 3.7. Jobs, measurements, blobs and datums
+can still be pickled with `pickle` on Python 3.7, with in-band buffers.
+"""
+from __future__ import print_function, division
+
+import pickle
+
+from .errors import ValidateError
+from .lazy import lazy_import
+
+
+__all__ = ['dumps', 'loads', 'SharedObject']
+
+
+shared_memory = lazy_import('multiprocessing.shared_memory')
+
+
+PROTOCOL = 5
+"""Pickle protocol that supports out-of-band buffers."""
+
+_ALIGNMENT = 64
+"""Alignment, in bytes, of buffers in shared memory."""
+
+
+def _check_protocol():
+    """Raise unless pickle supports out-of-band buffers."""
+    if pickle.HIGHEST_PROTOCOL < PROTOCOL:
+        raise ValidateError('Pickling with out-of-band buffers requires '
+                            'Python 3.8 or later')
+
+
+def dumps(obj):
+    """Pickle an object, keeping its array buffers out-of-band.
+
+    Parameters
+    ----------
+    obj : obj
+        Object to pickle, such as a `Job`, a measurement, a blob or a `Datum`.
+
+    Returns
+    -------
+    data : `bytes`
+        Pickle stream, without the out-of-band buffers.
+    buffers : `list` of `pickle.PickleBuffer`
+        Out-of-band buffers. These are views of the object's arrays, not
+        copies.
+
+    Raises
+    ------
+    lsst.validate.base.ValidateError
+        Raised before Python 3.8, which lacks pickle protocol 5.
+    """
+    _check_protocol()
+    buffers = []
+    data = pickle.dumps(obj, protocol=PROTOCOL, buffer_callback=buffers.append)
+    return data, buffers
+
+
+def loads(data, buffers=()):
+    """Unpickle an object pickled by `dumps`.
+
+    Parameters
+    ----------
+    data : `bytes`
+        Pickle stream.
+    buffers : iterable of buffer-like objects, optional
+        Out-of-band buffers, in the order returned by `dumps`. Arrays of the
+        unpickled object are views of these buffers.
+
+    Returns
+    -------
+    obj : obj
+        Unpickled object.
+
+    Raises
+    ------
+    lsst.validate.base.ValidateError
+        Raised before Python 3.8, which lacks pickle protocol 5.
+    """
+    _check_protocol()
+    return pickle.loads(data, buffers=buffers)
+
+
+class SharedObject(object):
+    """An object pickled with its array buffers in shared memory.
+
+    A `SharedObject` is a small handle: it can itself be pickled and sent to
+    other processes (for example, as an argument of a process pool task),
+    which `load` the object from shared memory. The process that creates the
+    shared object must `unlink` it once other processes are done with it.
+
+    Use `create` to make a shared object.
+
+    Parameters
+    ----------
+    data : `bytes`
+        Pickle stream of the object.
+    name : `str` or `None`
+        Name of the shared memory block, or `None` if the object has no
+        out-of-band buffers.
+    spans : `list` of `tuple`
+        ``(offset, nbytes)`` of each buffer in the shared memory block.
+
+    Examples
+    --------
+    >>> shared = SharedObject.create(job)  # doctest: +SKIP
+    >>> future = pool.submit(process_job, shared)  # doctest: +SKIP
+    >>> future.result()  # doctest: +SKIP
+    >>> shared.unlink()  # doctest: +SKIP
+
+    where ``process_job`` calls ``shared.load()``.
+    """
+
+    def __init__(self, data, name, spans):
+        self.data = data
+        self.name = name
+        self.spans = spans
+        self._shm = None
+
+    def __getstate__(self):
+        # Only the handle is pickled, not the attached shared memory
+        return {'data': self.data, 'name': self.name, 'spans': self.spans}
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._shm = None
+
+    @classmethod
+    def create(cls, obj):
+        """Pickle an object into shared memory.
+
+        Parameters
+        ----------
+        obj : obj
+            Object to share, such as a `Job` or a measurement.
+
+        Returns
+        -------
+        shared : `SharedObject`
+            Handle of the shared object. The caller owns the shared memory,
+            and must `unlink` it when it is no longer needed.
+        """
+        data, buffers = dumps(obj)
+        raws = [b.raw() for b in buffers]
+        spans = []
+        size = 0
+        for raw in raws:
+            spans.append((size, raw.nbytes))
+            size += -(-raw.nbytes // _ALIGNMENT) * _ALIGNMENT
+        if not raws:
+            return cls(data, None, spans)
+
+        shm = shared_memory.SharedMemory(create=True, size=max(size, 1))
+        for raw, (offset, nbytes) in zip(raws, spans):
+            shm.buf[offset:offset + nbytes] = raw
+        shared = cls(data, shm.name, spans)
+        shared._shm = shm
+        return shared
+
+    def _attach(self):
+        if self._shm is None:
+            self._shm = shared_memory.SharedMemory(name=self.name)
+        return self._shm
+
+    def load(self, copy=True):
+        """Load the shared object.
+
+        Parameters
+        ----------
+        copy : `bool`, optional
+            If `True`, arrays are copied out of shared memory, and the shared
+            memory is detached. If `False`, arrays are views of the shared
+            memory, which stays attached until `close` is called; the loaded
+            object must not be used after that.
+
+        Returns
+        -------
+        obj : obj
+            The object.
+        """
+        if self.name is None:
+            return loads(self.data)
+        shm = self._attach()
+        if copy:
+            buffers = [bytearray(shm.buf[offset:offset + nbytes])
+                       for offset, nbytes in self.spans]
+            obj = loads(self.data, buffers)
+            self.close()
+        else:
+            buf = shm.buf
+            buffers = [buf[offset:offset + nbytes]
+                       for offset, nbytes in self.spans]
+            obj = loads(self.data, buffers)
+        return obj
+
+    def close(self):
+        """Detach the shared memory from this process.
+
+        Raises
+        ------
+        BufferError
+            Raised if objects loaded with ``copy=False`` still reference the
+            shared memory.
+        """
+        if self._shm is not None:
+            self._shm.close()
+            self._shm = None
+
+    def unlink(self):
+        """Detach and free the shared memory.
+
+        Only the process that created the shared object should call this,
+        once no other process needs to load it.
+        """
+        if self.name is None:
+            return
+        shm = self._attach()
+        self.close()
+        shm.unlink()
@@ -0,0 +1,117 @@
+# See COPYRIGHT file at the top of the source tree.
+from __future__ import print_function, division
+
+from .errors import ValidateError
+from .lazy import lazy_import
+
+
+__all__ = ['decimate']
+
+
+np = lazy_import('numpy')
+
+
+DEFAULT_PREVIEW_SIZE = 2000
+"""Maximum number of rows of array datums in previews, unless specified
+otherwise.
+"""
+
+PREVIEW_METHODS = ('uniform', 'random', 'envelope')
+"""Decimation methods of `decimate`."""
+
+
+def _uniform_indices(n, size):
+    return np.unique(np.linspace(0, n - 1, size).round().astype(np.intp))
+
+
+def _random_indices(n, size, seed):
+    rng = np.random.default_rng(seed)
+    return np.sort(rng.choice(n, size=size, replace=False))
+
+
+def _envelope_indices(values, size):
+    n = len(values)
+    bin_length = -(-n // (size // 2))
+    n_bins = -(-n // bin_length)
+    padding = n_bins * bin_length - n
+    # Padding and NaNs are never a bin's minimum or maximum, unless the bin
+    # has nothing else: then its first element is selected
+    lows = np.concatenate([np.where(np.isnan(values), np.inf, values),
+                           np.full(padding, np.inf)])
+    highs = np.concatenate([np.where(np.isnan(values), -np.inf, values),
+                            np.full(padding, -np.inf)])
+    starts = np.arange(n_bins) * bin_length
+    argmins = lows.reshape(n_bins, bin_length).argmin(axis=1) + starts
+    argmaxs = highs.reshape(n_bins, bin_length).argmax(axis=1) + starts
+    return np.unique(np.concatenate([argmins, argmaxs]))
+
+
+def decimate(quantity, size=DEFAULT_PREVIEW_SIZE, method='uniform', seed=0):
+    """Select at most ``size`` rows of an array quantity.
+
+    Parameters
+    ----------
+    quantity : `astropy.units.Quantity`
+        Array quantity, decimated along its first axis. Masked quantities keep
+        the mask of the selected rows.
+    size : `int`, optional
+        Maximum number of rows to select.
+    method : `str`, optional
+        Decimation method:
+
+        - ``'uniform'``: evenly spaced rows, including the first and last
+          rows.
+        - ``'random'``: rows drawn at random without replacement (in their
+          original order), from a generator seeded with ``seed``.
+        - ``'envelope'``: the rows split into ``size // 2`` bins of
+          consecutive rows, and the minimum and maximum of each bin are
+          selected, so that plots keep the range of noisy series. Only
+          one-dimensional arrays can be decimated to at least 2 rows this
+          way; otherwise the ``'uniform'`` method is used.
+
+        Arrays of the same length are decimated to the same rows by the
+        ``'uniform'`` and ``'random'`` methods (with the same ``seed``), so
+        the decimated columns of a table still match.
+    seed : `int`, optional
+        Seed of the ``'random'`` method.
+
+    Returns
+    -------
+    quantity : `astropy.units.Quantity`
+        Selected rows, or the input ``quantity`` if it has at most ``size``
+        rows.
+    indices : `numpy.ndarray` or `None`
+        Increasing indices of the selected rows, or `None` if the input is
+        not decimated.
+    method : `str`
+        Method actually used.
+
+    Raises
+    ------
+    lsst.validate.base.ValidateError
+        Raised if the method is unknown or ``size`` is not positive.
+    """
+    if method not in PREVIEW_METHODS:
+        raise ValidateError('Unknown decimation method {0!r}; methods are '
+                            '{1!r}'.format(method, PREVIEW_METHODS))
+    if size < 1:
+        raise ValidateError('Cannot decimate to {0!r} rows'.format(size))
+    n = len(quantity)
+    if n <= size:
+        return quantity, None, method
+
+    if method == 'envelope' and (quantity.ndim != 1 or size < 2):
+        # A single row cannot hold both a minimum and a maximum
+        method = 'uniform'
+    if method == 'uniform':
+        indices = _uniform_indices(n, size)
+    elif method == 'random':
+        indices = _random_indices(n, size, seed)
+    else:
+        if hasattr(quantity, 'unmasked'):
+            values = np.where(quantity.mask, np.nan,
+                              quantity.unmasked.value)
+        else:
+            values = quantity.value
+        indices = _envelope_indices(values.astype(float, copy=False), size)
+    return quantity[indices], indices, method
@@ -0,0 +1,310 @@
+# See COPYRIGHT file at the top of the source tree.
+from __future__ import print_function, division
+
+import functools
+import json
+import threading
+import time
+
+from .errors import ValidateError
+
+
+__all__ = ['SerializationProfiler', 'profiled']
+
+
+# The active profiler. Profiled functions only check this global when no
+# profiler is active, so the cost of the hooks is negligible.
+_active_profiler = None
+
+
+def profiled(operation, type_name=None, metric_name=None, size=None):
+    """Decorator that records calls of a (de)serialization function in the
+    active `SerializationProfiler`.
+
+    Parameters
+    ----------
+    operation : `str`
+        Name of the operation.
+    type_name : callable or `str`, optional
+        Name of the type of the (de)serialized object, or a callable that
+        returns it given the function's positional arguments. By default the
+        type of the enclosing profiled call is used.
+    metric_name : callable, optional
+        Callable that returns the name of the `Metric` the call relates to,
+        given the function's positional arguments. By default the metric of
+        the enclosing profiled call is used.
+    size : callable, optional
+        Callable that returns the number of bytes processed by the call,
+        given the function's positional arguments and its result.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            profiler = _active_profiler
+            if profiler is None:
+                return func(*args, **kwargs)
+            return profiler._profile_call(func, args, kwargs, operation,
+                                          type_name, metric_name, size)
+        return wrapper
+    return decorator
+
+
+def json_size(doc):
+    """Size of a JSON-serializable object, encoded as compact JSON, in
+    bytes.
+    """
+    return len(json.dumps(doc, separators=(',', ':'), default=repr))
+
+
+# Arguments of `profiled` shared by the profiled methods
+
+def instance_type(args):
+    """Type name of the instance of a profiled method."""
+    return type(args[0]).__name__
+
+
+def class_type(args):
+    """Type name of the class of a profiled classmethod."""
+    return args[0].__name__
+
+
+def result_size(args, result):
+    """Size of the JSON output of a profiled call."""
+    return json_size(result)
+
+
+def json_data_size(args, result):
+    """Size of the ``json_data`` input of a profiled ``from_json``
+    classmethod.
+    """
+    return json_size(args[1])
+
+
+class _Frame(object):
+    """A profiled call in progress."""
+
+    __slots__ = ('type_name', 'metric_name', 'child_time')
+
+    def __init__(self, type_name, metric_name):
+        self.type_name = type_name
+        self.metric_name = metric_name
+        self.child_time = 0.
+
+
+class SerializationProfiler(object):
+    """Profiler of the time spent, and bytes processed, in JSON
+    serialization and deserialization.
+
+    While a profiler is active, calls of `Job.json`, `Job.from_json`, the
+    `json` and `from_json` of measurements, blobs, metrics and specifications,
+    and `JsonSerializationMixin.jsonify_dict` are timed. Calls are aggregated
+    by operation, by type of the (de)serialized object, and by `Metric`.
+    `Datum`\ s aren't profiled individually: their time counts towards the
+    self time of the enclosing call.
+
+    Each call has a *total* time, which includes the profiled calls nested in
+    it, and a *self* time, which doesn't. Summing self times doesn't count
+    nested calls twice.
+
+    Parameters
+    ----------
+    count_bytes : `bool`, optional
+        If `True`, also record the bytes processed by each call: the size of
+        its JSON output or input, encoded as compact JSON. Like total times,
+        bytes include nested calls. Measuring bytes encodes the JSON of every
+        profiled call again, so it is off by default; its cost is excluded
+        from the timings. Otherwise bytes are recorded as zero.
+
+    Only one profiler can be active at a time. It records calls from all
+    threads.
+
+    Examples
+    --------
+    >>> with SerializationProfiler() as profiler:  # doctest: +SKIP
+    ...     job = Job.from_json(job.json)
+    >>> print(profiler.report())  # doctest: +SKIP
+    """
+
+    def __init__(self, count_bytes=False):
+        self._count_bytes = count_bytes
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._records = {}
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+    def start(self):
+        """Start profiling.
+
+        Raises
+        ------
+        lsst.validate.base.ValidateError
+            Raised if another profiler is active.
+        """
+        global _active_profiler
+        if _active_profiler is not None and _active_profiler is not self:
+            raise ValidateError('Another SerializationProfiler is active')
+        _active_profiler = self
+
+    def stop(self):
+        """Stop profiling."""
+        global _active_profiler
+        if _active_profiler is self:
+            _active_profiler = None
+
+    def reset(self):
+        """Discard all records."""
+        with self._lock:
+            self._records = {}
+
+    def _thread_state(self):
+        local = self._local
+        if not hasattr(local, 'stack'):
+            local.stack = []
+            local.overhead = 0.
+        return local
+
+    def _profile_call(self, func, args, kwargs, operation, type_name,
+                      metric_name, size):
+        local = self._thread_state()
+        stack = local.stack
+        parent = stack[-1] if stack else None
+
+        if callable(type_name):
+            type_name = type_name(args)
+        elif type_name is None and parent is not None:
+            type_name = parent.type_name
+        metric = metric_name(args) if metric_name is not None else None
+        if metric is None and parent is not None:
+            metric = parent.metric_name
+
+        frame = _Frame(type_name, metric)
+        stack.append(frame)
+        overhead = local.overhead
+        start = time.perf_counter()
+        try:
+            result = func(*args, **kwargs)
+        finally:
+            # Time spent measuring the bytes of nested calls isn't counted
+            elapsed = time.perf_counter() - start - \
+                (local.overhead - overhead)
+            stack.pop()
+
+        if self._count_bytes and size is not None:
+            start = time.perf_counter()
+            nbytes = size(args, result)
+            local.overhead += time.perf_counter() - start
+        else:
+            nbytes = 0
+        with self._lock:
+            record = self._records.setdefault(
+                (operation, type_name, metric), [0, 0., 0., 0])
+            record[0] += 1
+            record[1] += elapsed
+            record[2] += elapsed - frame.child_time
+            record[3] += nbytes
+        if parent is not None:
+            parent.child_time += elapsed
+        return result
+
+    @property
+    def records(self):
+        """Profile records (`list` of `dict`).
+
+        Each record aggregates the calls of one ``operation`` for one
+        ``type`` and ``metric``, with the number of ``calls``, the
+        ``total_time`` and ``self_time`` in seconds, and the ``bytes``
+        processed (zero unless the profiler counts bytes).
+        """
+        with self._lock:
+            items = sorted(self._records.items(),
+                           key=lambda item: -item[1][2])
+        return [{'operation': operation, 'type': type_name,
+                 'metric': metric, 'calls': calls, 'total_time': total,
+                 'self_time': self_time, 'bytes': nbytes}
+                for (operation, type_name, metric),
+                (calls, total, self_time, nbytes) in items]
+
+    def _group(self, field):
+        groups = {}
+        for record in self.records:
+            group = groups.setdefault(record[field],
+                                      {'calls': 0, 'self_time': 0.})
+            group['calls'] += record['calls']
+            group['self_time'] += record['self_time']
+        return dict(sorted(groups.items(),
+                           key=lambda item: -item[1]['self_time']))
+
+    def by_operation(self):
+        """Calls and self time aggregated by operation (`dict`), most
+        expensive operations first.
+        """
+        return self._group('operation')
+
+    def by_type(self):
+        """Calls and self time aggregated by type of the (de)serialized
+        objects (`dict`), most expensive types first.
+        """
+        return self._group('type')
+
+    def by_metric(self):
+        """Calls and self time aggregated by `Metric` name (`dict`), most
+        expensive metrics first. Calls that don't relate to a metric, such as
+        those of blobs, are keyed by `None`.
+        """
+        return self._group('metric')
+
+    @property
+    def json(self):
+        """Profile as a `dict` that can be serialized as JSON."""
+        def keyed(groups):
+            return [dict(group, name=name) for name, group in groups.items()]
+
+        return {'records': self.records,
+                'by_operation': keyed(self.by_operation()),
+                'by_type': keyed(self.by_type()),
+                'by_metric': keyed(self.by_metric())}
+
+    def report(self):
+        """Format the profile as a text report.
+
+        Returns
+        -------
+        report : `str`
+            Tables of self time by type, by metric and by operation, followed
+            by all records.
+        """
+        lines = []
+
+        def add_groups(title, groups):
+            total = sum(g['self_time'] for g in groups.values()) or 1.
+            lines.append('{0:<40} {1:>10} {2:>12} {3:>7}'.format(
+                title, 'calls', 'self (s)', '%'))
+            for name, g in groups.items():
+                lines.append('{0:<40} {1:>10d} {2:>12.6f} {3:>7.1f}'.format(
+                    str(name), g['calls'], g['self_time'],
+                    100. * g['self_time'] / total))
+            lines.append('')
+
+        add_groups('Type', self.by_type())
+        add_groups('Metric', self.by_metric())
+        add_groups('Operation', self.by_operation())
+
+        lines.append('{0:<18} {1:<24} {2:<16} {3:>8} {4:>11} {5:>11} '
+                     '{6:>12} {7:>9}'.format(
+                         'Operation', 'Type', 'Metric', 'calls',
+                         'total (s)', 'self (s)', 'bytes', 'MB/s'))
+        for r in self.records:
+            rate = r['bytes'] / r['total_time'] / 1e6 \
+                if r['total_time'] > 0. else 0.
+            lines.append('{0:<18} {1:<24} {2:<16} {3:>8d} {4:>11.6f} '
+                         '{5:>11.6f} {6:>12d} {7:>9.1f}'.format(
+                             r['operation'], str(r['type']),
+                             str(r['metric']), r['calls'], r['total_time'],
+                             r['self_time'], r['bytes'], rate))
+        return '\n'.join(lines)
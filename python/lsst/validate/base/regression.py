@@ -0,0 +1,331 @@
+# See COPYRIGHT file at the top of the source tree.
+from __future__ import print_function, division
+
+from concurrent.futures import ThreadPoolExecutor
+
+from .datum import Datum
+from .jobstore import JobStore
+from .jsonmixin import JsonSerializationMixin
+from .lazy import lazy_import
+from .timeseries import (MetricSeries, extract_metric_series,
+                         _read_measurement_rows)
+
+
+__all__ = ['Regression', 'detect_regressions', 'detect_catalog_regressions']
+
+
+np = lazy_import('numpy')
+u = lazy_import('astropy.units')
+
+
+_MAD_SCALE = 1.4826
+"""Ratio of the standard deviation to the median absolute deviation of a
+normal distribution.
+"""
+
+
+class Regression(JsonSerializationMixin):
+    """A regression of a metric found in its history.
+
+    Parameters
+    ----------
+    kind : `str`
+        ``'change_point'`` if the metric's level shifted persistently, or
+        ``'outlier'`` if a single job's value departs from the recent history.
+    metric_name : `str`
+        Name of the `Metric`.
+    spec_name : `str`
+        Specification level name of the measurements, or `None`.
+    filter_name : `str`
+        Optical filter name of the measurements, or `None`.
+    job_id : `str`
+        Identifier of the job where the regression appears (for a change
+        point, the first job after the change).
+    run_time : `numpy.datetime64`
+        Run time of that job.
+    value : `astropy.units.Quantity`
+        Value of the outlier, or mean value after the change point.
+    baseline : `astropy.units.Quantity`
+        Median value of the preceding window for an outlier, or mean value
+        before the change point.
+    score : `float`
+        Significance of the regression: robust z-score of an outlier, or
+        t statistic of a change point.
+    """
+
+    def __init__(self, kind, metric_name, spec_name, filter_name, job_id,
+                 run_time, value, baseline, score):
+        self.kind = kind
+        self.metric_name = metric_name
+        self.spec_name = spec_name
+        self.filter_name = filter_name
+        self.job_id = job_id
+        self.run_time = run_time
+        self.value = value
+        self.baseline = baseline
+        self.score = score
+
+    @property
+    def shift(self):
+        """Change of the value from the baseline
+        (`astropy.units.Quantity`).
+        """
+        return self.value - self.baseline
+
+    def __repr__(self):
+        return ('Regression({0!r}, {1!r}, spec_name={2!r}, filter_name={3!r}, '
+                'job_id={4!r}, shift={5})'.format(
+                    self.kind, self.metric_name, self.spec_name,
+                    self.filter_name, self.job_id, self.shift))
+
+    @property
+    def json(self):
+        """`dict` that can be serialized as JSON."""
+        return JsonSerializationMixin.jsonify_dict({
+            'kind': self.kind,
+            'metric': self.metric_name,
+            'spec_name': self.spec_name,
+            'filter_name': self.filter_name,
+            'job_id': self.job_id,
+            'run_time': str(self.run_time),
+            'value': Datum(self.value),
+            'baseline': Datum(self.baseline),
+            'score': float(self.score)})
+
+
+def _worse_direction(operator_str):
+    """Sign of value changes that make a metric worse: +1 if larger values
+    are worse, -1 if smaller values are worse, 0 if both are.
+    """
+    if operator_str in ('<', '<='):
+        return 1
+    elif operator_str in ('>', '>='):
+        return -1
+    return 0
+
+
+def _is_worse(shift, direction):
+    if direction == 0:
+        return np.ones(shift.shape, dtype=bool)
+    return direction * shift > 0
+
+
+def _find_outliers(x, window, threshold, min_shift, direction):
+    """Indices, baselines and robust z-scores of values that depart from the
+    median of the preceding ``window`` values.
+    """
+    windows = np.lib.stride_tricks.sliding_window_view(x[:-1], window)
+    median = np.median(windows, axis=1)
+    mad = np.median(np.abs(windows - median[:, np.newaxis]), axis=1)
+    deviation = x[window:] - median
+    with np.errstate(divide='ignore', invalid='ignore'):
+        z = deviation / (_MAD_SCALE * mad)
+    # A constant history makes any change infinitely significant
+    z[(mad == 0) & (deviation == 0)] = 0.
+    flagged = (np.abs(z) > threshold) & \
+        (np.abs(deviation) >= min_shift) & _is_worse(deviation, direction)
+    indices = np.nonzero(flagged)[0]
+    return indices + window, median[indices], z[indices]
+
+
+def _find_change_points(x, window, threshold, min_shift, direction):
+    """Indices, means before and after, and t statistics of persistent
+    level shifts between consecutive windows of ``window`` values.
+    """
+    n = len(x)
+    # Centering keeps the windowed variances (mean of squares minus square
+    # of mean) from cancelling catastrophically when the values have a large
+    # offset relative to their noise
+    offset = x.mean() if n else 0.
+    centered = x - offset
+    sums = np.concatenate([[0.], np.cumsum(centered)])
+    sums2 = np.concatenate([[0.], np.cumsum(centered * centered)])
+    k = np.arange(window, n - window + 1)
+    mean_before = (sums[k] - sums[k - window]) / window
+    mean_after = (sums[k + window] - sums[k]) / window
+    var_before = np.maximum(
+        (sums2[k] - sums2[k - window]) / window - mean_before ** 2, 0.)
+    var_after = np.maximum(
+        (sums2[k + window] - sums2[k]) / window - mean_after ** 2, 0.)
+    shift = mean_after - mean_before
+    with np.errstate(divide='ignore', invalid='ignore'):
+        t = shift / np.sqrt((var_before + var_after) / window)
+    t[(var_before + var_after == 0) & (shift == 0)] = 0.
+    flagged = (np.abs(t) > threshold) & (np.abs(shift) >= min_shift) & \
+        _is_worse(shift, direction)
+
+    # Keep the most significant split of each run of flagged splits
+    indices = np.nonzero(flagged)[0]
+    if len(indices) == 0:
+        return indices, mean_before[indices], mean_after[indices], t[indices]
+    run_starts = np.concatenate(
+        [[0], np.nonzero(np.diff(indices) > 1)[0] + 1])
+    score = np.abs(t[indices])
+    best = [start + np.argmax(score[start:end]) for start, end
+            in zip(run_starts, np.append(run_starts[1:], len(indices)))]
+    indices = indices[best]
+    return (k[indices], mean_before[indices] + offset,
+            mean_after[indices] + offset, t[indices])
+
+
+def _spec_min_shift(metric, spec_name, filter_name, spec_fraction, unit):
+    """Minimum shift, as a fraction of a specification level."""
+    try:
+        spec = metric.get_spec(spec_name, filter_name=filter_name)
+    except RuntimeError:
+        return 0.
+    return spec_fraction * abs(spec.quantity.to(unit).value)
+
+
+def detect_regressions(series, metric=None, window=20, outlier_threshold=5.,
+                       change_threshold=4., min_shift=None,
+                       spec_fraction=None, spec_name='design'):
+    """Detect change points and outliers in a metric's history.
+
+    The history is split into groups of measurements that share a
+    specification level and filter. Each group is ordered by run time, and
+    analyzed with vectorized NumPy operations:
+
+    - An *outlier* is a value whose robust z-score, relative to the median
+      and median absolute deviation of the preceding ``window`` values,
+      exceeds ``outlier_threshold``. Values within ``window`` values after a
+      change point are not outliers.
+    - A *change point* is a split where the means of the ``window`` values
+      before and after it differ with a t statistic exceeding
+      ``change_threshold``. Consecutive significant splits are reduced to
+      the most significant one.
+
+    Parameters
+    ----------
+    series : `MetricSeries`
+        History of the metric (see `extract_metric_series`).
+    metric : `Metric`, optional
+        The metric. Its `~Metric.operator_str` sets which direction of change
+        is a regression: for ``<`` and ``<=`` metrics only increases are
+        reported, and for ``>`` and ``>=`` metrics only decreases. Without
+        a metric, changes in both directions are reported.
+    window : `int`, optional
+        Number of values in the windows of history.
+    outlier_threshold : `float`, optional
+        Robust z-score above which a value is an outlier.
+    change_threshold : `float`, optional
+        t statistic above which a split is a change point.
+    min_shift : `astropy.units.Quantity`, optional
+        Smallest change of value that is reported, whatever its
+        significance.
+    spec_fraction : `float`, optional
+        Smallest change of value that is reported, as a fraction of the
+        ``spec_name`` specification level of ``metric`` for each group's
+        filter. Overrides ``min_shift``.
+    spec_name : `str`, optional
+        Specification level that ``spec_fraction`` refers to.
+
+    Returns
+    -------
+    regressions : `list` of `Regression`
+        Regressions, ordered by group and run time.
+    """
+    unit = series.unit
+    direction = _worse_direction(metric.operator_str) if metric else 0
+    if min_shift is not None:
+        min_shift = u.Quantity(min_shift).to(unit).value
+    else:
+        min_shift = 0.
+
+    groups = {}
+    for i, key in enumerate(zip(series.spec_names, series.filter_names)):
+        groups.setdefault(key, []).append(i)
+
+    regressions = []
+    for (group_spec, filter_name), rows in groups.items():
+        rows = np.array(rows)
+        rows = rows[np.argsort(series.run_times[rows], kind='stable')]
+        rows = rows[~np.isnan(series.values[rows])]
+        if len(rows) <= window:
+            continue
+        x = series.values[rows]
+
+        group_min_shift = min_shift
+        if spec_fraction is not None and metric is not None:
+            group_min_shift = _spec_min_shift(metric, spec_name, filter_name,
+                                              spec_fraction, unit)
+
+        def make(kind, index, value, baseline, score):
+            row = rows[index]
+            return Regression(kind, series.metric_name, group_spec,
+                              filter_name, series.job_ids[row],
+                              series.run_times[row], value * unit,
+                              baseline * unit, score)
+
+        found = []
+        indices, before, after, t = _find_change_points(
+            x, window, change_threshold, group_min_shift, direction)
+        for index, mean_before, mean_after, score in zip(indices, before,
+                                                         after, t):
+            found.append(make('change_point', index, mean_after, mean_before,
+                              score))
+        # Values right after a change point differ from the preceding window
+        # because of the change itself, so they are not reported as outliers
+        explained = np.zeros(len(x) + window, dtype=bool)
+        for index in indices:
+            explained[index:index + window] = True
+        indices, medians, z = _find_outliers(
+            x, window, outlier_threshold, group_min_shift, direction)
+        for index, median, score in zip(indices, medians, z):
+            if not explained[index]:
+                found.append(make('outlier', index, x[index], median, score))
+        found.sort(key=lambda r: r.run_time)
+        regressions.extend(found)
+    return regressions
+
+
+def _catalog_series(source, metrics, max_workers):
+    """Series of each metric, keyed by metric name."""
+    if isinstance(source, JobStore):
+        return {metric.name: extract_metric_series(source, metric.name)
+                for metric in metrics}
+
+    # Read each file once for all metrics
+    paths = list(source)
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        results = pool.map(_read_measurement_rows, paths,
+                           [None] * len(paths), [None] * len(paths),
+                           [None] * len(paths))
+        rows = {}
+        for file_rows in results:
+            for row in file_rows:
+                rows.setdefault(row[2], []).append(row)
+    return {metric.name: MetricSeries.from_rows(metric.name,
+                                                rows.get(metric.name, []))
+            for metric in metrics}
+
+
+def detect_catalog_regressions(source, metrics, max_workers=None, **kwargs):
+    """Detect regressions in the history of every metric of a catalog.
+
+    Parameters
+    ----------
+    source : `JobStore` or iterable of `str`
+        History of jobs: a `JobStore`, or paths of `Job` JSON files (see
+        `extract_metric_series`). Each file is only read once, whatever the
+        number of metrics.
+    metrics : iterable of `Metric`
+        Metrics to analyze, such as the values of `load_metrics`.
+    max_workers : `int`, optional
+        Number of workers that read JSON files concurrently.
+    **kwargs
+        Arguments of `detect_regressions`.
+
+    Returns
+    -------
+    regressions : `list` of `Regression`
+        Regressions of all metrics.
+    """
+    metrics = list(metrics)
+    series = _catalog_series(source, metrics, max_workers)
+    regressions = []
+    for metric in metrics:
+        if len(series[metric.name]) > 0:
+            regressions.extend(detect_regressions(
+                series[metric.name], metric=metric, **kwargs))
+    return regressions
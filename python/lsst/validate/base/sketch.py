@@ -0,0 +1,858 @@
+# See COPYRIGHT file at the top of the source tree.
+"""Mergeable summaries of metric values across many jobs.
+
+A `SketchCollection` summarizes measurement values (and, optionally, blob
+arrays) with a `MetricSketch` per metric, specification level, filter and
+time period. Sketches have a bounded size whatever the number of values, and
+collections built from separate sets of jobs (for example, in separate
+processes) merge into the collection of all jobs.
+"""
+from __future__ import print_function, division
+
+import collections
+import datetime
+import itertools
+import math
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+from .compression import read_json
+from .datum import Datum
+from .errors import ValidateError
+from .jobstore import JobStore
+from .jsonmixin import JsonSerializationMixin
+from .lazy import lazy_import
+
+
+__all__ = ['QuantileSketch', 'MetricSketch', 'SketchKey', 'SketchCollection',
+           'build_sketches']
+
+
+np = lazy_import('numpy')
+u = lazy_import('astropy.units')
+
+
+PERIODS = {'year': 'Y', 'month': 'M', 'day': 'D', None: None}
+"""Periods of a `SketchCollection`, and their `numpy.datetime64` units."""
+
+ROWS_PER_CHUNK = 10000
+"""Number of `JobStore` rows that `build_sketches` adds at once."""
+
+
+def _finite_values(values):
+    """Finite values of an array (without units), and the number of others.
+    Masked values of masked arrays are dropped.
+    """
+    if hasattr(values, 'unmasked'):
+        values = values.unmasked[~values.mask]
+    values = np.asarray(values, dtype=float).ravel()
+    finite = np.isfinite(values)
+    return values[finite], int(len(values) - np.count_nonzero(finite))
+
+
+class QuantileSketch(JsonSerializationMixin):
+    """Mergeable sketch of the distribution of values, with relative-accuracy
+    quantiles.
+
+    Values are counted in logarithmically spaced buckets (as in the DDSketch
+    algorithm): the quantiles of a sketch are within ``relative_accuracy``
+    of the exact quantiles, its size only depends on the range of the values
+    and merging two sketches adds their bucket counts.
+
+    Parameters
+    ----------
+    relative_accuracy : `float`, optional
+        Relative accuracy of quantiles, between 0 and 1.
+    max_buckets : `int`, optional
+        Maximum number of buckets of positive values, and of negative values.
+        Beyond it, the buckets of the values closest to zero are collapsed,
+        so that the lowest quantiles (of absolute values) lose accuracy
+        first. The default covers 17 decades of values at the default
+        accuracy.
+    """
+
+    def __init__(self, relative_accuracy=0.01, max_buckets=2048):
+        if not 0. < relative_accuracy < 1.:
+            raise ValidateError('Relative accuracy must be between 0 and 1, '
+                                'not {0!r}'.format(relative_accuracy))
+        self.relative_accuracy = relative_accuracy
+        self.max_buckets = max_buckets
+        self._gamma = (1. + relative_accuracy) / (1. - relative_accuracy)
+        self._log_gamma = math.log(self._gamma)
+        self._positive = {}
+        self._negative = {}
+        self.zero_count = 0
+
+    @property
+    def count(self):
+        """Number of values (`int`)."""
+        return sum(self._positive.values()) + \
+            sum(self._negative.values()) + self.zero_count
+
+    def _keys(self, magnitudes):
+        return np.ceil(np.log(magnitudes) / self._log_gamma).astype(np.int64)
+
+    def _add_to_store(self, store, magnitudes):
+        keys, counts = np.unique(self._keys(magnitudes), return_counts=True)
+        for key, count in zip(keys.tolist(), counts.tolist()):
+            store[key] = store.get(key, 0) + count
+        self._collapse(store)
+
+    def _collapse(self, store):
+        if len(store) > self.max_buckets:
+            keys = sorted(store)
+            excess = keys[:len(keys) - self.max_buckets + 1]
+            store[excess[-1]] += sum(store.pop(k) for k in excess[:-1])
+
+    def add(self, values):
+        """Add values.
+
+        Parameters
+        ----------
+        values : array-like
+            Values (of any shape). Values that are not finite are ignored.
+        """
+        values, _ = _finite_values(values)
+        positive = values[values > 0.]
+        negative = -values[values < 0.]
+        self.zero_count += len(values) - len(positive) - len(negative)
+        if len(positive):
+            self._add_to_store(self._positive, positive)
+        if len(negative):
+            self._add_to_store(self._negative, negative)
+
+    def merge(self, other):
+        """Add the values of another sketch.
+
+        Parameters
+        ----------
+        other : `QuantileSketch`
+            Sketch with the same `relative_accuracy`.
+
+        Returns
+        -------
+        sketch : `QuantileSketch`
+            This sketch.
+
+        Raises
+        ------
+        lsst.validate.base.ValidateError
+            Raised if the sketches have different accuracies.
+        """
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValidateError(
+                'Cannot merge sketches of relative accuracies {0!r} and '
+                '{1!r}'.format(self.relative_accuracy,
+                               other.relative_accuracy))
+        for store, other_store in ((self._positive, other._positive),
+                                   (self._negative, other._negative)):
+            for key, count in other_store.items():
+                store[key] = store.get(key, 0) + count
+            self._collapse(store)
+        self.zero_count += other.zero_count
+        return self
+
+    def scaled(self, factor):
+        """Sketch of the values multiplied by a positive factor.
+
+        Buckets are shifted by the nearest whole number of buckets, so the
+        scaled sketch's quantiles are within about twice the relative
+        accuracy unless ``factor`` is a power of the bucket ratio (such as
+        1).
+
+        Parameters
+        ----------
+        factor : `float`
+            Positive scale factor, such as a unit conversion factor.
+
+        Returns
+        -------
+        sketch : `QuantileSketch`
+            The scaled sketch.
+        """
+        shift = int(round(math.log(factor) / self._log_gamma))
+        sketch = QuantileSketch(self.relative_accuracy, self.max_buckets)
+        sketch._positive = {k + shift: c for k, c in self._positive.items()}
+        sketch._negative = {k + shift: c for k, c in self._negative.items()}
+        sketch.zero_count = self.zero_count
+        return sketch
+
+    def _buckets(self):
+        """Representative values and counts of all buckets, in increasing
+        order of value.
+        """
+        negative_keys = np.array(sorted(self._negative, reverse=True),
+                                 dtype=np.int64)
+        positive_keys = np.array(sorted(self._positive), dtype=np.int64)
+        scale = 2. / (1. + self._gamma)
+        values = np.concatenate([
+            -scale * self._gamma ** negative_keys.astype(float),
+            [0.],
+            scale * self._gamma ** positive_keys.astype(float)])
+        counts = np.concatenate([
+            [self._negative[k] for k in negative_keys.tolist()],
+            [self.zero_count],
+            [self._positive[k] for k in positive_keys.tolist()]])
+        return values, counts.astype(np.int64)
+
+    def quantile(self, q):
+        """Estimate quantiles.
+
+        Parameters
+        ----------
+        q : `float` or array-like
+            Quantiles, between 0 and 1.
+
+        Returns
+        -------
+        values : `float` or `numpy.ndarray`
+            Estimated values of the quantiles (``NaN`` if the sketch is
+            empty). The value of quantile ``q`` is within the relative
+            accuracy of the value of rank ``floor(q * (count - 1))`` (from
+            0) among the sorted values.
+        """
+        q = np.asarray(q, dtype=float)
+        if np.any((q < 0.) | (q > 1.)):
+            raise ValidateError('Quantiles must be between 0 and 1')
+        values, counts = self._buckets()
+        cumulative = np.cumsum(counts)
+        count = cumulative[-1]
+        if count == 0:
+            result = np.full(q.shape, np.nan)
+        else:
+            ranks = np.floor(q * (count - 1))
+            result = values[np.searchsorted(cumulative, ranks, side='right')]
+        return float(result) if result.ndim == 0 else result
+
+    @property
+    def json(self):
+        """`dict` that can be serialized as JSON."""
+        def store_json(store):
+            keys = sorted(store)
+            return {'keys': keys, 'counts': [store[k] for k in keys]}
+
+        return {'relative_accuracy': self.relative_accuracy,
+                'max_buckets': self.max_buckets,
+                'zero_count': self.zero_count,
+                'positive': store_json(self._positive),
+                'negative': store_json(self._negative)}
+
+    @classmethod
+    def from_json(cls, json_data):
+        """Construct a sketch from a JSON document.
+
+        Parameters
+        ----------
+        json_data : `dict`
+            Sketch JSON object (as produced by `json`).
+
+        Returns
+        -------
+        sketch : `QuantileSketch`
+            Sketch from JSON.
+        """
+        sketch = cls(json_data['relative_accuracy'], json_data['max_buckets'])
+        sketch.zero_count = json_data['zero_count']
+        sketch._positive = dict(zip(json_data['positive']['keys'],
+                                    json_data['positive']['counts']))
+        sketch._negative = dict(zip(json_data['negative']['keys'],
+                                    json_data['negative']['counts']))
+        return sketch
+
+
+class MetricSketch(JsonSerializationMixin):
+    """Mergeable summary of values in a unit: counts, moments, extrema and a
+    `QuantileSketch`.
+
+    Parameters
+    ----------
+    unit : `str` or `astropy.units.Unit`, optional
+        Unit of the values. By default, the unit of the first values added.
+    relative_accuracy : `float`, optional
+        Relative accuracy of quantiles.
+    """
+
+    def __init__(self, unit=None, relative_accuracy=0.01):
+        self.unit = u.Unit(unit) if unit is not None else None
+        self.count = 0
+        self.n_nonfinite = 0
+        self._mean = 0.
+        self._m2 = 0.
+        self._min = np.inf
+        self._max = -np.inf
+        self.sketch = QuantileSketch(relative_accuracy)
+
+    def _factor(self, unit):
+        """Conversion factor of ``unit`` into the sketch's unit."""
+        unit = u.Unit(unit) if unit is not None else u.dimensionless_unscaled
+        if self.unit is None:
+            self.unit = unit
+            return 1.
+        return unit.to(self.unit)
+
+    def _merge_moments(self, count, mean, m2, minimum, maximum):
+        # Pairwise update of Chan et al., exact for any split of the values
+        total = self.count + count
+        if count == 0:
+            return
+        delta = mean - self._mean
+        self._mean += delta * count / total
+        self._m2 += m2 + delta ** 2 * self.count * count / total
+        self.count = total
+        self._min = min(self._min, minimum)
+        self._max = max(self._max, maximum)
+
+    def add(self, values, unit=None):
+        """Add values.
+
+        Parameters
+        ----------
+        values : `astropy.units.Quantity` or array-like
+            Values, of any shape. Quantities are converted into the sketch's
+            `unit`; other values are in ``unit``. Values that are not finite
+            are only counted in `n_nonfinite`, and masked values are ignored.
+        unit : `str` or `astropy.units.Unit`, optional
+            Unit of ``values`` if they are not a quantity. By default, the
+            values are dimensionless.
+
+        Raises
+        ------
+        astropy.units.UnitConversionError
+            Raised if the values cannot be converted into the sketch's unit.
+        """
+        if isinstance(values, u.Quantity):
+            factor = self._factor(values.unit)
+            values = values.value
+        else:
+            factor = self._factor(unit)
+        values, n_nonfinite = _finite_values(values)
+        if factor != 1.:
+            values = values * factor
+        self.n_nonfinite += n_nonfinite
+        if len(values):
+            mean = values.mean()
+            self._merge_moments(len(values), mean,
+                                float(((values - mean) ** 2).sum()),
+                                values.min(), values.max())
+            self.sketch.add(values)
+
+    def merge(self, other):
+        """Add the values of another sketch.
+
+        Parameters
+        ----------
+        other : `MetricSketch`
+            Sketch with the same relative accuracy, in a unit that can be
+            converted into this sketch's unit.
+
+        Returns
+        -------
+        sketch : `MetricSketch`
+            This sketch.
+
+        Raises
+        ------
+        lsst.validate.base.ValidateError
+            Raised if the sketches have different accuracies.
+        astropy.units.UnitConversionError
+            Raised if the units cannot be converted.
+        """
+        if other.unit is None:
+            # No values were ever added
+            return self
+        factor = self._factor(other.unit)
+        sketch = other.sketch
+        if factor != 1.:
+            sketch = sketch.scaled(factor)
+        self.sketch.merge(sketch)
+        self.n_nonfinite += other.n_nonfinite
+        self._merge_moments(other.count, other._mean * factor,
+                            other._m2 * factor ** 2, other._min * factor,
+                            other._max * factor)
+        return self
+
+    def _quantity(self, value):
+        unit = self.unit if self.unit is not None \
+            else u.dimensionless_unscaled
+        return u.Quantity(value, unit)
+
+    @property
+    def mean(self):
+        """Mean of the values (`astropy.units.Quantity`; ``NaN`` if
+        there are none).
+        """
+        return self._quantity(self._mean if self.count else np.nan)
+
+    @property
+    def variance(self):
+        """Population variance of the values (`astropy.units.Quantity`;
+        ``NaN`` if there are none).
+        """
+        unit = self.unit if self.unit is not None \
+            else u.dimensionless_unscaled
+        return u.Quantity(self._m2 / self.count if self.count else np.nan,
+                          unit ** 2)
+
+    @property
+    def std(self):
+        """Population standard deviation of the values
+        (`astropy.units.Quantity`; ``NaN`` if there are none).
+        """
+        return self._quantity(math.sqrt(self._m2 / self.count)
+                              if self.count else np.nan)
+
+    @property
+    def min(self):
+        """Minimum value (`astropy.units.Quantity`; ``NaN`` if there are
+        none).
+        """
+        return self._quantity(self._min if self.count else np.nan)
+
+    @property
+    def max(self):
+        """Maximum value (`astropy.units.Quantity`; ``NaN`` if there are
+        none).
+        """
+        return self._quantity(self._max if self.count else np.nan)
+
+    def quantile(self, q):
+        """Estimate quantiles (see `QuantileSketch.quantile`).
+
+        Parameters
+        ----------
+        q : `float` or array-like
+            Quantiles, between 0 and 1.
+
+        Returns
+        -------
+        values : `astropy.units.Quantity`
+            Estimated values of the quantiles.
+        """
+        return self._quantity(self.sketch.quantile(q))
+
+    @property
+    def json(self):
+        """`dict` that can be serialized as JSON."""
+        return {'unit': str(self.unit) if self.unit is not None else None,
+                'count': self.count,
+                'n_nonfinite': self.n_nonfinite,
+                'mean': self._mean,
+                'm2': self._m2,
+                'min': self._min if self.count else None,
+                'max': self._max if self.count else None,
+                'sketch': self.sketch.json}
+
+    @classmethod
+    def from_json(cls, json_data):
+        """Construct a sketch from a JSON document.
+
+        Parameters
+        ----------
+        json_data : `dict`
+            Sketch JSON object (as produced by `json`).
+
+        Returns
+        -------
+        sketch : `MetricSketch`
+            Sketch from JSON.
+        """
+        sketch = cls(json_data['unit'])
+        sketch.count = json_data['count']
+        sketch.n_nonfinite = json_data['n_nonfinite']
+        sketch._mean = json_data['mean']
+        sketch._m2 = json_data['m2']
+        if sketch.count:
+            sketch._min = json_data['min']
+            sketch._max = json_data['max']
+        sketch.sketch = QuantileSketch.from_json(json_data['sketch'])
+        return sketch
+
+
+SketchKey = collections.namedtuple(
+    'SketchKey',
+    ['metric_name', 'spec_name', 'filter_name', 'period', 'datum'])
+"""Key of a `MetricSketch` in a `SketchCollection`.
+
+``datum`` is `None` for measurement values, and ``'<blob name>.<datum
+name>'`` for the values of a blob's array datum.
+"""
+
+
+class SketchCollection(JsonSerializationMixin):
+    """Sketches (`MetricSketch`) of metric values, keyed by metric,
+    specification level, filter, time period and datum (see `SketchKey`).
+
+    Collections are built per job (with `add_job` or `add_job_json`), and
+    merged with `merge`. Use `build_sketches` to build the collection of
+    many jobs in parallel.
+
+    Parameters
+    ----------
+    period : `str`, optional
+        Time period of sketches: ``'year'``, ``'month'``, ``'day'``, or
+        `None` to not split values by time. Periods are ISO 8601 strings,
+        such as ``'2017-03'`` for months, or `None` for jobs without run
+        time.
+    relative_accuracy : `float`, optional
+        Relative accuracy of the quantiles of sketches.
+    """
+
+    def __init__(self, period='month', relative_accuracy=0.01):
+        if period not in PERIODS:
+            raise ValidateError('Unknown period {0!r}; periods are '
+                                '{1!r}'.format(period, list(PERIODS)))
+        self.period = period
+        self.relative_accuracy = relative_accuracy
+        self._sketches = {}
+
+    def __len__(self):
+        return len(self._sketches)
+
+    def __contains__(self, key):
+        return key in self._sketches
+
+    def __getitem__(self, key):
+        return self._sketches[key]
+
+    def keys(self):
+        """Keys of the sketches (`list` of `SketchKey`)."""
+        return list(self._sketches)
+
+    def items(self):
+        """`SketchKey` and `MetricSketch` pairs (`list`)."""
+        return list(self._sketches.items())
+
+    def period_of(self, run_time):
+        """Period of a run time.
+
+        Parameters
+        ----------
+        run_time : `datetime.datetime`, `str` or `None`
+            Run time, or ISO 8601 string. Naive datetimes are in UTC, and
+            timezone-aware datetimes are converted to UTC.
+
+        Returns
+        -------
+        period : `str` or `None`
+            ISO 8601 period, or `None` if the collection has no `period` or
+            ``run_time`` is `None`.
+        """
+        if self.period is None or run_time is None:
+            return None
+        if isinstance(run_time, datetime.datetime) and \
+                run_time.tzinfo is not None:
+            run_time = run_time.astimezone(datetime.timezone.utc).replace(
+                tzinfo=None)
+        return str(np.datetime64(run_time, PERIODS[self.period]))
+
+    def _sketch(self, key):
+        sketch = self._sketches.get(key)
+        if sketch is None:
+            sketch = MetricSketch(
+                relative_accuracy=self.relative_accuracy)
+            self._sketches[key] = sketch
+        return sketch
+
+    def add(self, values, metric_name, spec_name=None, filter_name=None,
+            run_time=None, datum=None, unit=None):
+        """Add values to the sketch of a key.
+
+        Parameters
+        ----------
+        values : `astropy.units.Quantity` or array-like
+            Values (see `MetricSketch.add`).
+        metric_name : `str`
+            Name of the `Metric`.
+        spec_name : `str`, optional
+            Specification level.
+        filter_name : `str`, optional
+            Optical filter.
+        run_time : `datetime.datetime` or `str`, optional
+            Run time of the job, which determines the period.
+        datum : `str`, optional
+            ``'<blob name>.<datum name>'`` for the values of a blob's array
+            datum.
+        unit : `str` or `astropy.units.Unit`, optional
+            Unit of ``values`` if they are not a quantity.
+        """
+        key = SketchKey(metric_name, spec_name, filter_name,
+                        self.period_of(run_time), datum)
+        self._sketch(key).add(values, unit=unit)
+
+    def _add_rows(self, rows):
+        """Add ``(run_time, metric_name, spec_name, filter_name, value,
+        unit)`` measurement rows, with one `MetricSketch.add` per key and
+        unit.
+        """
+        groups = collections.defaultdict(list)
+        for run_time, metric_name, spec_name, filter_name, value, unit in \
+                rows:
+            if isinstance(value, bool) or \
+                    not isinstance(value, (int, float)):
+                continue
+            key = SketchKey(metric_name, spec_name, filter_name,
+                            self.period_of(run_time), None)
+            groups[key, unit].append(value)
+        for (key, unit), values in groups.items():
+            self._sketch(key).add(values, unit=unit)
+
+    def _add_blob_datums(self, metric_name, spec_name, filter_name, run_time,
+                         blob_name, datums):
+        for name, d in datums.items():
+            if d.is_numeric_array:
+                self.add(d.quantity, metric_name, spec_name=spec_name,
+                         filter_name=filter_name, run_time=run_time,
+                         datum='{0}.{1}'.format(blob_name, name))
+
+    def add_job(self, job, run_time=None, blob_datums=False):
+        """Add the measurement values of a job.
+
+        Parameters
+        ----------
+        job : `Job`
+            The job.
+        run_time : `datetime.datetime` or `str`, optional
+            Run time of the job.
+        blob_datums : `bool`, optional
+            Also add the values of the numeric array datums of the blobs
+            linked to each measurement, under the measurement's metric.
+        """
+        rows = []
+        for m in job.measurements:
+            # The value and unit of the measurement's JSON document, so that
+            # the same values are kept as by add_job_json
+            q = m.quantity
+            value = q.value if isinstance(q, u.Quantity) else q
+            rows.append((run_time, m.metric.name, m.spec_name,
+                         m.filter_name, value, m.unit_str))
+            if blob_datums:
+                for blob in m.blobs.values():
+                    self._add_blob_datums(m.metric.name, m.spec_name,
+                                          m.filter_name, run_time, blob.name,
+                                          blob.datums)
+        self._add_rows(rows)
+
+    def add_job_json(self, json_data, run_time=None, blob_datums=False):
+        """Add the measurement values of a job JSON document.
+
+        No measurement objects are built, and only the datums of blobs are.
+
+        Parameters
+        ----------
+        json_data : `dict`
+            Job JSON object (as produced by `Job.json`).
+        run_time : `datetime.datetime` or `str`, optional
+            Run time of the job.
+        blob_datums : `bool`, optional
+            Also add the values of the numeric array datums of the blobs
+            linked to each measurement. Blobs that the document only
+            references (see `BlobBase.reference_json`) are skipped.
+        """
+        rows = [(run_time, doc['metric']['name'], doc['spec_name'],
+                 doc['filter_name'], doc['value'], doc['unit'])
+                for doc in json_data['measurements']]
+        self._add_rows(rows)
+        if not blob_datums:
+            return
+        blob_docs = {doc['identifier']: doc for doc in json_data['blobs']
+                     if 'data' in doc}
+        datums = {}
+        for doc in json_data['measurements']:
+            for blob_id in doc['blobs'].values():
+                if blob_id not in blob_docs:
+                    continue
+                if blob_id not in datums:
+                    # Blobs shared by several measurements are decoded once
+                    datums[blob_id] = {
+                        k: Datum.from_json(v)
+                        for k, v in blob_docs[blob_id]['data'].items()}
+                self._add_blob_datums(doc['metric']['name'], doc['spec_name'],
+                                      doc['filter_name'], run_time,
+                                      blob_docs[blob_id]['name'],
+                                      datums[blob_id])
+
+    def merge(self, other):
+        """Add the sketches of another collection.
+
+        Parameters
+        ----------
+        other : `SketchCollection`
+            Collection with the same `period` and relative accuracy.
+
+        Returns
+        -------
+        collection : `SketchCollection`
+            This collection.
+
+        Raises
+        ------
+        lsst.validate.base.ValidateError
+            Raised if the collections have different periods or accuracies.
+        """
+        if (other.period, other.relative_accuracy) != \
+                (self.period, self.relative_accuracy):
+            raise ValidateError(
+                'Cannot merge collections of periods {0!r} and {1!r} and '
+                'relative accuracies {2!r} and {3!r}'.format(
+                    self.period, other.period, self.relative_accuracy,
+                    other.relative_accuracy))
+        for key, sketch in other._sketches.items():
+            self._sketch(key).merge(sketch)
+        return self
+
+    def select(self, metric_name, spec_name=None, filter_name=None,
+               period=None, datum=None):
+        """Merge the sketches of a metric.
+
+        Parameters
+        ----------
+        metric_name : `str`
+            Name of the `Metric`.
+        spec_name : `str`, optional
+            Only merge sketches of this specification level.
+        filter_name : `str`, optional
+            Only merge sketches of this optical filter.
+        period : `str`, optional
+            Only merge sketches of this period.
+        datum : `str`, optional
+            Merge the sketches of this blob datum (``'<blob name>.<datum
+            name>'``), rather than of the measurement values.
+
+        Returns
+        -------
+        sketch : `MetricSketch`
+            Merged sketch (without values if no sketch matches).
+        """
+        merged = MetricSketch(relative_accuracy=self.relative_accuracy)
+        for key, sketch in self._sketches.items():
+            if key.metric_name == metric_name and key.datum == datum and \
+                    (spec_name is None or key.spec_name == spec_name) and \
+                    (filter_name is None or key.filter_name == filter_name) \
+                    and (period is None or key.period == period):
+                merged.merge(sketch)
+        return merged
+
+    @property
+    def json(self):
+        """`dict` that can be serialized as JSON."""
+        return {'period': self.period,
+                'relative_accuracy': self.relative_accuracy,
+                'sketches': [dict(key._asdict(), sketch=sketch.json)
+                             for key, sketch in self._sketches.items()]}
+
+    @classmethod
+    def from_json(cls, json_data):
+        """Construct a collection from a JSON document.
+
+        Parameters
+        ----------
+        json_data : `dict`
+            Collection JSON object (as produced by `json`).
+
+        Returns
+        -------
+        collection : `SketchCollection`
+            Collection from JSON.
+        """
+        collection = cls(json_data['period'], json_data['relative_accuracy'])
+        for doc in json_data['sketches']:
+            key = SketchKey(*[doc[field] for field in SketchKey._fields])
+            collection._sketches[key] = MetricSketch.from_json(doc['sketch'])
+        return collection
+
+    @classmethod
+    def read_json(cls, filepath, compression='infer'):
+        """Read a collection from a JSON file (see `write_json`).
+
+        Parameters
+        ----------
+        filepath : `str`
+            Path of the JSON file.
+        compression : `str`, optional
+            Compression codec of the file (see `Job.read_json`).
+
+        Returns
+        -------
+        collection : `SketchCollection`
+            Collection from the file.
+        """
+        return cls.from_json(read_json(filepath, compression=compression))
+
+
+def _sketch_job_file(filepath, run_time, period, relative_accuracy,
+                     blob_datums):
+    """Build the `SketchCollection` of a `Job` JSON file."""
+    collection = SketchCollection(period, relative_accuracy)
+    collection.add_job_json(read_json(filepath), run_time=run_time,
+                            blob_datums=blob_datums)
+    return collection
+
+
+def build_sketches(source, period='month', relative_accuracy=0.01,
+                   blob_datums=False, max_workers=None, use_processes=False,
+                   run_times=None):
+    """Build the `SketchCollection` of many jobs.
+
+    Each job is summarized separately, and the summaries are merged as they
+    are built, so memory use does not grow with the number of jobs.
+
+    Parameters
+    ----------
+    source : `JobStore` or iterable of `str`
+        Either a `JobStore`, or paths of `Job` JSON files. Compressed files
+        are decompressed according to their extension (see
+        `Job.read_json`).
+    period : `str`, optional
+        Time period of sketches (see `SketchCollection`). Run times are the
+        run times of stored jobs, or those given in ``run_times`` for JSON
+        files.
+    relative_accuracy : `float`, optional
+        Relative accuracy of the quantiles of sketches.
+    blob_datums : `bool`, optional
+        Also summarize the numeric array datums of the blobs linked to each
+        measurement.
+    max_workers : `int`, optional
+        Number of workers that summarize JSON files concurrently. Ignored
+        when ``source`` is a `JobStore`.
+    use_processes : `bool`, optional
+        Summarize JSON files in a process pool rather than a thread pool.
+        Processes parallelize JSON decoding, which is CPU-bound; only the
+        compact collections are transferred between processes.
+    run_times : `dict`, optional
+        Run times (`datetime.datetime` or ISO 8601 `str`) of JSON files,
+        keyed by path. `Job` JSON documents don't record when jobs ran, so
+        measurements of files without a run time are sketched without a
+        period. Ignored when ``source`` is a `JobStore`.
+
+    Returns
+    -------
+    collection : `SketchCollection`
+        Sketches of all jobs.
+    """
+    collection = SketchCollection(period, relative_accuracy)
+    if isinstance(source, JobStore):
+        if blob_datums:
+            for job_id in source.job_ids:
+                collection.add_job_json(source.get_job_json(job_id),
+                                        run_time=source.get_run_time(job_id),
+                                        blob_datums=True)
+        else:
+            rows = (row[1:] for row in source.iter_values())
+            while True:
+                chunk = list(itertools.islice(rows, ROWS_PER_CHUNK))
+                if not chunk:
+                    break
+                collection._add_rows(chunk)
+        return collection
+
+    paths = list(source)
+    run_times = run_times or {}
+    pool_class = ProcessPoolExecutor if use_processes else ThreadPoolExecutor
+    with pool_class(max_workers=max_workers) as pool:
+        for job_collection in pool.map(_sketch_job_file, paths,
+                                       [run_times.get(path)
+                                        for path in paths],
+                                       [period] * len(paths),
+                                       [relative_accuracy] * len(paths),
+                                       [blob_datums] * len(paths)):
+            collection.merge(job_collection)
+    return collection
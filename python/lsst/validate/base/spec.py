@@ -1,15 +1,19 @@
 # See COPYRIGHT file at the top of the source tree.
 from __future__ import print_function, division
 
-import astropy.units as u
-
 from .jsonmixin import JsonSerializationMixin
-from .datum import Datum, QuantityAttributeMixin
+from .datum import Datum, QuantityAttributeMixin, _parse_unit
+from .lazy import lazy_import
+from .profiling import profiled, class_type, instance_type, json_data_size, \
+    result_size
 
 
 __all__ = ['Specification']
 
 
+u = lazy_import('astropy.units')
+
+
 class Specification(QuantityAttributeMixin, JsonSerializationMixin):
     """A specification level, or threshold, associated with a `Metric`.
 
@@ -63,7 +67,7 @@ class Specification(QuantityAttributeMixin, JsonSerializationMixin):
                  dependencies=None):
         self.name = name
         if unit is not None:
-            self.quantity = quantity * u.Unit(unit)
+            self.quantity = quantity * _parse_unit(unit)
         else:
             self.quantity = quantity
         self.filter_names = filter_names
@@ -74,11 +78,13 @@ class Specification(QuantityAttributeMixin, JsonSerializationMixin):
 
     def __getattr__(self, key):
         """Access dependencies with keys as attributes."""
-        if key in self.dependencies:
-            return self.dependencies[key]
-        else:
-            raise AttributeError("%r object has no attribute %r" %
-                                 (self.__class__, key))
+        # Only instance attributes are consulted, since they don't exist yet
+        # while unpickling.
+        dependencies = self.__dict__.get('dependencies')
+        if not key.startswith('_') and dependencies and key in dependencies:
+            return dependencies[key]
+        raise AttributeError("%r object has no attribute %r" %
+                             (self.__class__, key))
 
     @property
     def datum(self):
@@ -86,6 +92,7 @@ class Specification(QuantityAttributeMixin, JsonSerializationMixin):
         return Datum(self.quantity, label=self.name)
 
     @classmethod
+    @profiled('from_json', type_name=class_type, size=json_data_size)
     def from_json(cls, json_data):
         """Construct a Specification from a JSON document.
 
@@ -109,6 +116,7 @@ class Specification(QuantityAttributeMixin, JsonSerializationMixin):
         return s
 
     @property
+    @profiled('json', type_name=instance_type, size=result_size)
     def json(self):
         """`dict` that can be serialized as semantic JSON, compatible with
         the SQUASH metric service.
@@ -0,0 +1,464 @@
+# See COPYRIGHT file at the top of the source tree.
+"""Upload jobs to the SQUASH service, and a local stand-in for SQUASH.
+
+Jobs are uploaded in batches with the following protocol. All request and
+response bodies are JSON; request bodies may be gzip-compressed (indicated by
+a ``Content-Encoding: gzip`` header).
+
+1. ``POST {url}/jobs`` with ``{"measurement_count": int, "blob_count": int}``
+   creates a job and responds with ``{"job_id": str}``.
+2. ``POST {url}/jobs/{job_id}/measurements`` and
+   ``POST {url}/jobs/{job_id}/blobs`` add a JSON array of measurement or blob
+   documents (as found in `Job.json`). Objects are keyed by their
+   ``identifier`` so that retried batches are idempotent.
+
+Creating a job is not idempotent: if its response is lost, the service may
+have created the job anyway, so it is only retried when the request was not
+sent or failed with a transient status.
+3. ``POST {url}/jobs/{job_id}/complete`` finalizes the job once all batches
+   are stored.
+"""
+from __future__ import print_function, division
+
+import gzip
+import json
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import http.client as httplib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from queue import LifoQueue, Empty
+from urllib.parse import urlsplit
+
+from .errors import SquashUploadError
+from .job import Job
+
+
+__all__ = ['SquashUploader', 'LocalSquashServer']
+
+
+_RETRY_STATUSES = (429, 500, 502, 503, 504)
+"""HTTP status codes of failed requests that are retried."""
+
+
+class _ConnectionPool(object):
+    """A bounded pool of persistent HTTP connections to a single host."""
+
+    def __init__(self, url, max_connections, timeout):
+        parts = urlsplit(url)
+        if parts.scheme == 'https':
+            self._connection_class = httplib.HTTPSConnection
+        elif parts.scheme == 'http':
+            self._connection_class = httplib.HTTPConnection
+        else:
+            raise ValueError('Unsupported URL scheme in {0!r}'.format(url))
+        self.host = parts.hostname
+        self.port = parts.port
+        self.path_prefix = parts.path.rstrip('/')
+        self.timeout = timeout
+        self._idle = LifoQueue()
+        self._slots = threading.BoundedSemaphore(max_connections)
+
+    def acquire(self, fresh=False):
+        """Get an idle connection, or open a new one.
+
+        With ``fresh``, an idle connection is closed first, so that the
+        connection is not one that the server may already have closed.
+        """
+        self._slots.acquire()
+        try:
+            conn = self._idle.get_nowait()
+        except Empty:
+            return self._connection_class(self.host, self.port,
+                                          timeout=self.timeout)
+        if fresh:
+            # Closed connections reconnect on their next request
+            conn.close()
+        return conn
+
+    def release(self, conn, reuse=True):
+        """Return a connection to the pool, or close it if it can't be
+        reused.
+        """
+        if reuse:
+            self._idle.put(conn)
+        else:
+            conn.close()
+        self._slots.release()
+
+    def close(self):
+        """Close all idle connections."""
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except Empty:
+                break
+
+
+class SquashUploader(object):
+    """Upload jobs to a SQUASH service in batches, over pooled persistent
+    connections.
+
+    Large jobs are split into batches of measurements and blobs that are
+    posted concurrently (see the module documentation for the protocol).
+    Request bodies are gzip-compressed, and requests that fail with a
+    connection error or a transient HTTP status (429 and 5xx) are retried with
+    exponential backoff. Job creation is not retried if the connection fails
+    after the request was sent, since the job may have been created.
+
+    Parameters
+    ----------
+    url : `str`
+        Base URL of the SQUASH API (e.g., ``'https://squash.lsst.codes/api'``).
+    max_connections : `int`, optional
+        Maximum number of concurrent persistent connections, and therefore of
+        batches posted concurrently.
+    batch_size : `int`, optional
+        Maximum number of measurement or blob documents per batch.
+    max_batch_bytes : `int`, optional
+        Approximate maximum size of an uncompressed batch, in bytes. A single
+        document larger than this is posted in a batch of its own.
+    compress : `bool`, optional
+        Compress request bodies with gzip.
+    compress_level : `int`, optional
+        gzip compression level (1--9).
+    max_retries : `int`, optional
+        Number of times a failed request is retried (at least 0).
+    backoff_factor : `float`, optional
+        Retry ``n`` (starting at 0) sleeps ``backoff_factor * 2 ** n``
+        seconds.
+    timeout : `float`, optional
+        Socket timeout of each connection, in seconds.
+    headers : `dict`, optional
+        Additional HTTP headers, such as authorization, sent with every
+        request.
+
+    Raises
+    ------
+    ValueError
+        Raised if ``max_retries`` is negative.
+    """
+
+    def __init__(self, url, max_connections=4, batch_size=100,
+                 max_batch_bytes=8 * 1024 * 1024, compress=True,
+                 compress_level=6, max_retries=5, backoff_factor=0.5,
+                 timeout=60., headers=None):
+        if max_retries < 0:
+            raise ValueError('max_retries must be at least 0, not '
+                             '{0!r}'.format(max_retries))
+        self.url = url
+        self.max_connections = max_connections
+        self.batch_size = batch_size
+        self.max_batch_bytes = max_batch_bytes
+        self.compress = compress
+        self.compress_level = compress_level
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.headers = dict(headers) if headers else {}
+        self._pool = _ConnectionPool(url, max_connections, timeout)
+
+    def close(self):
+        """Close all pooled connections."""
+        self._pool.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def upload(self, job):
+        """Upload a job.
+
+        Parameters
+        ----------
+        job : `Job` or `dict`
+            A `Job`, or a `Job` JSON document (as produced by `Job.json`).
+
+        Returns
+        -------
+        job_id : `str`
+            Identifier of the job assigned by the SQUASH service.
+
+        Raises
+        ------
+        lsst.validate.base.SquashUploadError
+            Raised if a request fails after all retries, or fails with a
+            status that is not retried.
+        """
+        if isinstance(job, Job):
+            job = job.json
+        measurement_batches = list(self._make_batches(job['measurements']))
+        blob_batches = list(self._make_batches(job['blobs']))
+
+        response = self._post('/jobs', self._encode_json({
+            'measurement_count': len(job['measurements']),
+            'blob_count': len(job['blobs'])}), idempotent=False)
+        job_id = response['job_id']
+
+        requests = [('/jobs/{0}/measurements'.format(job_id), batch)
+                    for batch in measurement_batches]
+        requests += [('/jobs/{0}/blobs'.format(job_id), batch)
+                     for batch in blob_batches]
+        with ThreadPoolExecutor(max_workers=self.max_connections) as pool:
+            # list() re-raises the first failure of any batch
+            list(pool.map(lambda args: self._post(*args), requests))
+
+        self._post('/jobs/{0}/complete'.format(job_id), b'{}')
+        return job_id
+
+    def _make_batches(self, docs):
+        """Serialize documents into JSON array batches (`bytes`), each
+        limited by `batch_size` and `max_batch_bytes`.
+        """
+        batch = []
+        batch_bytes = 0
+        for doc in docs:
+            encoded = self._encode_json(doc)
+            if batch and (len(batch) >= self.batch_size or
+                          batch_bytes + len(encoded) > self.max_batch_bytes):
+                yield b'[' + b','.join(batch) + b']'
+                batch = []
+                batch_bytes = 0
+            batch.append(encoded)
+            batch_bytes += len(encoded) + 1
+        if batch:
+            yield b'[' + b','.join(batch) + b']'
+
+    @staticmethod
+    def _encode_json(doc):
+        return json.dumps(doc, separators=(',', ':')).encode('utf-8')
+
+    def _post(self, path, body, idempotent=True):
+        """POST a JSON body, retrying transient failures.
+
+        Requests that are not ``idempotent`` are sent over a new connection,
+        and are not retried if the connection fails after they are sent.
+
+        Returns
+        -------
+        response : obj
+            The decoded JSON response body, or `None` if it is empty.
+        """
+        headers = {'Content-Type': 'application/json',
+                   'Accept': 'application/json'}
+        headers.update(self.headers)
+        if self.compress:
+            body = gzip.compress(body, compresslevel=self.compress_level)
+            headers['Content-Encoding'] = 'gzip'
+
+        url = self._pool.path_prefix + path
+        for attempt in range(self.max_retries + 1):
+            if attempt > 0:
+                time.sleep(self.backoff_factor * 2 ** (attempt - 1))
+            conn = self._pool.acquire(fresh=not idempotent)
+            try:
+                if conn.sock is None:
+                    conn.connect()
+            except OSError as e:
+                # Nothing was sent, so any request can be retried
+                self._pool.release(conn, reuse=False)
+                error = SquashUploadError(
+                    'POST {0} failed: {1!r}'.format(url, e))
+                continue
+            try:
+                conn.request('POST', url, body, headers)
+                response = conn.getresponse()
+                data = response.read()
+            except (httplib.HTTPException, OSError) as e:
+                self._pool.release(conn, reuse=False)
+                error = SquashUploadError(
+                    'POST {0} failed: {1!r}'.format(url, e))
+                if not idempotent:
+                    # The server may have handled the request anyway
+                    raise error
+                continue
+            self._pool.release(conn, reuse=not response.will_close)
+
+            if response.status < 300:
+                return json.loads(data.decode('utf-8')) if data else None
+            error = SquashUploadError(
+                'POST {0} failed with status {1:d}: {2}'.format(
+                    url, response.status, data.decode('utf-8', 'replace')))
+            if response.status not in _RETRY_STATUSES:
+                raise error
+        raise error
+
+
+class _SquashRequestHandler(BaseHTTPRequestHandler):
+    """Request handler of `LocalSquashServer`."""
+
+    protocol_version = 'HTTP/1.1'
+
+    def setup(self):
+        BaseHTTPRequestHandler.setup(self)
+        self.server.squash._count_connection()
+
+    def log_message(self, format, *args):
+        pass
+
+    def _respond(self, status, doc=None):
+        body = json.dumps(doc).encode('utf-8') if doc is not None else b''
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        if self.headers.get('Content-Encoding') == 'gzip':
+            body = gzip.decompress(body)
+        status, doc = self.server.squash._handle(self.path, body)
+        if status is None:
+            self.close_connection = True
+            return
+        self._respond(status, doc)
+
+
+class LocalSquashServer(object):
+    """An in-process stand-in for the SQUASH service, for testing uploads
+    offline.
+
+    The server implements the upload protocol used by `SquashUploader` (see
+    the module documentation) and keeps uploaded jobs in memory. It can also
+    be told to fail requests so that retry handling can be exercised.
+
+    Parameters
+    ----------
+    host : `str`, optional
+        Interface to listen on.
+    port : `int`, optional
+        Port to listen on. By default a free port is chosen.
+
+    Examples
+    --------
+    >>> with LocalSquashServer() as server:  # doctest: +SKIP
+    ...     with SquashUploader(server.url) as uploader:
+    ...         job_id = uploader.upload(job)
+    ...     server.jobs[job_id]
+    """
+
+    def __init__(self, host='127.0.0.1', port=0):
+        self._httpd = ThreadingHTTPServer((host, port), _SquashRequestHandler)
+        self._httpd.daemon_threads = True
+        self._httpd.squash = self
+        self._thread = None
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._failures = []
+        self._drops = 0
+        self.jobs = {}
+        """`dict` of completed job JSON documents, keyed by job
+        identifier.
+        """
+        self.connection_count = 0
+        """Number of client connections accepted (`int`)."""
+        self.request_count = 0
+        """Number of requests handled, including failed ones (`int`)."""
+
+    @property
+    def url(self):
+        """Base URL of the server (`str`)."""
+        host, port = self._httpd.server_address[:2]
+        return 'http://{0}:{1:d}'.format(host, port)
+
+    def start(self):
+        """Serve requests in a background thread."""
+        self._thread = threading.Thread(target=self._httpd.serve_forever,
+                                        kwargs={'poll_interval': 0.05})
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self):
+        """Stop serving requests and close the listening socket."""
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        self._thread.join()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+    def fail_requests(self, count, status=503):
+        """Respond to the next ``count`` requests with an error.
+
+        Parameters
+        ----------
+        count : `int`
+            Number of requests to fail.
+        status : `int`, optional
+            HTTP status code of the failed responses.
+        """
+        with self._lock:
+            self._failures.extend([status] * count)
+
+    def drop_responses(self, count):
+        """Handle the next ``count`` requests, but close their connections
+        instead of responding, as if the responses were lost.
+
+        Parameters
+        ----------
+        count : `int`
+            Number of responses to drop.
+        """
+        with self._lock:
+            self._drops += count
+
+    def _count_connection(self):
+        with self._lock:
+            self.connection_count += 1
+
+    def _handle(self, path, body):
+        """Handle a POST request; returns the response status and JSON
+        document, or a `None` status if no response must be sent.
+        """
+        with self._lock:
+            self.request_count += 1
+            if self._failures:
+                return self._failures.pop(0), {'error': 'Injected failure'}
+            if self._drops:
+                self._drops -= 1
+                self._handle_request(path, body)
+                return None, None
+            return self._handle_request(path, body)
+
+    def _handle_request(self, path, body):
+        """Apply a POST request to the stored jobs; returns the response
+        status and JSON document. The caller holds the lock.
+        """
+        parts = path.strip('/').split('/')
+        if parts == ['jobs']:
+            counts = json.loads(body.decode('utf-8'))
+            job_id = uuid.uuid4().hex
+            self._pending[job_id] = {'counts': counts,
+                                     'measurements': {},
+                                     'blobs': {}}
+            return 201, {'job_id': job_id}
+
+        if len(parts) != 3 or parts[0] != 'jobs' or \
+                parts[1] not in self._pending:
+            return 404, {'error': 'Not found: {0}'.format(path)}
+        job_id, action = parts[1], parts[2]
+        pending = self._pending[job_id]
+
+        if action in ('measurements', 'blobs'):
+            for doc in json.loads(body.decode('utf-8')):
+                pending[action][doc['identifier']] = doc
+            return 201, {}
+        elif action == 'complete':
+            if len(pending['measurements']) != \
+                    pending['counts']['measurement_count'] or \
+                    len(pending['blobs']) != pending['counts']['blob_count']:
+                return 400, {'error': 'Job {0} is incomplete'.format(job_id)}
+            self.jobs[job_id] = {
+                'measurements': list(pending['measurements'].values()),
+                'blobs': list(pending['blobs'].values())}
+            del self._pending[job_id]
+            return 200, {'job_id': job_id}
+        return 404, {'error': 'Not found: {0}'.format(path)}
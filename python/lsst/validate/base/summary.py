@@ -0,0 +1,222 @@
+# See COPYRIGHT file at the top of the source tree.
+from __future__ import print_function, division
+
+from .errors import ValidateError
+from .jsonmixin import JsonSerializationMixin
+from .lazy import lazy_import
+
+
+__all__ = ['DatumSummary']
+
+
+np = lazy_import('numpy')
+u = lazy_import('astropy.units')
+
+
+DEFAULT_PERCENTILES = (1., 5., 25., 50., 75., 95., 99.)
+"""Percentiles of a `DatumSummary`, unless specified otherwise."""
+
+DEFAULT_BINS = 20
+"""Number of histogram bins of a `DatumSummary`, unless specified
+otherwise.
+"""
+
+
+def _to_json_float(x):
+    return None if x is None else float(x)
+
+
+class DatumSummary(JsonSerializationMixin):
+    """Summary statistics of the values of an array `Datum`.
+
+    Statistics only cover finite values (and, for masked quantities, values
+    that are not masked). Use `compute` to summarize an array.
+
+    Parameters
+    ----------
+    unit : `astropy.units.Unit`
+        Unit of the values.
+    count : `int`
+        Number of finite values.
+    n_nonfinite : `int`
+        Number of values that are ``NaN`` or infinite.
+    min, max, mean, std : `float` or `None`
+        Minimum, maximum, mean and standard deviation of the finite values,
+        in ``unit`` (`None` if there are none).
+    percentiles : sequence of `float`
+        Percentile ranks, between 0 and 100.
+    percentile_values : sequence of `float`
+        Values of the ``percentiles``, in ``unit``.
+    histogram_edges : sequence of `float`
+        Edges of the histogram bins, in ``unit``. Bins are closed on the
+        left, and the last bin is also closed on the right.
+    histogram_counts : sequence of `int`
+        Number of finite values in each histogram bin.
+    """
+
+    def __init__(self, unit, count, n_nonfinite, min, max, mean, std,
+                 percentiles, percentile_values, histogram_edges,
+                 histogram_counts):
+        self.unit = unit
+        self.count = count
+        self.n_nonfinite = n_nonfinite
+        self._min = min
+        self._max = max
+        self._mean = mean
+        self._std = std
+        self.percentiles = list(percentiles)
+        self._percentile_values = list(percentile_values)
+        self._histogram_edges = list(histogram_edges)
+        self.histogram_counts = np.asarray(histogram_counts, dtype=np.int64)
+
+    def _quantity(self, value):
+        if value is None:
+            return None
+        return u.Quantity(value, self.unit)
+
+    @property
+    def min(self):
+        """Minimum value (`astropy.units.Quantity` or `None`)."""
+        return self._quantity(self._min)
+
+    @property
+    def max(self):
+        """Maximum value (`astropy.units.Quantity` or `None`)."""
+        return self._quantity(self._max)
+
+    @property
+    def mean(self):
+        """Mean value (`astropy.units.Quantity` or `None`)."""
+        return self._quantity(self._mean)
+
+    @property
+    def std(self):
+        """Standard deviation (`astropy.units.Quantity` or `None`)."""
+        return self._quantity(self._std)
+
+    @property
+    def histogram_edges(self):
+        """Edges of the histogram bins (`astropy.units.Quantity`)."""
+        return u.Quantity(np.array(self._histogram_edges, dtype=float),
+                          self.unit)
+
+    def percentile(self, rank):
+        """Value of a percentile.
+
+        Parameters
+        ----------
+        rank : `float`
+            Percentile rank, which must be one of `percentiles`.
+
+        Returns
+        -------
+        value : `astropy.units.Quantity` or `None`
+            Value of the percentile, or `None` if there are no finite values.
+
+        Raises
+        ------
+        lsst.validate.base.ValidateError
+            Raised if the percentile was not computed.
+        """
+        try:
+            i = self.percentiles.index(float(rank))
+        except ValueError:
+            raise ValidateError(
+                'Percentile {0!r} was not computed; available percentiles '
+                'are {1!r}'.format(rank, self.percentiles))
+        return self._quantity(self._percentile_values[i])
+
+    @classmethod
+    def compute(cls, quantity, percentiles=DEFAULT_PERCENTILES,
+                bins=DEFAULT_BINS):
+        """Summarize an array quantity.
+
+        The finite values are sorted once; the extrema, percentiles and
+        histogram are then read from the sorted array with vectorized
+        operations.
+
+        Parameters
+        ----------
+        quantity : `astropy.units.Quantity`
+            Array of values, of any shape. Masked values of a masked quantity
+            are ignored.
+        percentiles : sequence of `float`, optional
+            Percentile ranks to compute, between 0 and 100.
+        bins : `int`, optional
+            Number of histogram bins, which evenly span the range of the
+            finite values.
+
+        Returns
+        -------
+        summary : `DatumSummary`
+            Summary of the values.
+        """
+        if hasattr(quantity, 'unmasked'):
+            values = quantity.unmasked.value[~quantity.mask]
+        else:
+            values = np.ravel(quantity.value)
+        finite = np.isfinite(values)
+        n_nonfinite = int(len(values) - np.count_nonzero(finite))
+        values = np.sort(values[finite].astype(float, copy=False))
+        count = len(values)
+        percentiles = [float(p) for p in percentiles]
+
+        if count == 0:
+            return cls(quantity.unit, 0, n_nonfinite, None, None, None, None,
+                       percentiles, [None] * len(percentiles), [], [])
+
+        # Linear interpolation between closest ranks, as numpy.percentile
+        positions = np.array(percentiles) / 100. * (count - 1)
+        lower = np.floor(positions).astype(int)
+        upper = np.minimum(lower + 1, count - 1)
+        fraction = positions - lower
+        percentile_values = values[lower] * (1. - fraction) + \
+            values[upper] * fraction
+
+        edges = np.linspace(values[0], values[-1], bins + 1)
+        cumulative = np.searchsorted(values, edges, side='left')
+        cumulative[-1] = count
+        counts = np.diff(cumulative)
+
+        return cls(quantity.unit, count, n_nonfinite, values[0], values[-1],
+                   values.mean(), values.std(), percentiles,
+                   percentile_values, edges, counts)
+
+    @property
+    def json(self):
+        """`dict` that can be serialized as JSON."""
+        return {
+            'unit': str(self.unit),
+            'count': self.count,
+            'n_nonfinite': self.n_nonfinite,
+            'min': _to_json_float(self._min),
+            'max': _to_json_float(self._max),
+            'mean': _to_json_float(self._mean),
+            'std': _to_json_float(self._std),
+            'percentiles': self.percentiles,
+            'percentile_values': [_to_json_float(v)
+                                  for v in self._percentile_values],
+            'histogram': {
+                'edges': [float(e) for e in self._histogram_edges],
+                'counts': self.histogram_counts.tolist()}}
+
+    @classmethod
+    def from_json(cls, json_data):
+        """Construct a summary from a JSON document.
+
+        Parameters
+        ----------
+        json_data : `dict`
+            Summary JSON object (as produced by `json`).
+
+        Returns
+        -------
+        summary : `DatumSummary`
+            Summary from JSON.
+        """
+        return cls(u.Unit(json_data['unit']), json_data['count'],
+                   json_data['n_nonfinite'], json_data['min'],
+                   json_data['max'], json_data['mean'], json_data['std'],
+                   json_data['percentiles'], json_data['percentile_values'],
+                   json_data['histogram']['edges'],
+                   json_data['histogram']['counts'])
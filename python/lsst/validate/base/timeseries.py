@@ -0,0 +1,214 @@
+# See COPYRIGHT file at the top of the source tree.
+from __future__ import print_function, division
+
+import datetime
+import os
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+from .compression import read_json
+from .jobstore import JobStore
+from .lazy import lazy_import
+
+
+__all__ = ['MetricSeries', 'extract_metric_series']
+
+
+np = lazy_import('numpy')
+u = lazy_import('astropy.units')
+
+
+class MetricSeries(object):
+    """Values of a metric measured across many jobs, stored as columnar
+    arrays.
+
+    All arrays share the same length and ordering; element ``i`` of each
+    array describes the same measurement.
+
+    Parameters
+    ----------
+    metric_name : `str`
+        Name of the `Metric`.
+    job_ids : `numpy.ndarray`
+        Identifiers of the jobs that contain each measurement.
+    run_times : `numpy.ndarray`
+        Run times of the jobs (``datetime64[us]``; ``NaT`` if unknown).
+    spec_names : `numpy.ndarray`
+        Specification level names of each measurement (`None` if the
+        measurement is not specification-dependent).
+    filter_names : `numpy.ndarray`
+        Optical filter names of each measurement (`None` if the measurement
+        is not filter-dependent).
+    quantity : `astropy.units.Quantity`
+        Measurement values, all in the same unit. Values that are not numeric
+        (including `None`) are ``NaN``.
+    """
+
+    def __init__(self, metric_name, job_ids, run_times, spec_names,
+                 filter_names, quantity):
+        self.metric_name = metric_name
+        self.job_ids = job_ids
+        self.run_times = run_times
+        self.spec_names = spec_names
+        self.filter_names = filter_names
+        self.quantity = quantity
+
+    def __len__(self):
+        return len(self.job_ids)
+
+    @property
+    def values(self):
+        """Measurement values without units (`numpy.ndarray`)."""
+        return self.quantity.value
+
+    @property
+    def unit(self):
+        """Common `astropy.units.Unit` of the measurement values."""
+        return self.quantity.unit
+
+    @classmethod
+    def from_rows(cls, metric_name, rows, unit=None):
+        """Build a series from measurement rows.
+
+        Parameters
+        ----------
+        metric_name : `str`
+            Name of the `Metric`.
+        rows : iterable
+            ``(job_id, run_time, metric_name, spec_name, filter_name, value,
+            unit)`` tuples, as returned by `JobStore.query_values`.
+            ``run_time`` is an ISO 8601 `str`, a `datetime.datetime`, or
+            `None`.
+        unit : `str` or `astropy.units.Unit`, optional
+            Unit to convert all values into. By default the unit of the first
+            row with a numeric value is used.
+
+        Returns
+        -------
+        series : `MetricSeries`
+            The series.
+
+        Notes
+        -----
+        Rows whose value is missing or not numeric (`None`, `str` or `bool`
+        values) have a NaN value, whatever their unit.
+
+        Raises
+        ------
+        astropy.units.UnitConversionError
+            Raised if the unit of a row with a numeric value cannot be
+            converted into ``unit``.
+        """
+        rows = list(rows)
+        n = len(rows)
+        job_ids = np.empty(n, dtype=object)
+        spec_names = np.empty(n, dtype=object)
+        filter_names = np.empty(n, dtype=object)
+        run_times = np.empty(n, dtype='datetime64[us]')
+        values = np.empty(n, dtype=float)
+        unit_strs = np.empty(n, dtype=object)
+        for i, (job_id, run_time, _, spec_name, filter_name, value,
+                unit_str) in enumerate(rows):
+            job_ids[i] = job_id
+            spec_names[i] = spec_name
+            filter_names[i] = filter_name
+            run_times[i] = run_time if run_time is not None else 'NaT'
+            if isinstance(value, bool) or \
+                    not isinstance(value, (int, float)):
+                # The units of missing values are never converted
+                values[i] = np.nan
+                unit_strs[i] = None
+            else:
+                values[i] = value
+                unit_strs[i] = unit_str
+
+        if unit is None:
+            unit_str = next((s for s in unit_strs if s is not None), None)
+            unit = u.Unit(unit_str) if unit_str is not None else \
+                u.dimensionless_unscaled
+        else:
+            unit = u.Unit(unit)
+
+        # Convert each distinct unit only once, then scale vectorially
+        for unit_str in set(unit_strs) - {None}:
+            factor = u.Unit(unit_str).to(unit)
+            if factor != 1.:
+                values[unit_strs == unit_str] *= factor
+
+        return cls(metric_name, job_ids, run_times, spec_names, filter_names,
+                   u.Quantity(values, unit, copy=False))
+
+
+def _read_measurement_rows(filepath, metric_name, spec_name, filter_name):
+    """Read the rows of matching measurements from a `Job` JSON file.
+
+    Only the measurement fields needed for a `MetricSeries` are retained;
+    no `Metric`, `Datum` or blob objects are built. A `None` ``metric_name``
+    matches all metrics.
+    """
+    job_doc = read_json(filepath)
+    run_time = datetime.datetime.utcfromtimestamp(os.path.getmtime(filepath))
+    rows = []
+    for doc in job_doc['measurements']:
+        if metric_name is not None and doc['metric']['name'] != metric_name:
+            continue
+        if spec_name is not None and doc['spec_name'] != spec_name:
+            continue
+        if filter_name is not None and doc['filter_name'] != filter_name:
+            continue
+        rows.append((filepath, run_time, doc['metric']['name'],
+                     doc['spec_name'],
+                     doc['filter_name'], doc['value'], doc['unit']))
+    return rows
+
+
+def extract_metric_series(source, metric_name, spec_name=None,
+                          filter_name=None, unit=None, max_workers=None,
+                          use_processes=False):
+    """Extract the values of a metric across many jobs as columnar arrays.
+
+    Parameters
+    ----------
+    source : `JobStore` or iterable of `str`
+        Either a `JobStore`, or paths of `Job` JSON files. Compressed files
+        are decompressed according to their extension (see
+        `Job.read_json`).
+    metric_name : `str`
+        Name of the `Metric`.
+    spec_name : `str`, optional
+        Only include measurements of this specification level.
+    filter_name : `str`, optional
+        Only include measurements of this optical filter.
+    unit : `str` or `astropy.units.Unit`, optional
+        Unit to convert all values into. By default the unit of the first
+        measurement is used.
+    max_workers : `int`, optional
+        Number of workers that read JSON files concurrently. Ignored when
+        ``source`` is a `JobStore`.
+    use_processes : `bool`, optional
+        Read JSON files in a process pool rather than a thread pool. Processes
+        parallelize JSON decoding, which is CPU-bound, at the cost of
+        transferring rows between processes.
+
+    Returns
+    -------
+    series : `MetricSeries`
+        Values of the metric. When reading files, job identifiers are the file
+        paths, run times are the files' modification times and the series
+        follows the order of ``source``. When reading a `JobStore` the series
+        is ordered by run time.
+    """
+    if isinstance(source, JobStore):
+        rows = source.query_values(metric_name=metric_name,
+                                   spec_name=spec_name,
+                                   filter_name=filter_name)
+        return MetricSeries.from_rows(metric_name, rows, unit=unit)
+
+    paths = list(source)
+    pool_class = ProcessPoolExecutor if use_processes else ThreadPoolExecutor
+    with pool_class(max_workers=max_workers) as pool:
+        results = pool.map(_read_measurement_rows, paths,
+                           [metric_name] * len(paths),
+                           [spec_name] * len(paths),
+                           [filter_name] * len(paths))
+        rows = [row for file_rows in results for row in file_rows]
+    return MetricSeries.from_rows(metric_name, rows, unit=unit)
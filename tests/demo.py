@@ -0,0 +1,44 @@
+# See COPYRIGHT file at the top of the source tree.
+"""Example blobs and measurements shared by the test modules."""
+from __future__ import print_function
+
+import astropy.units as u
+
+from lsst.validate.base import BlobBase, MeasurementBase, Metric
+
+
+class DemoBlob(BlobBase):
+    """Example Blob class, with a ``mag`` datum."""
+
+    name = 'demo'
+
+    def __init__(self, mags=None):
+        BlobBase.__init__(self)
+        if mags is None:
+            mags = [1., 2., 3.] * u.mag
+        self.register_datum('mag', quantity=mags, description='Magnitudes')
+
+
+class ContentAddressedBlob(DemoBlob):
+    """Example content-addressed Blob class."""
+
+    content_addressed = True
+
+
+class DemoMeasurement(MeasurementBase):
+    """Example measurement class, linked to an optional ``ablob``.
+
+    The measured metric is a ``'Test'`` metric, unless ``name`` or ``metric``
+    is given.
+    """
+
+    def __init__(self, value=5. * u.mag, name='Test', filter_name=None,
+                 blob=None, metric=None):
+        MeasurementBase.__init__(self)
+        if metric is None:
+            metric = Metric(name, 'Test metric', '<')
+        self.metric = metric
+        self.quantity = value
+        self.filter_name = filter_name
+        if blob is not None:
+            self.ablob = blob
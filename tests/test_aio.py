@@ -0,0 +1,87 @@
+#!/usr/bin/env python
+# See COPYRIGHT file at the top of the source tree.
+from __future__ import print_function
+
+import asyncio
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from concurrent.futures import ProcessPoolExecutor
+
+import astropy.units as u
+
+from lsst.validate.base import (Job, LocalSquashServer, SquashUploader,
+                                write_job_json_async, read_job_json_async,
+                                upload_job_async)
+
+from demo import DemoMeasurement
+
+
+class AsyncJobIOTestCase(unittest.TestCase):
+    """Test the asyncio job API."""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.jobs = [Job(measurements=[DemoMeasurement(float(i) * u.mag)])
+                     for i in range(5)]
+        self.paths = [os.path.join(self.tmp_dir, 'job{0:d}.json'.format(i))
+                      for i in range(5)]
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_write_matches_write_json(self):
+        asyncio.run(write_job_json_async(self.jobs[0], self.paths[0]))
+        sync_path = os.path.join(self.tmp_dir, 'sync.json')
+        self.jobs[0].write_json(sync_path)
+        with open(self.paths[0]) as f1, open(sync_path) as f2:
+            self.assertEqual(json.load(f1), json.load(f2))
+
+    def test_concurrent_roundtrip(self):
+        async def roundtrip(executor):
+            await asyncio.gather(*[write_job_json_async(job, path, executor)
+                                   for job, path in zip(self.jobs,
+                                                        self.paths)])
+            return await asyncio.gather(*[read_job_json_async(path, executor)
+                                          for path in self.paths])
+
+        with ProcessPoolExecutor(max_workers=2) as executor:
+            jobs = asyncio.run(roundtrip(executor))
+        for i, job in enumerate(jobs):
+            self.assertEqual(job.get_measurement('Test').quantity,
+                             float(i) * u.mag)
+
+    def test_compressed_roundtrip(self):
+        path = os.path.join(self.tmp_dir, 'job.json.xz')
+        asyncio.run(write_job_json_async(self.jobs[1], path, compact=True))
+        with open(path, 'rb') as f:
+            self.assertTrue(f.read().startswith(b'\xfd7zXZ'))
+        job = asyncio.run(read_job_json_async(path))
+        self.assertEqual(job.json, self.jobs[1].json)
+
+    def test_unknown_compression(self):
+        with self.assertRaises(ValueError):
+            self.jobs[0].write_json(self.paths[0], compression='zip')
+        with self.assertRaises(ValueError):
+            asyncio.run(write_job_json_async(self.jobs[0], self.paths[0],
+                                             compression='zip'))
+        self.assertFalse(os.path.exists(self.paths[0]))
+        self.jobs[0].write_json(self.paths[0])
+        with self.assertRaises(ValueError):
+            asyncio.run(read_job_json_async(self.paths[0], compression='zip'))
+
+    def test_concurrent_upload(self):
+        async def upload_all(uploader):
+            return await asyncio.gather(*[upload_job_async(uploader, job)
+                                          for job in self.jobs])
+
+        with LocalSquashServer() as server:
+            with SquashUploader(server.url, max_connections=2) as uploader:
+                job_ids = asyncio.run(upload_all(uploader))
+            self.assertEqual(set(job_ids), set(server.jobs))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -71,6 +71,48 @@ class BlobBaseTestCase(unittest.TestCase):
             self.assertEqual(datum.label, datum2.label)
             self.assertEqual(datum.description, datum2.description)
 
+    def test_content_hash(self):
+        b1 = DemoBlob()
+        b2 = DemoBlob()
+        self.assertNotEqual(b1.identifier, b2.identifier)
+        self.assertEqual(b1.content_hash, b2.content_hash)
+
+        b1.content_addressed = True
+        b2.content_addressed = True
+        self.assertEqual(b1.identifier, b2.identifier)
+        self.assertEqual(len(b1.identifier), 32)
+
+        # hash follows values, units and labels
+        b2.mag = 5 * u.mmag
+        self.assertNotEqual(b1.identifier, b2.identifier)
+        b2.mag = 5 * u.mag
+        self.assertEqual(b1.identifier, b2.identifier)
+        b2.datums['mag'].label = 'magnitude'
+        self.assertNotEqual(b1.identifier, b2.identifier)
+
+    def test_content_hash_cache(self):
+        b = DemoBlob()
+        b.mag = [1, 2, 3] * u.mag
+        h = b.content_hash
+        self.assertIs(b.content_hash, h)
+        b.mag = [1, 2, 4] * u.mag
+        self.assertNotEqual(b.content_hash, h)
+        h = b.content_hash
+        b.register_datum('flux', quantity=[1.] * u.Jy)
+        self.assertNotEqual(b.content_hash, h)
+        h = b.content_hash
+        b.datums['flux'].label = 'Flux'
+        self.assertNotEqual(b.content_hash, h)
+
+    def test_content_hash_arrays(self):
+        b1 = DemoBlob()
+        b2 = DemoBlob()
+        b1.mag = [1, 2, 3] * u.mag
+        b2.mag = [1, 2, 3] * u.mag
+        self.assertEqual(b1.content_hash, b2.content_hash)
+        b2.mag = [1, 2, 4] * u.mag
+        self.assertNotEqual(b1.content_hash, b2.content_hash)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,116 @@
+#!/usr/bin/env python
+# See COPYRIGHT file at the top of the source tree.
+from __future__ import print_function
+
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+import astropy.units as u
+
+from lsst.validate.base import (Job, BlobStore, BlobStoreMissingError,
+                                ValidateError)
+from lsst.validate.base.blob import DeserializedBlob
+
+from demo import DemoBlob, DemoMeasurement
+
+
+class BlobStoreTestCase(unittest.TestCase):
+    """Test BlobStore and by-reference blob loading."""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.store = BlobStore(os.path.join(self.tmp_dir, 'blobs'))
+        self.meas = DemoMeasurement(blob=DemoBlob())
+        self.job = Job(measurements=[self.meas], blob_store=self.store)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_put_get(self):
+        blob = DemoBlob()
+        self.assertNotIn(blob.identifier, self.store)
+        self.store.put(blob)
+        self.assertIn(blob.identifier, self.store)
+        blob2 = self.store.get(blob.identifier)
+        self.assertEqual(blob2.identifier, blob.identifier)
+        self.assertEqual(list(blob2.mag), list(blob.mag))
+
+        with self.assertRaises(ValidateError):
+            self.store.get('missing')
+
+    def test_job_json_references(self):
+        blob_doc = self.job.reference_json['blobs'][0]
+        self.assertEqual(blob_doc, {'identifier': self.meas.ablob.identifier,
+                                    'name': 'demo'})
+        # Job.json keeps blob data inline, since the blobs may not be in the
+        # store
+        self.assertIn('data', self.job.json['blobs'][0])
+        self.assertNotIn(self.meas.ablob.identifier, self.store)
+
+    def test_write_json(self):
+        path = os.path.join(self.tmp_dir, 'job.json')
+        self.job.write_json(path)
+        self.assertIn(self.meas.ablob.identifier, self.store)
+        with open(path) as f:
+            job_doc = json.load(f)
+        self.assertNotIn('data', job_doc['blobs'][0])
+
+        job2 = Job.from_json(job_doc, blob_store=self.store)
+        self.assertIs(job2.blob_store, self.store)
+        m2 = job2.get_measurement('Test')
+        blob = m2.ablob
+        self.assertFalse(blob.is_loaded)
+        # Attribute access loads the datums from the store
+        self.assertEqual(list(blob.mag), list(self.meas.ablob.mag))
+        self.assertTrue(blob.is_loaded)
+        self.assertEqual(blob.datums['mag'].description, 'Magnitudes')
+
+    def test_lazy_blob_without_store(self):
+        blob = DeserializedBlob.from_json({'identifier': 'abc',
+                                           'name': 'demo'})
+        self.assertEqual(blob.identifier, 'abc')
+        with self.assertRaises(BlobStoreMissingError):
+            blob.mag
+        with self.assertRaises(BlobStoreMissingError):
+            blob.datums
+        # Datums are missing attributes, rather than errors, for hasattr and
+        # getattr with a default
+        self.assertFalse(hasattr(blob, 'mag'))
+        self.assertIsNone(getattr(blob, 'mag', None))
+
+    def test_rewrite_job_from_store(self):
+        path = os.path.join(self.tmp_dir, 'job.json')
+        self.job.write_json(path)
+        blob_path = self.store._path(self.meas.ablob.identifier)
+        os.utime(blob_path, (0., 0.))
+
+        job2 = Job.read_json(path, blob_store=self.store)
+        job2.write_json(os.path.join(self.tmp_dir, 'job2.json'))
+        blob = job2.get_measurement('Test').ablob
+        # The blob is neither read nor rewritten
+        self.assertFalse(blob.is_loaded)
+        self.assertEqual(os.path.getmtime(blob_path), 0.)
+
+        # Loaded blobs may have changed, so they are rewritten
+        blob.mag = [4., 5., 6.] * u.mag
+        job2.write_blobs()
+        self.assertEqual(list(self.store.get(blob.identifier).mag),
+                         list(blob.mag))
+
+    def test_preview_not_stored(self):
+        doc = json.loads(json.dumps(self.job.preview_json(size=2)))
+        blob = Job.from_json(doc).get_measurement('Test').ablob
+        self.assertTrue(blob.is_preview)
+        with self.assertRaises(ValidateError):
+            self.store.put(blob)
+
+    def test_write_blobs_requires_store(self):
+        with self.assertRaises(ValidateError):
+            Job(measurements=[DemoMeasurement(blob=DemoBlob())]).write_blobs()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,77 @@
+#!/usr/bin/env python
+# See COPYRIGHT file at the top of the source tree.
+from __future__ import print_function
+
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+import astropy.units as u
+
+from lsst.validate.base import Job
+from lsst.validate.base.compression import (infer_compression, read_json,
+                                            encode_json)
+
+from demo import DemoBlob, DemoMeasurement
+
+
+class CompressionTestCase(unittest.TestCase):
+    """Test compression-aware Job I/O."""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.job = Job(measurements=[
+            DemoMeasurement(blob=DemoBlob(list(range(100)) * u.mag))
+            for _ in range(2)])
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_infer_compression(self):
+        self.assertEqual(infer_compression('job.json.gz'), 'gzip')
+        self.assertEqual(infer_compression('job.json.bz2'), 'bz2')
+        self.assertEqual(infer_compression('job.json.xz'), 'lzma')
+        self.assertIsNone(infer_compression('job.json'))
+
+    def test_codecs(self):
+        magic = {'job.json.gz': b'\x1f\x8b',
+                 'job.json.bz2': b'BZh',
+                 'job.json.xz': b'\xfd7zXZ',
+                 'job.json': b'{'}
+        for name, prefix in magic.items():
+            path = os.path.join(self.tmp_dir, name)
+            self.job.write_json(path)
+            with open(path, 'rb') as f:
+                self.assertTrue(f.read().startswith(prefix), name)
+            self.assertEqual(Job.read_json(path).json, self.job.json)
+
+    def test_explicit_compression(self):
+        path = os.path.join(self.tmp_dir, 'job.dat')
+        self.job.write_json(path, compression='bz2', compact=True)
+        self.assertEqual(read_json(path, compression='bz2'), self.job.json)
+        with self.assertRaises(ValueError):
+            self.job.write_json(path, compression='zip')
+
+    def test_compact(self):
+        doc = self.job.json
+        compact = encode_json(doc, compact=True)
+        self.assertEqual(json.loads(compact), doc)
+        self.assertNotIn('\n', compact)
+        self.assertLess(len(compact), len(encode_json(doc)))
+
+        path = os.path.join(self.tmp_dir, 'job.json.gz')
+        self.job.write_json(path, compact=True)
+        self.assertEqual(read_json(path), doc)
+
+    def test_default_format_unchanged(self):
+        path = os.path.join(self.tmp_dir, 'job.json')
+        self.job.write_json(path)
+        with open(path) as f:
+            self.assertEqual(f.read(), json.dumps(self.job.json,
+                                                  sort_keys=True, indent=2))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,153 @@
+#!/usr/bin/env python
+# See COPYRIGHT file at the top of the source tree.
+from __future__ import print_function
+
+import os
+import shutil
+import struct
+import tempfile
+import threading
+import unittest
+
+import numpy as np
+import astropy.units as u
+
+from lsst.validate.base import (BlobStore, Job, JobContainer, ValidateError,
+                                write_job_container)
+from lsst.validate.base.container import MAGIC
+
+from demo import DemoBlob, DemoMeasurement
+
+
+def make_measurement(name, value, filter_name, blob):
+    m = DemoMeasurement(value, name=name, filter_name=filter_name, blob=blob)
+    m.register_parameter('threshold', quantity=3. * u.mag)
+    return m
+
+
+class JobContainerTestCase(unittest.TestCase):
+    """Test write_job_container and JobContainer."""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp_dir, 'job.vjc')
+        measurements = []
+        for i, filter_name in enumerate('gri'):
+            blob = DemoBlob(np.arange(10.) * i * u.mag)
+            measurements.append(make_measurement('PA1', i * u.mmag,
+                                                 filter_name, blob))
+            measurements.append(make_measurement('AM1', i * u.marcsec,
+                                                 filter_name, blob))
+        with measurements[0].instrument(trace_memory=False):
+            pass
+        self.job = Job(measurements=measurements)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_random_access(self):
+        for compression in (None, 'gzip'):
+            write_job_container(self.job, self.path, compression=compression)
+            with JobContainer(self.path) as container:
+                self.assertEqual(len(container), 6)
+                self.assertEqual(container.metric_names, ['PA1', 'AM1'])
+                self.assertEqual(len(container.blob_ids), 3)
+
+                measurements = container.find_measurements('PA1',
+                                                            filter_name='r')
+                self.assertEqual(len(measurements), 1)
+                m = measurements[0]
+                self.assertEqual(m.quantity, 1 * u.mmag)
+                self.assertEqual(m.filter_name, 'r')
+                self.assertEqual(m.threshold, 3. * u.mag)
+                # Blob data are only read on access
+                self.assertFalse(m.ablob.is_loaded)
+                np.testing.assert_array_equal(m.ablob.mag.value,
+                                              np.arange(10.))
+                self.assertTrue(m.ablob.is_loaded)
+
+                original = list(self.job.measurements)[0]
+                m = container.get_measurement(original.identifier)
+                self.assertEqual(m.metric.name, 'PA1')
+                self.assertIsNotNone(m.profile)
+
+                blob = container.get_blob(original.ablob.identifier)
+                self.assertEqual(blob.name, 'demo')
+                with self.assertRaises(KeyError):
+                    container.get_measurement('unknown')
+
+    def test_read_job(self):
+        write_job_container(self.job, self.path, compression='lzma')
+        with JobContainer(self.path) as container:
+            job = container.read_job()
+        self.assertEqual(job.json, self.job.json)
+
+    def test_blob_store(self):
+        store = BlobStore(os.path.join(self.tmp_dir, 'blobs'))
+        self.job.blob_store = store
+        write_job_container(self.job, self.path)
+        with JobContainer(self.path, blob_store=store) as container:
+            doc = container.read_blob_json(container.blob_ids[0])
+            self.assertNotIn('data', doc)
+            m = container.find_measurements('AM1', filter_name='i')[0]
+            np.testing.assert_array_equal(m.ablob.mag.value,
+                                          np.arange(10.) * 2)
+            blob = container.get_blob(container.blob_ids[0])
+            self.assertEqual(blob.name, 'demo')
+        with JobContainer(self.path) as container:
+            with self.assertRaises(ValidateError):
+                container.get_json(container.blob_ids[0])
+
+    def test_threads(self):
+        write_job_container(self.job, self.path)
+        ids = [m.identifier for m in self.job.measurements]
+        errors = []
+        with JobContainer(self.path) as container:
+            def read():
+                try:
+                    for _ in range(20):
+                        for id_ in ids:
+                            container.get_measurement(id_)
+                except Exception as e:
+                    errors.append(e)
+            threads = [threading.Thread(target=read) for _ in range(4)]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+        self.assertEqual(errors, [])
+
+    def test_closed(self):
+        write_job_container(self.job, self.path)
+        with JobContainer(self.path) as container:
+            m = container.find_measurements('PA1', filter_name='g')[0]
+        with self.assertRaises(ValidateError):
+            m.ablob.mag
+
+    def test_not_a_container(self):
+        self.job.write_json(self.path)
+        with self.assertRaises(ValidateError):
+            JobContainer(self.path)
+
+    def test_truncated(self):
+        write_job_container(self.job, self.path)
+        with open(self.path, 'rb') as f:
+            data = f.read()
+        header = struct.Struct('<8sQQ')
+        _, index_offset, index_length = header.unpack(data[:header.size])
+        corrupt_files = [
+            # Interrupted before the header was completed
+            header.pack(MAGIC, 0, 0) + data[header.size:index_offset],
+            # Interrupted while writing the index
+            data[:index_offset + index_length // 2],
+            # Invalid index
+            header.pack(MAGIC, index_offset, 2) + data[header.size:]]
+        for corrupt in corrupt_files:
+            with open(self.path, 'wb') as f:
+                f.write(corrupt)
+            with self.assertRaises(ValidateError):
+                JobContainer(self.path)
+
+
+if __name__ == "__main__":
+    unittest.main()
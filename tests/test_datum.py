@@ -2,9 +2,14 @@
 # See COPYRIGHT file at the top of the source tree.
 from __future__ import print_function
 
+import json
+import pickle
+import tracemalloc
 import unittest
 
+import numpy as np
 import astropy.units as u
+from astropy.utils.masked import Masked
 
 from lsst.validate.base import Datum
 
@@ -164,6 +169,81 @@ class DatumTestCase(unittest.TestCase):
         self.assertEqual(d.unit_str, dj['unit'])
         self.assertEqual(d.label, dj['label'])
         self.assertEqual(d.description, dj['description'])
+        # scalars have no array fields
+        self.assertNotIn('dtype', dj)
+        self.assertNotIn('mask', dj)
+
+    def test_array_dtype_json(self):
+        """Array dtypes and shapes survive a JSON round trip."""
+        for dtype in ('float32', 'int16', 'float64', 'bool'):
+            q = u.Quantity(np.arange(6).reshape(2, 3), u.mag, dtype=dtype)
+            dj = json.loads(json.dumps(Datum(q).json))
+            self.assertEqual(dj['dtype'], dtype)
+            self.assertEqual(dj['shape'], [2, 3])
+            q2 = Datum.from_json(dj).quantity
+            self.assertEqual(q2.dtype, np.dtype(dtype))
+            self.assertEqual(q2.shape, (2, 3))
+            self.assertEqual(q2.unit, u.mag)
+            np.testing.assert_array_equal(q2.value, q.value)
+
+        # shapes are kept even without elements
+        dj = Datum(np.zeros((0, 3)) * u.m).json
+        self.assertEqual(Datum.from_json(dj).quantity.shape, (0, 3))
+
+    def test_masked_json(self):
+        """Masks survive a JSON round trip."""
+        q = Masked(np.array([1., 2., 3.], dtype='float32') * u.s,
+                   mask=[False, True, False])
+        d = Datum(q, label='t')
+        self.assertEqual(d.unit, u.s)
+        dj = json.loads(json.dumps(d.json))
+        self.assertEqual(dj['value'], [1., 2., 3.])
+        self.assertEqual(dj['mask'], [False, True, False])
+        q2 = Datum.from_json(dj).quantity
+        np.testing.assert_array_equal(q2.mask, [False, True, False])
+        np.testing.assert_array_equal(q2.unmasked.value, [1., 2., 3.])
+        self.assertEqual(q2.dtype, np.float32)
+
+    def test_no_copy(self):
+        """Datums can view the caller's array."""
+        values = np.arange(10, dtype=np.int16)
+        d = Datum(values, 'mag', copy=False)
+        self.assertTrue(np.shares_memory(d.quantity.value, values))
+        self.assertEqual(d.quantity.dtype, np.int16)
+        values[0] = 42
+        self.assertEqual(d.quantity[0], 42 * u.mag)
+
+        d = Datum(values, 'mag')
+        self.assertFalse(np.shares_memory(d.quantity.value, values))
+
+        # Lists are converted
+        d = Datum([1., 2.], 'mag', copy=False)
+        np.testing.assert_array_equal(d.quantity.value, [1., 2.])
+
+    def test_rebuild_single_allocation(self):
+        """Arrays are only allocated once when rebuilt from JSON."""
+        value = [float(v) for v in range(100000)]
+        tracemalloc.start()
+        try:
+            q = Datum._rebuild_quantity(value, 'mag')
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        self.assertEqual(q.dtype, np.float64)
+        self.assertLess(peak, 1.5 * q.nbytes)
+
+    def test_pickle_int_array(self):
+        q = u.Quantity(np.arange(5, dtype=np.int32), u.ct, dtype=np.int32)
+        d = pickle.loads(pickle.dumps(Datum(q), protocol=5))
+        self.assertEqual(d.quantity.dtype, np.int32)
+        np.testing.assert_array_equal(d.quantity.value, np.arange(5))
+
+    def test_legacy_array_json(self):
+        """Documents without array fields are still read."""
+        d = Datum.from_json({'value': [1, 2, 3], 'unit': 'mag',
+                             'label': None, 'description': None})
+        np.testing.assert_array_equal(d.quantity.value, [1., 2., 3.])
+        self.assertEqual(d.quantity.unit, u.mag)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,143 @@
+#!/usr/bin/env python
+# See COPYRIGHT file at the top of the source tree.
+from __future__ import print_function
+
+import json
+import unittest
+
+import numpy as np
+import astropy.units as u
+
+from lsst.validate.base import (BlobBase, Datum, DeserializedBlob,
+                                ValidateError, Float32Encoding,
+                                SignificantDigitsEncoding, QuantizedEncoding,
+                                EncodingPolicy, decode_array)
+
+
+class ResidualsBlob(BlobBase):
+
+    name = 'ResidualsBlob'
+
+    encoding = SignificantDigitsEncoding(4)
+
+    def __init__(self, residuals, flux, ids):
+        BlobBase.__init__(self)
+        self.register_datum('residuals', quantity=residuals)
+        self.register_datum('flux', quantity=flux,
+                            encoding=QuantizedEncoding(0.5 * u.mJy))
+        self.register_datum('ids', quantity=ids)
+
+
+def round_trip(datum):
+    doc = json.loads(json.dumps(datum.json))
+    return doc, Datum.from_json(doc)
+
+
+class EncodingTestCase(unittest.TestCase):
+    """Test array encoding policies."""
+
+    def setUp(self):
+        rng = np.random.RandomState(0)
+        self.values = rng.normal(0., 10., size=(50, 2)) * u.mmag
+
+    def test_float32(self):
+        doc, d = round_trip(Datum(self.values, encoding=Float32Encoding()))
+        self.assertEqual(doc['encoding'], {'name': 'float32'})
+        self.assertEqual(doc['dtype'], 'float32')
+        q = d.quantity
+        self.assertEqual(q.dtype, np.float32)
+        self.assertEqual(q.shape, (50, 2))
+        np.testing.assert_array_equal(
+            q.value, self.values.value.astype(np.float32))
+        self.assertIsInstance(d.encoding, Float32Encoding)
+
+    def test_significant_digits(self):
+        doc, d = round_trip(Datum(self.values,
+                                  encoding=SignificantDigitsEncoding(3)))
+        self.assertEqual(doc['encoding'],
+                         {'name': 'significant_digits', 'digits': 3})
+        for row in doc['value']:
+            for v in row:
+                self.assertLessEqual(
+                    len(repr(v).lstrip('-0.').replace('.', '')), 3)
+        np.testing.assert_allclose(d.quantity.value, self.values.value,
+                                   rtol=5e-3)
+        self.assertEqual(d.quantity.dtype, np.float64)
+
+    def test_significant_digits_special_values(self):
+        values = np.array([0., np.nan, np.inf, -1234567., 1.23456e-5])
+        doc, d = round_trip(Datum(values * u.m,
+                                  encoding=SignificantDigitsEncoding(2)))
+        np.testing.assert_array_equal(
+            d.quantity.value, [0., np.nan, np.inf, -1200000., 1.2e-5])
+
+    def test_quantized(self):
+        doc, d = round_trip(Datum(self.values,
+                                  encoding=QuantizedEncoding(0.001 * u.mag)))
+        self.assertEqual(doc['encoding']['name'], 'quantized')
+        self.assertEqual(doc['encoding']['tolerance'], 1.)
+        self.assertTrue(all(isinstance(v, int)
+                            for row in doc['value'] for v in row))
+        self.assertTrue(np.all(np.abs(d.quantity.value - self.values.value)
+                               <= 1. + 1e-9))
+        self.assertEqual(d.quantity.unit, u.mmag)
+
+        # Encoding the decoded values again is stable
+        doc2, _ = round_trip(d)
+        self.assertEqual(doc2['value'], doc['value'])
+
+    def test_quantized_non_finite(self):
+        values = np.array([1., np.nan, 2.5, np.inf], dtype=np.float32)
+        doc, d = round_trip(Datum(values * u.s,
+                                  encoding=QuantizedEncoding(0.01)))
+        self.assertEqual(doc['value'][1], None)
+        self.assertEqual(d.quantity.dtype, np.float32)
+        np.testing.assert_allclose(d.quantity.value,
+                                   [1., np.nan, 2.5, np.nan], atol=0.01)
+
+    def test_bad_policies(self):
+        with self.assertRaises(ValidateError):
+            QuantizedEncoding(0.)
+        with self.assertRaises(ValidateError):
+            SignificantDigitsEncoding(0)
+        with self.assertRaises(ValidateError):
+            EncodingPolicy.from_json({'name': 'zfp'})
+        with self.assertRaises(ValidateError):
+            decode_array([1, 2], {'name': 'zfp'})
+
+    def test_non_float_values(self):
+        """Policies do not apply to scalars and non-float arrays."""
+        encoding = QuantizedEncoding(1.)
+        doc, d = round_trip(Datum(np.arange(3) * u.Quantity(1, dtype=int),
+                                  encoding=encoding))
+        self.assertNotIn('encoding', doc)
+        self.assertEqual(d.quantity.dtype.kind, 'i')
+        doc, d = round_trip(Datum(1.2345 * u.mag, encoding=encoding))
+        self.assertEqual(doc['value'], 1.2345)
+
+    def test_blob_encoding(self):
+        ids = u.Quantity(np.arange(50), dtype=int)
+        flux = np.linspace(10., 20., 50) * u.mJy
+        blob = ResidualsBlob(self.values, flux, ids)
+        doc = json.loads(json.dumps(blob.json))
+        data = doc['data']
+        self.assertEqual(data['residuals']['encoding']['digits'], 4)
+        self.assertEqual(data['flux']['encoding']['name'], 'quantized')
+        self.assertNotIn('encoding', data['ids'])
+
+        blob2 = DeserializedBlob.from_json(doc)
+        np.testing.assert_allclose(blob2.residuals.value, self.values.value,
+                                   rtol=5e-4)
+        self.assertTrue(np.all(np.abs(blob2.flux - flux) <= 0.5 * u.mJy))
+        np.testing.assert_array_equal(blob2.ids.value, np.arange(50))
+
+        # Full precision is kept without a policy
+        blob.encoding = None
+        blob.datums['flux'].encoding = None
+        data = json.loads(json.dumps(blob.json))['data']
+        self.assertNotIn('encoding', data['residuals'])
+        self.assertEqual(data['flux']['value'], flux.value.tolist())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,104 @@
+#!/usr/bin/env python
+# See COPYRIGHT file at the top of the source tree.
+from __future__ import print_function
+
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+import astropy.units as u
+
+from lsst.validate.base import (MeasurementBase, Metric,
+                                MeasurementExecutor, MeasurementTask,
+                                ValidateError)
+
+from demo import DemoBlob
+
+
+class SumMeasurement(MeasurementBase):
+    """Measurement of the sum of its inputs' quantities, plus an offset."""
+
+    def __init__(self, name, offset, **inputs):
+        MeasurementBase.__init__(self)
+        self.metric = Metric(name, 'Test metric', '<')
+        self.quantity = offset * u.mag
+        for m in inputs.values():
+            self.quantity += m.quantity
+        self.ablob = DemoBlob([offset, offset] * u.mag)
+
+
+def failing_measurement():
+    raise RuntimeError('Measurement failed')
+
+
+def make_tasks():
+    return [MeasurementTask('C', SumMeasurement, args=('C', 3.),
+                            requires=['A', 'B']),
+            MeasurementTask('A', SumMeasurement, args=('A', 1.)),
+            MeasurementTask('B', SumMeasurement, args=('B', 2.),
+                            requires=['A']),
+            MeasurementTask('D', SumMeasurement, args=('D', 4.))]
+
+
+class MeasurementExecutorTestCase(unittest.TestCase):
+    """Test MeasurementExecutor."""
+
+    def assertJob(self, job):
+        self.assertEqual(len(list(job.measurements)), 4)
+        self.assertEqual(len(list(job.blobs)), 4)
+        self.assertEqual(job.get_measurement('A').quantity, 1. * u.mag)
+        self.assertEqual(job.get_measurement('B').quantity, 3. * u.mag)
+        self.assertEqual(job.get_measurement('C').quantity, 7. * u.mag)
+        self.assertEqual(job.get_measurement('D').quantity, 4. * u.mag)
+        self.assertEqual(list(job.get_measurement('C').ablob.mag.value),
+                         [3., 3.])
+
+    def test_process_pool(self):
+        self.assertJob(MeasurementExecutor(max_workers=2).run(make_tasks()))
+
+    def test_executor(self):
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            executor = MeasurementExecutor(executor=pool)
+            order = [name for name, _ in executor.iter_completed(make_tasks())]
+        self.assertLess(order.index('A'), order.index('B'))
+        self.assertLess(order.index('B'), order.index('C'))
+
+    def test_instrument_threads(self):
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            job = MeasurementExecutor(executor=pool, instrument=True,
+                                      trace_memory=False,
+                                      thread_time=True).run(make_tasks())
+        for m in job.measurements:
+            self.assertGreaterEqual(m.profile.cpu_time, 0.)
+            self.assertIsNone(m.profile.peak_memory)
+
+    def test_instrument(self):
+        job = MeasurementExecutor(max_workers=2, instrument=True).run(
+            make_tasks())
+        self.assertEqual(sorted(p.metric_name for p in job.profiles),
+                         ['A', 'B', 'C', 'D'])
+        for m in job.measurements:
+            self.assertEqual(m.profile.measurement_id, m.identifier)
+            self.assertGreaterEqual(m.profile.wall_time, 0.)
+            self.assertGreaterEqual(m.profile.peak_memory, 0)
+
+    def test_failure(self):
+        tasks = make_tasks() + [MeasurementTask('E', failing_measurement)]
+        with self.assertRaises(RuntimeError):
+            MeasurementExecutor(max_workers=2).run(tasks)
+
+    def test_invalid_dependencies(self):
+        with self.assertRaises(ValidateError):
+            MeasurementExecutor().run([
+                MeasurementTask('A', SumMeasurement, requires=['missing'])])
+        with self.assertRaises(ValidateError):
+            MeasurementExecutor().run([
+                MeasurementTask('A', SumMeasurement, requires=['B']),
+                MeasurementTask('B', SumMeasurement, requires=['A'])])
+        with self.assertRaises(ValidateError):
+            MeasurementExecutor().run([
+                MeasurementTask('A', SumMeasurement),
+                MeasurementTask('A', SumMeasurement)])
+
+
+if __name__ == "__main__":
+    unittest.main()
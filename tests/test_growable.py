@@ -0,0 +1,125 @@
+#!/usr/bin/env python
+# See COPYRIGHT file at the top of the source tree.
+from __future__ import print_function
+
+import json
+import pickle
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+import astropy.units as u
+
+from lsst.validate.base import (BlobBase, Datum, DeserializedBlob,
+                                GrowableDatum, ValidateError)
+
+
+class ResidualsBlob(BlobBase):
+
+    name = 'ResidualsBlob'
+
+    def __init__(self, residuals):
+        BlobBase.__init__(self)
+        self.register_datum('residuals', datum=residuals)
+
+
+class GrowableDatumTestCase(unittest.TestCase):
+    """Test GrowableDatum."""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_append(self):
+        d = GrowableDatum('mmag', label='residuals', capacity=4)
+        self.assertEqual(len(d), 0)
+        self.assertEqual(d.quantity.shape, (0,))
+        self.assertEqual(d.quantity.unit, u.mmag)
+
+        d.append(np.arange(3.))
+        d.append(0.003 * u.mag)  # converted into mmag
+        d.append(np.arange(10.))
+        self.assertEqual(len(d), 14)
+        self.assertEqual(d.capacity, 14)
+        d.append([1.])
+        self.assertEqual(d.capacity, 28)  # amortized doubling
+        np.testing.assert_allclose(
+            d.quantity.value,
+            np.concatenate([np.arange(3.), [3.], np.arange(10.), [1.]]))
+        self.assertEqual(d.unit, u.mmag)
+        self.assertFalse(d.is_spilled)
+
+    def test_rows(self):
+        d = GrowableDatum(u.deg, dtype=np.float32)
+        d.append(np.zeros((5, 2)))
+        d.append(np.ones((3, 2)))
+        self.assertEqual(d.quantity.shape, (8, 2))
+        self.assertEqual(d.quantity.dtype, np.float32)
+        with self.assertRaises(ValidateError):
+            d.append(np.ones((3, 3)))
+        with self.assertRaises(u.UnitConversionError):
+            d.append(np.ones((1, 2)) * u.s)
+
+    def test_finalize(self):
+        d = GrowableDatum('mmag', label='residuals', description='Residuals',
+                          capacity=100)
+        d.append(np.arange(10.))
+        datum = d.finalize()
+        self.assertIs(type(datum), Datum)
+        self.assertEqual(datum.label, 'residuals')
+        self.assertEqual(datum.description, 'Residuals')
+        np.testing.assert_array_equal(datum.quantity.value, np.arange(10.))
+        self.assertEqual(d.capacity, 10)
+        self.assertTrue(np.shares_memory(datum.quantity.value,
+                                         d.quantity.value))
+        with self.assertRaises(ValidateError):
+            d.append(1.)
+
+    def test_spill(self):
+        d = GrowableDatum('mmag', capacity=16, spill_threshold=1024,
+                          spill_dir=self.tmp_dir)
+        d.append(np.arange(100.))
+        self.assertFalse(d.is_spilled)
+        for i in range(10):
+            d.append(np.arange(100.) + 100. * (i + 1))
+        self.assertTrue(d.is_spilled)
+        np.testing.assert_array_equal(d.quantity.value, np.arange(1100.))
+
+        datum = d.finalize()
+        self.assertEqual(d.capacity, 1100)
+        self.assertIsInstance(d._buffer, np.memmap)
+        self.assertTrue(np.shares_memory(datum.quantity.value, d._buffer))
+        np.testing.assert_array_equal(datum.quantity.value,
+                                      np.arange(1100.))
+
+    def test_blob(self):
+        d = GrowableDatum('mmag')
+        blob = ResidualsBlob(d)
+        self.assertIs(blob.datums['residuals'], d)
+        self.assertEqual(d.label, 'residuals')
+        # Values appended after registration are serialized
+        d.append(np.arange(5.))
+        doc = json.loads(json.dumps(blob.json))
+        blob2 = DeserializedBlob.from_json(doc)
+        np.testing.assert_array_equal(blob2.residuals.value, np.arange(5.))
+        self.assertEqual(blob2.residuals.unit, u.mmag)
+
+        # Setting the blob attribute replaces the values
+        blob.residuals = np.arange(2.) * u.mag
+        np.testing.assert_array_equal(d.quantity.value, [0., 1000.])
+
+    def test_pickle(self):
+        d = GrowableDatum('mmag', label='residuals', spill_threshold=0,
+                          spill_dir=self.tmp_dir)
+        d.append(np.arange(5.))
+        d2 = pickle.loads(pickle.dumps(d))
+        self.assertIs(type(d2), Datum)
+        self.assertEqual(d2.label, 'residuals')
+        np.testing.assert_array_equal(d2.quantity.value, np.arange(5.))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,147 @@
+#!/usr/bin/env python
+# See COPYRIGHT file at the top of the source tree.
+from __future__ import print_function
+
+import threading
+import time
+import tracemalloc
+import unittest
+
+import numpy as np
+import astropy.units as u
+
+from lsst.validate.base import (MeasurementBase, Metric, Job,
+                                MeasurementProfile, ResourceMonitor,
+                                aggregate_profiles)
+
+
+class DemoMeasurement(MeasurementBase):
+    """Measurement that allocates an array while instrumented."""
+
+    def __init__(self, name, size, instrument=True):
+        MeasurementBase.__init__(self)
+        self.metric = Metric(name, 'Test metric', '<')
+        self.filter_name = 'r'
+        if instrument:
+            with self.instrument():
+                self.quantity = np.ones(size).sum() * u.mag
+        else:
+            self.quantity = np.ones(size).sum() * u.mag
+
+
+class ResourceMonitorTestCase(unittest.TestCase):
+    """Test ResourceMonitor."""
+
+    def test_monitor(self):
+        with ResourceMonitor() as monitor:
+            data = np.ones(1000000)
+        del data
+        self.assertGreater(monitor.wall_time, 0.)
+        self.assertGreaterEqual(monitor.cpu_time, 0.)
+        self.assertGreaterEqual(monitor.peak_memory, 8000000)
+        self.assertFalse(tracemalloc.is_tracing())
+
+    def test_thread_time(self):
+        monitors = {}
+
+        def monitored(thread_time):
+            with ResourceMonitor(trace_memory=False,
+                                 thread_time=thread_time) as monitor:
+                time.sleep(0.3)
+            monitors[thread_time] = monitor
+
+        threads = [threading.Thread(target=monitored, args=(thread_time,))
+                   for thread_time in (False, True)]
+        for thread in threads:
+            thread.start()
+        # Keep the process busy while the monitored threads sleep
+        end = time.perf_counter() + 0.2
+        while time.perf_counter() < end:
+            pass
+        for thread in threads:
+            thread.join()
+        self.assertGreater(monitors[False].cpu_time, 0.1)
+        self.assertLess(monitors[True].cpu_time, 0.1)
+
+    def test_no_memory(self):
+        with ResourceMonitor(trace_memory=False) as monitor:
+            pass
+        self.assertIsNone(monitor.peak_memory)
+        self.assertGreaterEqual(monitor.wall_time, 0.)
+
+    def test_already_tracing(self):
+        tracemalloc.start()
+        try:
+            with ResourceMonitor() as monitor:
+                np.ones(100000)
+            self.assertTrue(tracemalloc.is_tracing())
+        finally:
+            tracemalloc.stop()
+        self.assertGreaterEqual(monitor.peak_memory, 800000)
+
+    def test_nested(self):
+        with ResourceMonitor() as outer:
+            data = np.ones(1000000)
+            del data
+            # The inner block resets the peak of tracemalloc
+            with ResourceMonitor() as inner:
+                np.ones(100000)
+            self.assertTrue(tracemalloc.is_tracing())
+        self.assertFalse(tracemalloc.is_tracing())
+        self.assertGreaterEqual(outer.peak_memory, 8000000)
+        self.assertGreaterEqual(inner.peak_memory, 800000)
+        self.assertLess(inner.peak_memory, 8000000)
+
+
+class MeasurementProfileTestCase(unittest.TestCase):
+    """Test measurement instrumentation and Job profile serialization."""
+
+    def test_instrument(self):
+        m = DemoMeasurement('A', 100000)
+        self.assertEqual(m.profile.measurement_id, m.identifier)
+        self.assertEqual(m.profile.metric_name, 'A')
+        self.assertEqual(m.profile.filter_name, 'r')
+        self.assertGreaterEqual(m.profile.peak_memory, 800000)
+        self.assertIsNone(DemoMeasurement('B', 10, instrument=False).profile)
+
+    def test_job_json(self):
+        a = DemoMeasurement('A', 1000)
+        b = DemoMeasurement('B', 10, instrument=False)
+        job = Job(measurements=[a, b])
+        doc = job.json
+        self.assertEqual(len(doc['profile']), 1)
+        self.assertEqual(doc['profile'][0]['measurement'], a.identifier)
+
+        new_job = Job.from_json(doc)
+        new_a = new_job.get_measurement('A')
+        self.assertEqual(new_a.profile.wall_time, a.profile.wall_time)
+        self.assertEqual(new_a.profile.peak_memory, a.profile.peak_memory)
+        self.assertIsNone(new_job.get_measurement('B').profile)
+
+    def test_no_profile(self):
+        job = Job(measurements=[DemoMeasurement('A', 10, instrument=False)])
+        self.assertNotIn('profile', job.json)
+
+    def test_aggregate(self):
+        jobs = [Job(measurements=[DemoMeasurement('A', 10),
+                                  DemoMeasurement('B', 10)]),
+                Job(measurements=[DemoMeasurement('A', 10)])]
+        jobs[1].get_measurement('A').profile.wall_time = 100.
+        summary = aggregate_profiles([jobs[0], jobs[1].json])
+        self.assertEqual(list(summary), ['A', 'B'])
+        self.assertEqual(summary['A']['count'], 2)
+        self.assertGreaterEqual(summary['A']['total_wall_time'], 100.)
+        self.assertAlmostEqual(summary['A']['mean_wall_time'],
+                               summary['A']['total_wall_time'] / 2)
+        self.assertEqual(summary['B']['count'], 1)
+
+    def test_profile_json(self):
+        profile = MeasurementProfile('abc', 'A', spec_name='design',
+                                     wall_time=1., cpu_time=0.5,
+                                     peak_memory=10)
+        new_profile = MeasurementProfile.from_json(profile.json)
+        self.assertEqual(new_profile.json, profile.json)
+
+
+if __name__ == "__main__":
+    unittest.main()
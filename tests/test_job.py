@@ -1,10 +1,11 @@
 #!/usr/bin/env python
 # See COPYRIGHT file at the top of the source tree.
 from __future__ import print_function
-from builtins import zip
 
 import json
 import os
+import pickle
+import threading
 # I can't use the py.test tmpdir within the unittest framework.
 import tempfile
 import unittest
@@ -82,6 +83,20 @@ class DemoMeasurement(MeasurementBase):
                             description='Quantity extra')
 
 
+class ContentAddressedBlob(DemoBlob):
+    """Example content-addressed Blob class."""
+
+    content_addressed = True
+
+
+class SharedBlobMeasurement(DemoMeasurement):
+    """Measurement that builds its own copy of a content-addressed blob."""
+
+    def __init__(self):
+        DemoMeasurement.__init__(self)
+        self.ablob = ContentAddressedBlob()
+
+
 class JobTestCase(unittest.TestCase):
     """Test Job classes."""
 
@@ -102,6 +117,50 @@ class JobTestCase(unittest.TestCase):
         for m1, m2 in zip(self.job.measurements, job2.measurements):
             self.assertEqual(m1.quantity, m2.quantity)
 
+    def test_content_addressed_blobs(self):
+        job = Job(measurements=[SharedBlobMeasurement(),
+                                SharedBlobMeasurement()])
+        job_json = job.json
+        self.assertEqual(len(job_json['blobs']), 1)
+        blob_id = job_json['blobs'][0]['identifier']
+        for doc in job_json['measurements']:
+            self.assertEqual(doc['blobs']['ablob'], blob_id)
+
+        job2 = Job.from_json(job_json)
+        for m in job2.measurements:
+            self.assertEqual(m.ablob.identifier, blob_id)
+            self.assertEqual(m.ablob.mag, 5 * u.mag)
+
+    def test_content_addressed_blob_updated(self):
+        """Blobs that become identical after registration are serialized
+        once.
+        """
+        m1 = SharedBlobMeasurement()
+        m2 = SharedBlobMeasurement()
+        m2.ablob.mag = 6 * u.mag
+        job = Job(measurements=[m1, m2])
+        self.assertEqual(len(job.json['blobs']), 2)
+        m2.ablob.mag = 5 * u.mag
+        self.assertEqual(len(job.json['blobs']), 1)
+
+    def test_content_addressed_blob_diverged(self):
+        """Blobs that are identical when registered, and diverge later, are
+        both serialized.
+        """
+        m1 = SharedBlobMeasurement()
+        m2 = SharedBlobMeasurement()
+        job = Job(measurements=[m1, m2])
+        m2.ablob.mag = 6 * u.mag
+        job_json = job.json
+        self.assertEqual(len(job_json['blobs']), 2)
+        blob_ids = {doc['identifier'] for doc in job_json['blobs']}
+        for doc in job_json['measurements']:
+            self.assertIn(doc['blobs']['ablob'], blob_ids)
+
+        job2 = Job.from_json(job_json)
+        self.assertEqual(sorted(m.ablob.mag.value for m in job2.measurements),
+                         [5., 6.])
+
     def test_roundtrip(self):
         # Manually use temporary directories here,
         #  because I can't figure out how to get py.test tmpdir fixture
@@ -122,3 +181,51 @@ class JobTestCase(unittest.TestCase):
         # Cleanup our temp files
         os.remove(out_file_name)
         os.removedirs(tmp_dir)
+
+    def test_concurrent_registration(self):
+        measurements = [DemoMeasurement() for _ in range(200)]
+        job = Job()
+        errors = []
+
+        def register():
+            # Every thread registers every measurement
+            for m in measurements:
+                job.register_measurement(m)
+
+        def read():
+            try:
+                while not done.is_set():
+                    snapshot = list(job.measurements)
+                    blob_ids = {b.identifier for b in job.blobs}
+                    for m in snapshot:
+                        assert m.ablob.identifier in blob_ids
+                    job.json
+            except Exception as e:
+                errors.append(e)
+
+        done = threading.Event()
+        reader = threading.Thread(target=read)
+        reader.start()
+        writers = [threading.Thread(target=register) for _ in range(8)]
+        for t in writers:
+            t.start()
+        for t in writers:
+            t.join()
+        done.set()
+        reader.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(len(list(job.measurements)), 200)
+        self.assertEqual(len(list(job.blobs)), 200)
+
+    def test_snapshot_iteration(self):
+        measurements = iter(self.job.measurements)
+        self.job.register_measurement(DemoMeasurement())
+        self.assertEqual(len(list(measurements)), 1)
+        self.assertEqual(len(list(self.job.measurements)), 2)
+
+    def test_pickle(self):
+        job = pickle.loads(pickle.dumps(self.job))
+        self.assertEqual(job.json, self.job.json)
+        job.register_measurement(DemoMeasurement())
+        self.assertEqual(len(list(job.measurements)), 2)
@@ -0,0 +1,144 @@
+#!/usr/bin/env python
+# See COPYRIGHT file at the top of the source tree.
+from __future__ import print_function
+
+import json
+import unittest
+
+import numpy as np
+import astropy.units as u
+
+from lsst.validate.base import (Metric, Specification, Datum, Job,
+                                QuantizedEncoding, diff_jobs)
+
+from demo import ContentAddressedBlob, DemoMeasurement
+
+
+def make_metric(name):
+    return Metric(name, 'Test metric', '<=',
+                  specs=[Specification('design', 5., 'mmag'),
+                         Specification('minimum', 8., 'mmag')])
+
+
+class SpecMeasurement(DemoMeasurement):
+    """Measurement of a metric with specifications, with parameters."""
+
+    def __init__(self, name, value, filter_name, threshold=2. * u.arcsec,
+                 blob=None):
+        DemoMeasurement.__init__(self, value, filter_name=filter_name,
+                                 blob=blob, metric=make_metric(name))
+        self.register_parameter('threshold', threshold)
+        self.register_parameter('mode', 'fast')
+
+
+class JobDiffTestCase(unittest.TestCase):
+    """Test diff_jobs."""
+
+    def setUp(self):
+        shared = ContentAddressedBlob([1., 2.] * u.mag)
+        self.old = Job(measurements=[
+            SpecMeasurement('PA1', 4. * u.mmag, 'r', blob=shared),
+            SpecMeasurement('PA1', 4. * u.mmag, 'g'),
+            SpecMeasurement('PA2', 6. * u.mmag, 'r'),
+            SpecMeasurement('AM1', 1. * u.mmag, 'r',
+                            blob=ContentAddressedBlob([3.] * u.mag))])
+        self.new = Job(measurements=[
+            # Same value, in another unit
+            SpecMeasurement('PA1', 0.004 * u.mag, 'r', blob=shared),
+            # Fails the design spec now
+            SpecMeasurement('PA1', 6. * u.mmag, 'g'),
+            # Parameter changed, in an equivalent unit for the first one
+            SpecMeasurement('PA2', 6. * u.mmag, 'r',
+                            threshold=3. * u.arcsec),
+            SpecMeasurement('PF1', 1. * u.mmag, 'r',
+                            blob=ContentAddressedBlob([4.] * u.mag))])
+
+    def assertDiff(self, diff):
+        self.assertEqual(diff.added, [('PF1', None, 'r')])
+        self.assertEqual(diff.removed, [('AM1', None, 'r')])
+        self.assertEqual(len(diff.measurements), 3)
+        self.assertEqual(len(diff.blobs_added), 1)
+        self.assertEqual(len(diff.blobs_removed), 1)
+
+        by_key = {d.key: d for d in diff.measurements}
+        pa1_r = by_key[('PA1', None, 'r')]
+        self.assertFalse(pa1_r.changed)
+        self.assertAlmostEqual(pa1_r.delta.to(u.mmag).value, 0.)
+
+        pa1_g = by_key[('PA1', None, 'g')]
+        self.assertTrue(pa1_g.value_changed)
+        self.assertEqual(pa1_g.delta, 2. * u.mmag)
+        self.assertEqual(pa1_g.spec_flips, {'design': (True, False)})
+        self.assertEqual(diff.spec_flips, [pa1_g])
+
+        pa2 = by_key[('PA2', None, 'r')]
+        self.assertFalse(pa2.value_changed)
+        self.assertEqual(list(pa2.parameter_changes), ['threshold'])
+        self.assertEqual(pa2.parameter_changes['threshold'],
+                         (2. * u.arcsec, 3. * u.arcsec))
+
+        self.assertEqual(len(diff.changed), 2)
+        json.dumps(diff.json)
+
+    def test_jobs(self):
+        self.assertDiff(diff_jobs(self.old, self.new))
+
+    def test_json(self):
+        self.assertDiff(diff_jobs(self.old.json, self.new.json))
+
+    def test_mixed(self):
+        self.assertDiff(diff_jobs(json.loads(json.dumps(self.old.json)),
+                                  self.new))
+
+    def test_identical(self):
+        diff = diff_jobs(self.old, self.old.json)
+        self.assertEqual(diff.changed, [])
+        self.assertEqual(diff.added, [])
+        self.assertEqual(diff.removed, [])
+        self.assertEqual(diff.blobs_added, {})
+
+    def test_array_values(self):
+        old = Job(measurements=[
+            SpecMeasurement('PA1', [1., 2.] * u.mmag, 'r')])
+        new = Job(measurements=[
+            SpecMeasurement('PA1', [1., 2., 3.] * u.mmag, 'r')])
+        diff = diff_jobs(old, new)
+        m = diff.measurements[0]
+        self.assertTrue(m.value_changed)
+        self.assertIsNone(m.delta)
+        self.assertEqual(m.spec_flips, {})
+        json.dumps(diff.json)
+
+        diff = diff_jobs(old, old.json)
+        self.assertEqual(diff.changed, [])
+        np.testing.assert_array_equal(diff.measurements[0].delta,
+                                      [0., 0.] * u.mmag)
+
+    def test_encoded_parameters(self):
+        def make_job(offsets):
+            m = SpecMeasurement('PA1', 4. * u.mmag, 'r')
+            m.register_parameter('offsets', datum=Datum(
+                offsets, encoding=QuantizedEncoding(0.01 * u.arcsec)))
+            return Job(measurements=[m])
+
+        # Both arrays are encoded as the same integer codes, with different
+        # offsets
+        old = make_job([10., 10.5, 11.] * u.arcsec)
+        new = make_job([20., 20.5, 21.] * u.arcsec)
+        diff = diff_jobs(json.loads(json.dumps(old.json)),
+                         json.loads(json.dumps(new.json)))
+        changes = diff.measurements[0].parameter_changes
+        self.assertEqual(list(changes), ['offsets'])
+        old_offsets, new_offsets = changes['offsets']
+        self.assertEqual(old_offsets.unit, u.arcsec)
+        self.assertLess(abs(old_offsets - [10., 10.5, 11.] * u.arcsec).max(),
+                        0.01 * u.arcsec)
+        self.assertLess(abs(new_offsets - [20., 20.5, 21.] * u.arcsec).max(),
+                        0.01 * u.arcsec)
+
+        diff = diff_jobs(old.json, json.loads(json.dumps(old.json)))
+        self.assertEqual(diff.changed, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,152 @@
+#!/usr/bin/env python
+# See COPYRIGHT file at the top of the source tree.
+from __future__ import print_function
+
+import json
+import os
+import tempfile
+import unittest
+
+import astropy.units as u
+
+from lsst.validate.base import (Metric, Job, JobStore, Specification,
+                                ValidateError)
+
+from demo import DemoBlob, DemoMeasurement
+
+
+class PA1Measurement(DemoMeasurement):
+    """Measurement of a PA1 metric, with a parameter and an extra."""
+
+    def __init__(self, value, filter_name=None, blob=None):
+        DemoMeasurement.__init__(
+            self, value, filter_name=filter_name, blob=blob,
+            metric=Metric('PA1', 'Test metric', '<=',
+                          specs=[Specification('design', 5., 'mmag')]))
+        self.register_parameter('num_random_shuffles', 50,
+                                description='Shuffles')
+        self.register_extra('rms', quantity=3. * u.mmag, description='RMS')
+
+
+class JobStoreTestCase(unittest.TestCase):
+    """Test the SQLite-backed JobStore."""
+
+    def setUp(self):
+        self.store = JobStore()
+        self.blob = DemoBlob()
+        self.jobs = {}
+        for i, day in enumerate(('2017-01-01', '2017-02-01', '2017-03-01')):
+            job = Job(measurements=[
+                PA1Measurement((i + 1.) * u.mmag, filter_name='r',
+                               blob=self.blob),
+                PA1Measurement((i + 10.) * u.mmag, filter_name='g')])
+            self.jobs[day] = job
+            self.store.ingest(job, job_id=day, run_time=day)
+
+    def tearDown(self):
+        self.store.close()
+
+    def test_job_ids(self):
+        self.assertEqual(self.store.job_ids,
+                         ['2017-01-01', '2017-02-01', '2017-03-01'])
+
+    def test_duplicate_job(self):
+        with self.assertRaises(ValidateError):
+            self.store.ingest(self.jobs['2017-01-01'], job_id='2017-01-01')
+
+    def test_same_job_under_new_id(self):
+        # The measurements keep their identifiers in both copies
+        self.store.ingest(self.jobs['2017-01-01'].json, job_id='copy',
+                          run_time='2017-06-01')
+        rows = self.store.query_values('PA1', filter_name='r',
+                                       since='2017-05-01')
+        self.assertEqual([(r[0], r[5]) for r in rows], [('copy', 1.)])
+        m = self.store.query_measurements('PA1', filter_name='r',
+                                          job_id='copy')[0]
+        self.assertEqual(m.num_random_shuffles, 50)
+        self.assertEqual(m.ablob.identifier, self.blob.identifier)
+        self.assertEqual(len(list(self.store.get_job('copy').measurements)),
+                         2)
+        self.assertEqual(
+            len(self.store.query_measurements('PA1', filter_name='r')), 4)
+
+    def test_query_values(self):
+        rows = self.store.query_values('PA1', filter_name='r',
+                                       since='2017-01-15')
+        self.assertEqual([r[0] for r in rows], ['2017-02-01', '2017-03-01'])
+        self.assertEqual([r[5] for r in rows], [2., 3.])
+        self.assertEqual(rows[0][6], 'mmag')
+        self.assertEqual(list(self.store.iter_values('PA1', filter_name='r',
+                                                     since='2017-01-15')),
+                         rows)
+
+    def test_query_measurements(self):
+        measurements = self.store.query_measurements('PA1', filter_name='g',
+                                                     until='2017-02-01')
+        self.assertEqual(len(measurements), 1)
+        m = measurements[0]
+        self.assertEqual(m.quantity, 10. * u.mmag)
+        self.assertEqual(m.filter_name, 'g')
+        self.assertEqual(m.metric.name, 'PA1')
+        self.assertEqual(m.metric.get_spec('design').quantity, 5. * u.mmag)
+        self.assertEqual(m.num_random_shuffles, 50)
+        self.assertEqual(m.rms, 3. * u.mmag)
+        self.assertFalse(m.check_spec('design'))
+
+    def test_linked_blobs(self):
+        m = self.store.query_measurements('PA1', filter_name='r')[0]
+        self.assertEqual(m.ablob.identifier, self.blob.identifier)
+        self.assertEqual(list(m.ablob.mag), list(self.blob.mag))
+
+        m = self.store.query_measurements('PA1', filter_name='r',
+                                          load_blobs=False)[0]
+        self.assertEqual(m.blobs, {})
+
+    def test_shared_blob_stored_once(self):
+        count = self.store._conn.execute(
+            'SELECT COUNT(*) FROM blobs').fetchone()[0]
+        self.assertEqual(count, 1)
+
+    def test_content_addressed_blobs_across_jobs(self):
+        for day in ('2017-04-01', '2017-05-01'):
+            blob = DemoBlob()
+            blob.content_addressed = True
+            self.store.ingest(Job(measurements=[
+                PA1Measurement(1. * u.mmag, filter_name='i', blob=blob)]),
+                job_id=day, run_time=day)
+        count = self.store._conn.execute(
+            'SELECT COUNT(*) FROM blobs').fetchone()[0]
+        self.assertEqual(count, 2)
+        self.assertEqual(
+            len(list(self.store.get_job('2017-05-01').blobs)), 1)
+
+    def test_get_job(self):
+        job = self.store.get_job('2017-02-01')
+        original = self.jobs['2017-02-01']
+        self.assertEqual(len(list(job.measurements)), 2)
+        self.assertEqual(len(list(job.blobs)), 1)
+        self.assertEqual(job.get_measurement('PA1', filter_name='r').quantity,
+                         original.get_measurement('PA1',
+                                                  filter_name='r').quantity)
+
+        with self.assertRaises(ValidateError):
+            self.store.get_job('missing')
+
+    def test_ingest_file(self):
+        tmp_dir = tempfile.mkdtemp()
+        path = os.path.join(tmp_dir, 'nightly.json')
+        self.jobs['2017-01-01'].write_json(path)
+
+        with JobStore(os.path.join(tmp_dir, 'jobs.sqlite3')) as store:
+            job_id = store.ingest_file(path)
+            self.assertEqual(job_id, 'nightly')
+            self.assertEqual(store.get_job_json('nightly')['measurements'],
+                             json.load(open(path))['measurements'])
+
+        os.remove(path)
+        os.remove(os.path.join(tmp_dir, 'jobs.sqlite3'))
+        os.removedirs(tmp_dir)
+
+
+if __name__ == "__main__":
+    unittest.main()
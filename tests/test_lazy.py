@@ -0,0 +1,62 @@
+#!/usr/bin/env python
+# See COPYRIGHT file at the top of the source tree.
+from __future__ import print_function
+
+import importlib
+import os
+import subprocess
+import sys
+import unittest
+
+import lsst.validate.base
+from lsst.validate.base.lazy import lazy_import, LazyModule
+
+
+class LazyImportTestCase(unittest.TestCase):
+    """Test lazy loading of submodules and dependencies."""
+
+    def test_package_names(self):
+        """Lazily loaded names match the __all__ of each submodule."""
+        for submodule, names in \
+                lsst.validate.base._SUBMODULE_NAMES.items():
+            module = importlib.import_module('lsst.validate.base.' +
+                                             submodule)
+            self.assertEqual(sorted(names), sorted(module.__all__))
+            for name in names:
+                self.assertIs(getattr(lsst.validate.base, name),
+                              getattr(module, name))
+        with self.assertRaises(AttributeError):
+            lsst.validate.base.NotAName
+
+    def test_star_import(self):
+        namespace = {}
+        exec('from lsst.validate.base import *', namespace)
+        self.assertIn('Job', namespace)
+        self.assertIn('ValidateError', namespace)
+
+    def test_no_heavy_imports(self):
+        """Importing the package and its classes doesn't import astropy,
+        numpy or yaml.
+        """
+        code = ('import sys\n'
+                'import lsst.validate.base as b\n'
+                'b.Job, b.Datum, b.Metric, b.MeasurementBase, b.BlobBase\n'
+                'print(" ".join(m for m in ("astropy", "numpy", "yaml", '
+                '"past", "future") if m in sys.modules))\n')
+        env = dict(os.environ)
+        env['PYTHONPATH'] = os.pathsep.join(sys.path)
+        output = subprocess.check_output([sys.executable, '-c', code],
+                                         env=env)
+        self.assertEqual(output.decode().strip(), '')
+
+    def test_lazy_module(self):
+        module = LazyModule('colorsys')
+        self.assertIn('lazy', repr(module))
+        self.assertEqual(module.rgb_to_hsv(0., 0., 0.), (0., 0., 0.))
+        self.assertIn('rgb_to_hsv', module.__dict__)
+        # Modules that are already imported aren't proxied
+        self.assertIs(lazy_import('os'), os)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,120 @@
+#!/usr/bin/env python
+# See COPYRIGHT file at the top of the source tree.
+from __future__ import print_function
+
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+import astropy.units as u
+
+from lsst.validate.base import MeasurementBase, Metric, MeasurementCache
+
+from demo import DemoBlob
+
+
+class CachedMeasurement(MeasurementBase):
+
+    computations = 0
+
+    def __init__(self, shuffles, cache, fingerprint=None, filter_name='r'):
+        MeasurementBase.__init__(self)
+        self.metric = Metric('PA1', 'Test metric', '<=')
+        self.filter_name = filter_name
+        self.register_parameter('num_random_shuffles', shuffles,
+                                description='Shuffles')
+        self.register_extra('rms', description='RMS')
+
+        if cache.restore(self, fingerprint):
+            return
+        CachedMeasurement.computations += 1
+        self.quantity = float(shuffles) * u.mmag
+        self.rms = 2. * shuffles * u.mmag
+        self.ablob = DemoBlob([1., 2., shuffles] * u.mag)
+        cache.save(self, fingerprint)
+
+
+class MeasurementCacheTestCase(unittest.TestCase):
+    """Test MeasurementCache."""
+
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+        self.cache = MeasurementCache(self.cache_dir)
+        CachedMeasurement.computations = 0
+
+    def tearDown(self):
+        shutil.rmtree(self.cache_dir)
+
+    def test_hit(self):
+        m1 = CachedMeasurement(50, self.cache)
+        m2 = CachedMeasurement(50, self.cache)
+        self.assertEqual(CachedMeasurement.computations, 1)
+        self.assertEqual(m2.quantity, m1.quantity)
+        self.assertEqual(m2.rms, m1.rms)
+        self.assertEqual(m2.extras['rms'].description, 'RMS')
+        self.assertEqual(list(m2.ablob.mag), list(m1.ablob.mag))
+        self.assertEqual(m2.ablob.identifier, m1.ablob.identifier)
+        self.assertEqual(m2.json['blobs'], m1.json['blobs'])
+
+    def test_key(self):
+        CachedMeasurement(50, self.cache)
+        CachedMeasurement(60, self.cache)
+        CachedMeasurement(50, self.cache, filter_name='g')
+        CachedMeasurement(50, self.cache, fingerprint='v2')
+        self.assertEqual(CachedMeasurement.computations, 4)
+        CachedMeasurement(50, self.cache, fingerprint='v2')
+        self.assertEqual(CachedMeasurement.computations, 4)
+
+    def _entry_paths(self):
+        return {os.path.join(self.cache_dir, name)
+                for name in os.listdir(self.cache_dir)}
+
+    def test_lru_eviction(self):
+        # Modification times are set explicitly, rather than relying on the
+        # resolution of the file system's clock
+        now = time.time()
+        CachedMeasurement(1, self.cache)
+        path1, = self._entry_paths()
+        os.utime(path1, (now - 300., now - 300.))
+        self.cache.max_bytes = int(2.5 * os.path.getsize(path1))
+        CachedMeasurement(2, self.cache)
+        path2, = self._entry_paths() - {path1}
+        os.utime(path2, (now - 200., now - 200.))
+        # Use entry 1 so that entry 2 is the least recently used
+        CachedMeasurement(1, self.cache)
+        self.assertGreater(os.path.getmtime(path1), now - 200.)
+        CachedMeasurement(3, self.cache)
+        self.assertEqual(len(os.listdir(self.cache_dir)), 2)
+        self.assertNotIn(path2, self._entry_paths())
+        self.assertEqual(CachedMeasurement.computations, 3)
+
+        CachedMeasurement(1, self.cache)
+        self.assertEqual(CachedMeasurement.computations, 3)
+        CachedMeasurement(2, self.cache)
+        self.assertEqual(CachedMeasurement.computations, 4)
+
+    def test_untouchable_entry(self):
+        CachedMeasurement(1, self.cache)
+
+        def utime(path, times):
+            raise OSError('Read-only file system')
+
+        os_utime = os.utime
+        os.utime = utime
+        try:
+            m = CachedMeasurement(1, self.cache)
+        finally:
+            os.utime = os_utime
+        self.assertEqual(CachedMeasurement.computations, 1)
+        self.assertEqual(m.quantity, 1. * u.mmag)
+
+    def test_clear(self):
+        CachedMeasurement(1, self.cache)
+        self.cache.clear()
+        self.assertEqual(os.listdir(self.cache_dir), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
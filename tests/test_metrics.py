@@ -1,7 +1,6 @@
 #!/usr/bin/env python
 # See COPYRIGHT file at the top of the source tree.
 from __future__ import print_function
-from builtins import zip
 
 import os
 import unittest
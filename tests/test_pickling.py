@@ -0,0 +1,131 @@
+#!/usr/bin/env python
+# See COPYRIGHT file at the top of the source tree.
+from __future__ import print_function
+
+import pickle
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+import astropy.units as u
+
+from lsst.validate.base import (Datum, Metric, Specification, BlobStore,
+                                Job, ValidateError)
+from lsst.validate.base.pickling import dumps, loads, SharedObject
+
+from demo import DemoBlob, DemoMeasurement
+
+
+def make_blob(size=1000):
+    return DemoBlob(np.arange(size) * u.mag)
+
+
+class ParametrizedMeasurement(DemoMeasurement):
+    """Measurement of a metric with specifications and parameters, with a
+    parameter and an extra of its own.
+    """
+
+    def __init__(self, blob):
+        DemoMeasurement.__init__(
+            self, 1. * u.mag, filter_name='r', blob=blob,
+            metric=Metric('A', 'Test metric', '<',
+                          specs=[Specification('design', 5., 'mag')],
+                          parameters={'p': Datum(1., 'arcsec')}))
+        self.register_parameter('threshold', 2. * u.arcsec)
+        self.register_extra('rms', 3. * u.mmag, description='RMS')
+
+
+class PicklingTestCase(unittest.TestCase):
+    """Test pickling of datums, metrics, measurements, blobs and jobs."""
+
+    def test_datum(self):
+        for q in (np.arange(5.) * u.mag, 5. * u.arcsec, 'text', True, 3,
+                  None):
+            d = Datum(q, label='label', description='description')
+            new_d = pickle.loads(pickle.dumps(d))
+            self.assertEqual(new_d.json, d.json)
+            if isinstance(q, u.Quantity):
+                self.assertEqual(type(new_d.quantity), u.Quantity)
+
+    def test_metric(self):
+        metric = ParametrizedMeasurement(make_blob()).metric
+        new_metric = pickle.loads(pickle.dumps(metric))
+        self.assertEqual(new_metric.json, metric.json)
+        self.assertEqual(new_metric.p.quantity, metric.p.quantity)
+        self.assertEqual(new_metric.get_spec('design').quantity, 5. * u.mag)
+
+    def test_measurement(self):
+        m = ParametrizedMeasurement(make_blob())
+        new_m = pickle.loads(pickle.dumps(m))
+        self.assertIsInstance(new_m, ParametrizedMeasurement)
+        self.assertEqual(new_m.json, m.json)
+        self.assertEqual(new_m.threshold, 2. * u.arcsec)
+        self.assertEqual(new_m.rms, 3. * u.mmag)
+        self.assertTrue(np.all(new_m.ablob.mag == m.ablob.mag))
+        with self.assertRaises(AttributeError):
+            new_m.missing
+
+    def test_job(self):
+        blob = make_blob()
+        job = Job(measurements=[ParametrizedMeasurement(blob),
+                                ParametrizedMeasurement(blob)])
+        new_job = pickle.loads(pickle.dumps(job))
+        self.assertEqual(new_job.json, job.json)
+        # Blobs shared by measurements stay shared
+        new_ms = list(new_job.measurements)
+        self.assertIs(new_ms[0].ablob, new_ms[1].ablob)
+
+    def test_lazy_blob(self):
+        tmp_dir = tempfile.mkdtemp()
+        try:
+            store = BlobStore(tmp_dir)
+            job = Job(measurements=[ParametrizedMeasurement(make_blob())],
+                      blob_store=store)
+            job.write_blobs()
+            new_job = Job.from_json(job.reference_json, blob_store=store)
+            blob = list(new_job.blobs)[0]
+            new_blob = pickle.loads(pickle.dumps(blob))
+            self.assertFalse(new_blob.is_loaded)
+            self.assertEqual(len(new_blob.mag), 1000)
+        finally:
+            shutil.rmtree(tmp_dir)
+
+    def test_out_of_band(self):
+        blob = make_blob(100000)
+        data, buffers = dumps(blob)
+        self.assertEqual(len(buffers), 1)
+        self.assertLess(len(data), 10000)
+        new_blob = loads(data, buffers)
+        self.assertTrue(np.shares_memory(new_blob.mag.value,
+                                         blob.mag.value))
+
+    def test_old_protocol(self):
+        with mock.patch('pickle.HIGHEST_PROTOCOL', 4):
+            with self.assertRaises(ValidateError):
+                dumps(make_blob(10))
+
+    def test_shared_object(self):
+        job = Job(measurements=[ParametrizedMeasurement(make_blob(10000))])
+        shared = SharedObject.create(job)
+        try:
+            handle = pickle.loads(pickle.dumps(shared))
+            new_job = handle.load()
+            self.assertEqual(new_job.json, job.json)
+
+            handle = pickle.loads(pickle.dumps(shared))
+            new_job = handle.load(copy=False)
+            self.assertEqual(new_job.json, job.json)
+            del new_job
+            handle.close()
+        finally:
+            shared.unlink()
+
+        shared = SharedObject.create(Datum('text'))
+        self.assertEqual(shared.load().quantity, 'text')
+        shared.unlink()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,178 @@
+#!/usr/bin/env python
+# See COPYRIGHT file at the top of the source tree.
+from __future__ import print_function
+
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+import astropy.units as u
+
+from lsst.validate.base import (BlobBase, BlobStore, Job, JobContainer,
+                                MeasurementBase, Metric, ValidateError,
+                                decimate, write_job_container)
+
+
+class SeriesBlob(BlobBase):
+
+    name = 'SeriesBlob'
+
+    def __init__(self, n):
+        BlobBase.__init__(self)
+        rng = np.random.RandomState(0)
+        self.register_datum('mjd', quantity=np.linspace(0., 100., n) * u.d)
+        self.register_datum('residuals',
+                            quantity=rng.normal(0., 10., n) * u.mmag)
+        self.register_datum('pixels', quantity=np.zeros((n, 2)) * u.pix)
+        self.register_datum('offsets', quantity=[1., 2.] * u.arcsec)
+        self.register_datum('filter_name', quantity='r')
+
+
+class SeriesMeasurement(MeasurementBase):
+
+    def __init__(self, blob):
+        MeasurementBase.__init__(self)
+        self.metric = Metric('PA1', 'Photometric repeatability', '<=')
+        self.quantity = 10. * u.mmag
+        self.series = blob
+
+
+class DecimateTestCase(unittest.TestCase):
+    """Test array decimation."""
+
+    def setUp(self):
+        self.values = np.random.RandomState(1).normal(size=10001) * u.mag
+
+    def test_uniform(self):
+        q, indices, method = decimate(self.values, size=101)
+        self.assertEqual(method, 'uniform')
+        self.assertEqual(len(q), 101)
+        self.assertEqual(indices[0], 0)
+        self.assertEqual(indices[-1], 10000)
+        np.testing.assert_array_equal(np.diff(indices), 100)
+        np.testing.assert_array_equal(q, self.values[indices])
+
+    def test_random(self):
+        q, indices, _ = decimate(self.values, size=100, method='random',
+                                 seed=3)
+        self.assertEqual(len(np.unique(indices)), 100)
+        self.assertTrue(np.all(np.diff(indices) > 0))
+        _, indices2, _ = decimate(self.values, size=100, method='random',
+                                  seed=3)
+        np.testing.assert_array_equal(indices, indices2)
+
+    def test_envelope(self):
+        values = self.values.copy()
+        values[5000] = 100. * u.mag
+        values[7] = np.nan * u.mag
+        q, indices, method = decimate(values, size=50, method='envelope')
+        self.assertEqual(method, 'envelope')
+        self.assertLessEqual(len(q), 50)
+        self.assertIn(5000, indices)
+        self.assertEqual(np.nanmax(q), 100. * u.mag)
+        self.assertEqual(np.nanmin(q), np.nanmin(values))
+        self.assertNotIn(7, indices)
+
+        # Only one-dimensional arrays are enveloped
+        _, _, method = decimate(np.zeros((100, 2)) * u.m, size=10,
+                                method='envelope')
+        self.assertEqual(method, 'uniform')
+        q, indices, method = decimate(values, size=1, method='envelope')
+        self.assertEqual(method, 'uniform')
+        self.assertEqual(len(q), 1)
+
+    def test_small_and_bad_arguments(self):
+        q, indices, _ = decimate(self.values[:10], size=10)
+        self.assertIs(indices, None)
+        self.assertEqual(len(q), 10)
+        with self.assertRaises(ValidateError):
+            decimate(self.values, method='lttb')
+        with self.assertRaises(ValidateError):
+            decimate(self.values, size=0)
+
+
+class JobPreviewTestCase(unittest.TestCase):
+    """Test Job preview documents."""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.blob = SeriesBlob(100000)
+        self.job = Job(measurements=[SeriesMeasurement(self.blob)])
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_blob_preview_json(self):
+        doc = json.loads(json.dumps(self.blob.preview_json(size=500)))
+        self.assertEqual(sorted(doc['preview']),
+                         ['mjd', 'pixels', 'residuals'])
+        info = doc['preview']['residuals']
+        self.assertEqual(info['length'], 100000)
+        self.assertEqual(len(info['indices']), 500)
+        self.assertEqual(doc['data']['residuals']['shape'], [500])
+        self.assertEqual(doc['data']['pixels']['shape'], [500, 2])
+        self.assertEqual(doc['data']['offsets']['value'], [1., 2.])
+        # Summaries of the decimated datums cover the full arrays
+        self.assertEqual(doc['summaries']['residuals']['count'], 100000)
+
+    def test_job_preview_round_trip(self):
+        path = os.path.join(self.tmp_dir, 'job.vjc')
+        write_job_container(self.job, path)
+        preview_path = os.path.join(self.tmp_dir, 'preview.json')
+        self.job.write_preview_json(preview_path, size=1000, method='random',
+                                    source='job.vjc')
+        full_size = len(json.dumps(self.job.json))
+        self.assertLess(os.path.getsize(preview_path), full_size / 20)
+
+        with open(preview_path) as f:
+            doc = json.load(f)
+        self.assertEqual(doc['preview'], {'size': 1000, 'method': 'random',
+                                          'seed': 0, 'source': 'job.vjc'})
+        with JobContainer(path) as container:
+            job2 = Job.from_json(doc, blob_store=container)
+            blob2 = job2.get_measurement('PA1').blobs['series']
+            self.assertTrue(blob2.is_preview)
+            self.assertEqual(len(blob2.residuals), 1000)
+            # Decimated columns still match
+            indices = doc['blobs'][0]['preview']['residuals']['indices']
+            np.testing.assert_array_equal(blob2.residuals,
+                                          self.blob.residuals[indices])
+            np.testing.assert_array_equal(blob2.mjd, self.blob.mjd[indices])
+            self.assertEqual(blob2.summary('residuals').count, 100000)
+
+            # A serialized preview blob is still marked as a preview
+            self.assertIn('preview', blob2.json)
+            with self.assertRaises(ValidateError):
+                blob2.preview_json()
+
+            blob2.load_full_data()
+            self.assertFalse(blob2.is_preview)
+            np.testing.assert_array_equal(blob2.residuals,
+                                          self.blob.residuals)
+
+    def test_preview_with_blob_store(self):
+        store = BlobStore(os.path.join(self.tmp_dir, 'blobs'))
+        job = Job(measurements=[SeriesMeasurement(self.blob)],
+                  blob_store=store)
+        job.write_json(os.path.join(self.tmp_dir, 'job.json'))
+        doc = json.loads(json.dumps(job.preview_json(size=100,
+                                                     method='envelope')))
+        job2 = Job.from_json(doc, blob_store=store)
+        blob2 = job2.get_measurement('PA1').blobs['series']
+        self.assertEqual(doc['blobs'][0]['preview']['pixels']['method'],
+                         'uniform')
+        self.assertLessEqual(len(blob2.residuals), 100)
+        blob2.load_full_data()
+        self.assertEqual(len(blob2.residuals), 100000)
+
+        # Without a blob store, full data cannot be loaded
+        blob3 = Job.from_json(doc).get_measurement('PA1').blobs['series']
+        with self.assertRaises(ValidateError):
+            blob3.load_full_data()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python
+# See COPYRIGHT file at the top of the source tree.
+from __future__ import print_function
+
+import json
+import unittest
+
+import astropy.units as u
+
+from lsst.validate.base import (Metric, Specification, Job,
+                                SerializationProfiler, ValidateError)
+
+from demo import DemoBlob, DemoMeasurement
+
+
+def make_measurement(name):
+    m = DemoMeasurement(1. * u.mag, blob=DemoBlob(),
+                        metric=Metric(name, 'Test metric', '<',
+                                      specs=[Specification('design', 5.,
+                                                           'mag')]))
+    m.register_parameter('threshold', 2. * u.arcsec)
+    return m
+
+
+class SerializationProfilerTestCase(unittest.TestCase):
+    """Test SerializationProfiler."""
+
+    def setUp(self):
+        self.job = Job(measurements=[make_measurement('A'),
+                                     make_measurement('B')])
+
+    def test_profile(self):
+        with SerializationProfiler(count_bytes=True) as profiler:
+            doc = self.job.json
+            Job.from_json(doc)
+
+        records = {(r['operation'], r['type'], r['metric']): r
+                   for r in profiler.records}
+        job_json = records[('json', 'Job', None)]
+        self.assertEqual(job_json['calls'], 1)
+        self.assertEqual(job_json['bytes'],
+                         len(json.dumps(doc, separators=(',', ':'))))
+        self.assertGreaterEqual(job_json['total_time'],
+                                job_json['self_time'])
+        self.assertIn(('from_json', 'Metric', 'A'), records)
+        self.assertIn(('from_json', 'Metric', 'B'), records)
+        self.assertIn(('from_json', 'DeserializedMeasurement', 'B'),
+                      records)
+        self.assertEqual(records[('json', 'DemoMeasurement', 'A')]['calls'],
+                         1)
+
+        # Self times add up to the total time of the outermost calls
+        outer = records[('json', 'Job', None)]['total_time'] + \
+            records[('from_json', 'Job', None)]['total_time']
+        self.assertAlmostEqual(
+            sum(g['self_time'] for g in profiler.by_type().values()),
+            outer)
+
+        self.assertEqual(set(profiler.by_metric()), {'A', 'B', None})
+        self.assertIn('jsonify_dict', profiler.by_operation())
+        json.dumps(profiler.json)
+        self.assertIn('DeserializedMeasurement', profiler.report())
+
+    def test_no_bytes(self):
+        with SerializationProfiler() as profiler:
+            self.job.json
+        self.assertTrue(profiler.records)
+        for record in profiler.records:
+            self.assertEqual(record['bytes'], 0)
+
+    def test_inactive(self):
+        profiler = SerializationProfiler()
+        self.job.json
+        spec = Specification('design', 5., 'mag')
+        Specification.from_json(spec.json)
+        self.assertEqual(profiler.records, [])
+
+        with profiler:
+            spec.json
+        self.assertEqual({r['operation'] for r in profiler.records},
+                         {'json', 'jsonify_dict'})
+        profiler.reset()
+        self.assertEqual(profiler.records, [])
+
+    def test_single_active(self):
+        with SerializationProfiler():
+            with self.assertRaises(ValidateError):
+                SerializationProfiler().start()
+
+
+if __name__ == "__main__":
+    unittest.main()
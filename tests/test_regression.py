@@ -0,0 +1,181 @@
+#!/usr/bin/env python
+# See COPYRIGHT file at the top of the source tree.
+from __future__ import print_function
+
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+import astropy.units as u
+
+from lsst.validate.base import (Metric, Specification, Job, JobStore,
+                                MetricSeries, detect_regressions,
+                                detect_catalog_regressions)
+
+from demo import DemoMeasurement
+
+
+def make_series(values, filter_names=None, unit=u.mmag):
+    n = len(values)
+    if filter_names is None:
+        filter_names = ['r'] * n
+    rows = [('job{0:d}'.format(i), np.datetime64('2017-01-01') +
+             np.timedelta64(i, 'D'), 'PA1', None, filter_names[i], v,
+             str(unit)) for i, v in enumerate(values)]
+    return MetricSeries.from_rows('PA1', rows)
+
+
+def make_metric(operator_str='<='):
+    return Metric('PA1', 'Photometric repeatability', operator_str,
+                  specs=[Specification('design', 5. * u.mmag,
+                                       filter_names=['r']),
+                         Specification('design', 10. * u.mmag,
+                                       filter_names=['g'])])
+
+
+class DetectRegressionsTestCase(unittest.TestCase):
+    """Test detect_regressions."""
+
+    def setUp(self):
+        rng = np.random.RandomState(0)
+        self.noise = rng.normal(0., 0.1, size=60)
+
+    def test_change_point(self):
+        values = 5. + self.noise
+        values[30:] += 2.
+        regressions = detect_regressions(make_series(values),
+                                         metric=make_metric('<='))
+        change_points = [r for r in regressions if r.kind == 'change_point']
+        self.assertEqual(len(change_points), 1)
+        r = change_points[0]
+        self.assertEqual(r.job_id, 'job30')
+        self.assertEqual(r.filter_name, 'r')
+        self.assertAlmostEqual(r.shift.to(u.mmag).value, 2., delta=0.2)
+        self.assertGreater(r.score, 4.)
+
+    def test_large_offset(self):
+        """Values with an offset much larger than their noise."""
+        rng = np.random.RandomState(1)
+        offset = 1e6
+        values = offset + rng.normal(0., 0.1, size=500)
+        change_points = [r for r in detect_regressions(make_series(values))
+                         if r.kind == 'change_point']
+        self.assertEqual(change_points, [])
+
+        values = offset + self.noise
+        values[30:] += 2.
+        change_points = [r for r in detect_regressions(make_series(values),
+                                                       metric=make_metric())
+                         if r.kind == 'change_point']
+        self.assertEqual([r.job_id for r in change_points], ['job30'])
+        self.assertAlmostEqual(change_points[0].baseline.value, offset,
+                               delta=0.1)
+        self.assertAlmostEqual(change_points[0].shift.value, 2., delta=0.2)
+
+    def test_direction(self):
+        """Improvements are not regressions."""
+        values = 5. + self.noise
+        values[30:] -= 2.
+        values[55] -= 3.
+        self.assertEqual(
+            detect_regressions(make_series(values), metric=make_metric('<=')),
+            [])
+        regressions = detect_regressions(make_series(values),
+                                         metric=make_metric('>='))
+        self.assertEqual(
+            {(r.kind, r.job_id) for r in regressions},
+            {('change_point', 'job30'), ('outlier', 'job55')})
+        # Without a metric, both directions are reported
+        self.assertTrue(detect_regressions(make_series(values)))
+
+    def test_outlier(self):
+        values = 5. + self.noise
+        values[40] += 3.
+        regressions = detect_regressions(make_series(values),
+                                         metric=make_metric())
+        self.assertEqual([(r.kind, r.job_id) for r in regressions],
+                         [('outlier', 'job40')])
+        self.assertAlmostEqual(regressions[0].value.value, values[40])
+
+    def test_groups(self):
+        """Filters are analyzed separately."""
+        values = np.concatenate([5. + self.noise, 5. + self.noise[::-1]])
+        values[45] += 3.
+        filter_names = ['r'] * 60 + ['g'] * 60
+        regressions = detect_regressions(make_series(values, filter_names),
+                                         metric=make_metric())
+        self.assertEqual([(r.kind, r.filter_name) for r in regressions],
+                         [('outlier', 'r')])
+
+    def test_spec_fraction(self):
+        values = 5. + self.noise / 100.
+        values[30:] += 0.2
+        series = make_series(values)
+        metric = make_metric()
+        self.assertTrue(detect_regressions(series, metric=metric))
+        # The shift is 4% of the design specification
+        self.assertEqual(detect_regressions(series, metric=metric,
+                                            spec_fraction=0.05), [])
+        self.assertTrue(detect_regressions(series, metric=metric,
+                                           spec_fraction=0.03))
+        self.assertEqual(detect_regressions(series, metric=metric,
+                                            min_shift=0.5 * u.mmag), [])
+
+    def test_short_history(self):
+        values = 5. + self.noise[:10]
+        self.assertEqual(detect_regressions(make_series(values)), [])
+
+    def test_json(self):
+        values = 5. + self.noise
+        values[40] += 3.
+        r = detect_regressions(make_series(values))[0]
+        doc = json.loads(json.dumps(r.json))
+        self.assertEqual(doc['kind'], 'outlier')
+        self.assertEqual(doc['value']['unit'], 'mmag')
+
+
+class DetectCatalogRegressionsTestCase(unittest.TestCase):
+    """Test detect_catalog_regressions."""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.metric = make_metric()
+        self.paths = []
+        self.store = JobStore()
+        rng = np.random.RandomState(1)
+        for i in range(60):
+            value = 5. + rng.normal(0., 0.1) + (2. if i >= 30 else 0.)
+            job = Job(measurements=[
+                DemoMeasurement(value * u.mmag, filter_name='r',
+                                metric=self.metric),
+                DemoMeasurement(8. * u.mmag, filter_name='g',
+                                metric=self.metric)])
+            path = os.path.join(self.tmp_dir, 'job{0:02d}.json'.format(i))
+            job.write_json(path)
+            os.utime(path, (i * 86400., i * 86400.))
+            self.paths.append(path)
+            self.store.ingest(job, job_id=str(i),
+                              run_time=str(np.datetime64('2017-01-01') +
+                                               np.timedelta64(i, 'D')))
+
+    def tearDown(self):
+        self.store.close()
+        shutil.rmtree(self.tmp_dir)
+
+    def test_files(self):
+        regressions = detect_catalog_regressions(
+            reversed(self.paths), [self.metric], max_workers=2)
+        self.assertEqual([(r.kind, r.job_id) for r in regressions],
+                         [('change_point', self.paths[30])])
+
+    def test_store(self):
+        regressions = detect_catalog_regressions(self.store, [self.metric])
+        self.assertEqual([(r.kind, r.job_id) for r in regressions],
+                         [('change_point', '30')])
+
+
+if __name__ == "__main__":
+    unittest.main()
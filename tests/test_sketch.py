@@ -0,0 +1,292 @@
+#!/usr/bin/env python
+# See COPYRIGHT file at the top of the source tree.
+from __future__ import print_function
+
+import datetime
+import json
+import os
+import pickle
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+import astropy.units as u
+
+from lsst.validate.base import (BlobBase, Job, JobStore, Metric,
+                                MetricSketch, QuantileSketch,
+                                SketchCollection, SketchKey, ValidateError,
+                                build_sketches)
+from lsst.validate.base import sketch as sketch_module
+
+from demo import DemoMeasurement
+
+
+class ResidualsBlob(BlobBase):
+
+    name = 'ResidualsBlob'
+
+    def __init__(self, residuals):
+        BlobBase.__init__(self)
+        self.register_datum('residuals', quantity=residuals)
+        self.register_datum('filter_name', quantity='r')
+
+
+def make_job(seed):
+    rng = np.random.RandomState(seed)
+    blob = ResidualsBlob(rng.normal(0., 10., 200) * u.mmag)
+    metric = Metric('PA1', 'Photometric repeatability', '<=')
+    return Job(measurements=[
+        DemoMeasurement(rng.uniform(5., 15.) * u.mmag,
+                        filter_name=filter_name, blob=blob, metric=metric)
+        for filter_name in 'ri'])
+
+
+class QuantileSketchTestCase(unittest.TestCase):
+    """Test QuantileSketch."""
+
+    def setUp(self):
+        rng = np.random.RandomState(0)
+        self.values = np.concatenate([rng.lognormal(0., 2., 20000),
+                                      -rng.lognormal(0., 1., 5000),
+                                      np.zeros(100)])
+
+    def check_quantiles(self, sketch, values):
+        qs = np.linspace(0., 1., 41)
+        expected = np.quantile(values, qs, method='lower')
+        estimated = sketch.quantile(qs)
+        np.testing.assert_array_less(
+            np.abs(estimated - expected),
+            sketch.relative_accuracy * np.abs(expected) + 1e-12)
+
+    def test_accuracy(self):
+        sketch = QuantileSketch(0.01)
+        sketch.add(self.values)
+        self.assertEqual(sketch.count, len(self.values))
+        self.check_quantiles(sketch, self.values)
+        self.assertLess(len(json.dumps(sketch.json)), 20000)
+
+    def test_merge(self):
+        sketches = []
+        for chunk in np.array_split(self.values, 7):
+            sketch = QuantileSketch(0.01)
+            sketch.add(chunk)
+            sketches.append(sketch)
+        merged = QuantileSketch(0.01)
+        for sketch in sketches:
+            merged.merge(sketch)
+        whole = QuantileSketch(0.01)
+        whole.add(self.values)
+        self.assertEqual(merged.json, whole.json)
+
+        with self.assertRaises(ValidateError):
+            merged.merge(QuantileSketch(0.02))
+
+    def test_collapse(self):
+        sketch = QuantileSketch(0.01, max_buckets=100)
+        sketch.add(self.values)
+        self.assertLessEqual(len(sketch.json['positive']['keys']), 100)
+        self.assertEqual(sketch.count, len(self.values))
+        # High quantiles keep their accuracy
+        expected = np.quantile(self.values, 0.99, method='lower')
+        self.assertLess(abs(sketch.quantile(0.99) - expected),
+                        0.01 * expected)
+
+    def test_json_and_empty(self):
+        sketch = QuantileSketch(0.05)
+        self.assertTrue(np.isnan(sketch.quantile(0.5)))
+        sketch.add([1., np.nan, np.inf, -3., 0.])
+        sketch2 = QuantileSketch.from_json(json.loads(json.dumps(
+            sketch.json)))
+        self.assertEqual(sketch2.count, 3)
+        np.testing.assert_array_equal(sketch2.quantile([0., 0.5, 1.]),
+                                      sketch.quantile([0., 0.5, 1.]))
+        with self.assertRaises(ValidateError):
+            sketch.quantile(1.5)
+        with self.assertRaises(ValidateError):
+            QuantileSketch(0.)
+
+
+class MetricSketchTestCase(unittest.TestCase):
+    """Test MetricSketch."""
+
+    def test_moments_and_units(self):
+        values = np.random.RandomState(1).normal(20., 3., 1000)
+        sketch = MetricSketch()
+        sketch.add(values[:600] * u.mmag)
+        other = MetricSketch()
+        other.add(values[600:] / 1000. * u.mag)
+        other.add([np.nan], unit='mag')
+        sketch.merge(other)
+
+        self.assertEqual(sketch.unit, u.mmag)
+        self.assertEqual(sketch.count, 1000)
+        self.assertEqual(sketch.n_nonfinite, 1)
+        self.assertAlmostEqual(sketch.mean.value, values.mean())
+        self.assertAlmostEqual(sketch.std.value, values.std())
+        self.assertEqual(sketch.variance.unit, u.mmag ** 2)
+        self.assertAlmostEqual(sketch.min.value, values.min())
+        self.assertAlmostEqual(sketch.max.value, values.max())
+        median = np.quantile(values, 0.5, method='lower')
+        # Rescaled buckets are within about twice the accuracy
+        self.assertLess(abs(sketch.quantile(0.5).value - median),
+                        0.02 * median)
+
+        sketch2 = MetricSketch.from_json(json.loads(json.dumps(sketch.json)))
+        self.assertEqual(sketch2.json, sketch.json)
+
+        with self.assertRaises(u.UnitConversionError):
+            sketch.add([1.], unit='s')
+
+    def test_empty(self):
+        sketch = MetricSketch('mag')
+        self.assertTrue(np.isnan(sketch.mean))
+        self.assertTrue(np.isnan(sketch.max))
+        sketch.merge(MetricSketch())
+        sketch2 = MetricSketch.from_json(json.loads(json.dumps(sketch.json)))
+        self.assertEqual(sketch2.count, 0)
+
+
+class SketchCollectionTestCase(unittest.TestCase):
+    """Test SketchCollection and build_sketches."""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.jobs = [make_job(seed) for seed in range(6)]
+        self.run_times = [datetime.datetime(2017, 1 + i // 3, 1 + i)
+                          for i in range(6)]
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_add_job(self):
+        collection = SketchCollection()
+        for job, run_time in zip(self.jobs, self.run_times):
+            collection.add_job(job, run_time=run_time, blob_datums=True)
+        key = SketchKey('PA1', None, 'r', '2017-01', None)
+        self.assertIn(key, collection)
+        self.assertEqual(collection[key].count, 3)
+        self.assertEqual(len(collection), 8)
+
+        r_values = [m.quantity.value for job in self.jobs
+                    for m in job.measurements if m.filter_name == 'r']
+        sketch = collection.select('PA1', filter_name='r')
+        self.assertEqual(sketch.count, 6)
+        self.assertAlmostEqual(sketch.mean.value, np.mean(r_values))
+        self.assertEqual(collection.select('PA1').count, 12)
+
+        residuals = collection.select('PA1', filter_name='r',
+                                      period='2017-02',
+                                      datum='ResidualsBlob.residuals')
+        self.assertEqual(residuals.count, 600)
+        self.assertEqual(residuals.unit, u.mmag)
+        self.assertEqual(collection.select('PA2').count, 0)
+
+    def test_add_job_json_matches_add_job(self):
+        collection = SketchCollection(period='year')
+        collection_json = SketchCollection(period='year')
+        for job, run_time in zip(self.jobs, self.run_times):
+            collection.add_job(job, run_time=run_time, blob_datums=True)
+            collection_json.add_job_json(json.loads(json.dumps(job.json)),
+                                         run_time=run_time.isoformat(),
+                                         blob_datums=True)
+        self.assertEqual(set(collection.keys()),
+                         set(collection_json.keys()))
+        for key, sketch in collection.items():
+            self.assertEqual(sketch.json, collection_json[key].json)
+
+    def test_integer_values(self):
+        job = Job(measurements=[DemoMeasurement(
+            1200, metric=Metric('NSources', 'Number of sources', '>='))])
+        collection = SketchCollection(period=None)
+        collection.add_job(job)
+        collection_json = SketchCollection(period=None)
+        collection_json.add_job_json(json.loads(json.dumps(job.json)))
+        key = SketchKey('NSources', None, None, None, None)
+        self.assertEqual(list(collection.keys()), [key])
+        self.assertEqual(collection[key].json, collection_json[key].json)
+        self.assertEqual(collection[key].mean, 1200. * u.dimensionless_unscaled)
+
+    def test_json_merge_and_pickle(self):
+        parts = []
+        for i in (0, 3):
+            part = SketchCollection()
+            for job, run_time in zip(self.jobs[i:i + 3],
+                                     self.run_times[i:i + 3]):
+                part.add_job(job, run_time=run_time)
+            parts.append(SketchCollection.from_json(
+                json.loads(json.dumps(part.json))))
+        merged = parts[0].merge(pickle.loads(pickle.dumps(parts[1])))
+        whole = SketchCollection()
+        for job, run_time in zip(self.jobs, self.run_times):
+            whole.add_job(job, run_time=run_time)
+        self.assertEqual(set(merged.keys()), set(whole.keys()))
+        for key in whole.keys():
+            self.assertEqual(merged[key].sketch.json, whole[key].sketch.json)
+
+        path = os.path.join(self.tmp_dir, 'sketches.json.gz')
+        merged.write_json(path)
+        self.assertEqual(SketchCollection.read_json(path).json, merged.json)
+
+        with self.assertRaises(ValidateError):
+            merged.merge(SketchCollection(period='day'))
+        with self.assertRaises(ValidateError):
+            SketchCollection(period='week')
+
+    def test_build_from_files_and_store(self):
+        paths = []
+        for i, job in enumerate(self.jobs):
+            path = os.path.join(self.tmp_dir, 'job{0}.json'.format(i))
+            job.write_json(path)
+            paths.append(path)
+        collection = build_sketches(paths, period=None, blob_datums=True,
+                                    max_workers=2)
+        self.assertEqual(collection.select('PA1').count, 12)
+        self.assertEqual(
+            collection.select('PA1', datum='ResidualsBlob.residuals').count,
+            2400)
+
+        # Files are sketched in the periods of their given run times, or
+        # without a period
+        run_times = {paths[0]: datetime.datetime(
+            2017, 1, 31, 23, tzinfo=datetime.timezone(
+                datetime.timedelta(hours=-5))),
+            paths[1]: '2017-03-05T00:00:00'}
+        collection = build_sketches(paths, run_times=run_times,
+                                    max_workers=2)
+        self.assertEqual(collection.select('PA1', period='2017-02').count, 2)
+        self.assertEqual(collection.select('PA1', period='2017-03').count, 2)
+        self.assertEqual(collection.select('PA1', period=None).count, 12)
+        self.assertEqual(
+            sum(sketch.count for key, sketch in collection.items()
+                if key.metric_name == 'PA1' and key.period is None), 8)
+
+        with JobStore() as store:
+            for job, run_time in zip(self.jobs, self.run_times):
+                store.ingest(job, run_time=run_time)
+            collection = build_sketches(store)
+            self.assertEqual(
+                collection[SketchKey('PA1', None, 'i', '2017-02',
+                                     None)].count, 3)
+
+            # Rows added in several chunks are sketched likewise
+            rows_per_chunk = sketch_module.ROWS_PER_CHUNK
+            sketch_module.ROWS_PER_CHUNK = 5
+            try:
+                chunked = build_sketches(store)
+            finally:
+                sketch_module.ROWS_PER_CHUNK = rows_per_chunk
+            self.assertEqual(set(chunked.keys()), set(collection.keys()))
+            for key, sketch in collection.items():
+                self.assertEqual(chunked[key].count, sketch.count)
+                self.assertAlmostEqual(chunked[key].mean.value,
+                                       sketch.mean.value)
+            collection = build_sketches(store, blob_datums=True)
+            self.assertEqual(
+                collection.select('PA1',
+                                  datum='ResidualsBlob.residuals').count,
+                2400)
+
+
+if __name__ == "__main__":
+    unittest.main()
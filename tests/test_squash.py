@@ -0,0 +1,111 @@
+#!/usr/bin/env python
+# See COPYRIGHT file at the top of the source tree.
+from __future__ import print_function
+
+import unittest
+
+import astropy.units as u
+
+from lsst.validate.base import (Job, SquashUploader, LocalSquashServer,
+                                SquashUploadError)
+
+from demo import DemoBlob, DemoMeasurement
+
+
+class SquashUploaderTestCase(unittest.TestCase):
+    """Test SquashUploader against a LocalSquashServer."""
+
+    def setUp(self):
+        self.job = Job(measurements=[
+            DemoMeasurement(float(i) * u.mag,
+                            blob=DemoBlob(list(range(10 * i)) * u.mag))
+            for i in range(25)])
+        self.server = LocalSquashServer()
+        self.server.start()
+
+    def tearDown(self):
+        self.server.stop()
+
+    def assertUploaded(self, job_id):
+        uploaded = self.server.jobs[job_id]
+        expected = self.job.json
+        key = lambda doc: doc['identifier']  # noqa: E731
+        self.assertEqual(sorted(uploaded['measurements'], key=key),
+                         sorted(expected['measurements'], key=key))
+        self.assertEqual(sorted(uploaded['blobs'], key=key),
+                         sorted(expected['blobs'], key=key))
+
+    def test_batched_upload(self):
+        with SquashUploader(self.server.url, max_connections=2,
+                            batch_size=4) as uploader:
+            job_id = uploader.upload(self.job)
+        self.assertUploaded(job_id)
+        # job creation + 7 measurement batches + 7 blob batches + completion
+        self.assertEqual(self.server.request_count, 16)
+        self.assertLessEqual(self.server.connection_count, 2)
+
+    def test_batch_bytes(self):
+        uploader = SquashUploader(self.server.url, max_batch_bytes=1)
+        batches = list(uploader._make_batches(self.job.json['blobs']))
+        self.assertEqual(len(batches), 25)
+
+    def test_uncompressed(self):
+        with SquashUploader(self.server.url, compress=False) as uploader:
+            job_id = uploader.upload(self.job.json)
+        self.assertUploaded(job_id)
+
+    def test_retry(self):
+        self.server.fail_requests(3)
+        with SquashUploader(self.server.url, batch_size=10,
+                            backoff_factor=0.) as uploader:
+            job_id = uploader.upload(self.job)
+        self.assertUploaded(job_id)
+
+    def test_retries_exhausted(self):
+        self.server.fail_requests(3, status=500)
+        with SquashUploader(self.server.url, max_retries=2,
+                            backoff_factor=0.) as uploader:
+            with self.assertRaises(SquashUploadError):
+                uploader.upload(self.job)
+
+    def test_client_error_not_retried(self):
+        self.server.fail_requests(1, status=400)
+        with SquashUploader(self.server.url,
+                            backoff_factor=0.) as uploader:
+            with self.assertRaises(SquashUploadError):
+                uploader.upload(self.job)
+        self.assertEqual(self.server.request_count, 1)
+
+    def test_lost_job_creation_not_retried(self):
+        # The job is created, but its response is lost: retrying would
+        # create an orphan job
+        self.server.drop_responses(1)
+        with SquashUploader(self.server.url,
+                            backoff_factor=0.) as uploader:
+            with self.assertRaises(SquashUploadError):
+                uploader.upload(self.job)
+        self.assertEqual(self.server.request_count, 1)
+        self.assertEqual(len(self.server._pending), 1)
+
+    def test_lost_batch_retried(self):
+        with SquashUploader(self.server.url,
+                            backoff_factor=0.) as uploader:
+            job_id = uploader._post('/jobs', b'{}', idempotent=False)['job_id']
+            batch = next(uploader._make_batches(self.job.json['measurements']))
+            self.server.drop_responses(1)
+            uploader._post('/jobs/{0}/measurements'.format(job_id), batch)
+        self.assertEqual(self.server.request_count, 3)
+
+    def test_negative_retries(self):
+        with self.assertRaises(ValueError):
+            SquashUploader(self.server.url, max_retries=-1)
+
+    def test_connection_error(self):
+        with SquashUploader('http://127.0.0.1:1', max_retries=1,
+                            backoff_factor=0., timeout=1.) as uploader:
+            with self.assertRaises(SquashUploadError):
+                uploader.upload(self.job)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,155 @@
+#!/usr/bin/env python
+# See COPYRIGHT file at the top of the source tree.
+from __future__ import print_function
+
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+import astropy.units as u
+from astropy.utils.masked import Masked
+
+from lsst.validate.base import (BlobBase, BlobStore, Datum, DatumSummary,
+                                DeserializedBlob, Job, JobContainer,
+                                MeasurementBase, Metric, ValidateError,
+                                write_job_container)
+
+
+class PhotometryBlob(BlobBase):
+
+    name = 'PhotometryBlob'
+
+    summarize = True
+
+    def __init__(self, residuals):
+        BlobBase.__init__(self)
+        self.register_datum('residuals', quantity=residuals)
+        self.register_datum('ids',
+                            quantity=u.Quantity(np.arange(len(residuals)),
+                                                dtype=int))
+        self.register_datum('filter_name', quantity='r')
+
+
+class PhotometryMeasurement(MeasurementBase):
+
+    def __init__(self, blob):
+        MeasurementBase.__init__(self)
+        self.metric = Metric('PA1', 'Photometric repeatability', '<=')
+        self.quantity = 10. * u.mmag
+        self.photometry = blob
+
+
+class DatumSummaryTestCase(unittest.TestCase):
+    """Test DatumSummary and blob summaries."""
+
+    def setUp(self):
+        rng = np.random.RandomState(0)
+        self.values = rng.normal(0., 10., size=1000)
+        self.values[:5] = np.nan
+        self.residuals = self.values * u.mmag
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_compute(self):
+        s = Datum(self.residuals).summarize(percentiles=(5, 50, 95), bins=10)
+        finite = self.values[np.isfinite(self.values)]
+        self.assertEqual(s.count, 995)
+        self.assertEqual(s.n_nonfinite, 5)
+        self.assertEqual(s.min, finite.min() * u.mmag)
+        self.assertEqual(s.max, finite.max() * u.mmag)
+        self.assertAlmostEqual(s.mean.value, finite.mean())
+        self.assertAlmostEqual(s.std.value, finite.std())
+        for rank in (5, 50, 95):
+            self.assertAlmostEqual(s.percentile(rank).value,
+                                   np.percentile(finite, rank))
+        counts, edges = np.histogram(finite, bins=10)
+        np.testing.assert_array_equal(s.histogram_counts, counts)
+        np.testing.assert_allclose(s.histogram_edges.value, edges)
+        self.assertEqual(s.histogram_edges.unit, u.mmag)
+
+        with self.assertRaises(ValidateError):
+            s.percentile(25)
+
+    def test_masked_and_empty(self):
+        mask = np.zeros(len(self.values), dtype=bool)
+        mask[5:100] = True
+        s = DatumSummary.compute(Masked(self.residuals, mask=mask))
+        self.assertEqual(s.count, 900)
+        self.assertEqual(s.n_nonfinite, 5)
+
+        s = DatumSummary.compute(np.array([np.nan]) * u.mag)
+        self.assertEqual(s.count, 0)
+        self.assertIsNone(s.min)
+        self.assertIsNone(s.percentile(50))
+        s2 = DatumSummary.from_json(json.loads(json.dumps(s.json)))
+        self.assertEqual(s2.n_nonfinite, 1)
+        self.assertEqual(len(s2.histogram_counts), 0)
+
+    def test_not_numeric_array(self):
+        with self.assertRaises(ValidateError):
+            Datum(1. * u.mag).summarize()
+        with self.assertRaises(ValidateError):
+            Datum('r').summarize()
+
+    def test_blob_json(self):
+        blob = PhotometryBlob(self.residuals)
+        doc = json.loads(json.dumps(blob.json))
+        self.assertEqual(sorted(doc['summaries']), ['ids', 'residuals'])
+        self.assertEqual(doc['summaries']['residuals']['unit'], 'mmag')
+
+        blob2 = DeserializedBlob.from_json(doc)
+        s = blob2.summary('residuals')
+        self.assertEqual(s.json, blob.summary('residuals').json)
+        self.assertTrue(blob2.summarize)
+
+        # Without summarize, documents have no summaries, but summaries can
+        # still be computed
+        blob.summarize = False
+        doc = blob.json
+        self.assertNotIn('summaries', doc)
+        self.assertNotIn('summaries', blob.reference_json)
+        blob2 = DeserializedBlob.from_json(doc)
+        self.assertEqual(blob2.summary('ids').max, 999)
+        with self.assertRaises(ValidateError):
+            blob2.summary('filter_name')
+        with self.assertRaises(KeyError):
+            blob2.summary('missing')
+
+    def test_reference_without_data(self):
+        """Summaries of a referenced blob are read without its data."""
+        store = BlobStore(os.path.join(self.tmp_dir, 'blobs'))
+        blob = PhotometryBlob(self.residuals)
+        job = Job(measurements=[PhotometryMeasurement(blob)],
+                  blob_store=store)
+        doc = json.loads(json.dumps(job.reference_json))
+        self.assertIn('summaries', doc['blobs'][0])
+
+        job2 = Job.from_json(doc, blob_store=store)
+        blob2 = job2.get_measurement('PA1').blobs['photometry']
+        self.assertEqual(blob2.summary('residuals').count, 995)
+        self.assertFalse(blob2.is_loaded)
+        # The reference is written again without loading the data
+        self.assertEqual(blob2.reference_json['summaries'],
+                         doc['blobs'][0]['summaries'])
+        self.assertFalse(blob2.is_loaded)
+
+    def test_container(self):
+        blob = PhotometryBlob(self.residuals)
+        job = Job(measurements=[PhotometryMeasurement(blob)])
+        path = os.path.join(self.tmp_dir, 'job.vjc')
+        write_job_container(job, path)
+        with JobContainer(path) as container:
+            m = container.find_measurements('PA1')[0]
+            blob2 = m.blobs['photometry']
+            self.assertEqual(blob2.summary('residuals').json,
+                             blob.summary('residuals').json)
+            self.assertFalse(blob2.is_loaded)
+
+
+if __name__ == "__main__":
+    unittest.main()
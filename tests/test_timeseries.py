@@ -0,0 +1,94 @@
+#!/usr/bin/env python
+# See COPYRIGHT file at the top of the source tree.
+from __future__ import print_function
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+import astropy.units as u
+
+from lsst.validate.base import (Job, JobStore, MetricSeries,
+                                extract_metric_series)
+
+from demo import DemoMeasurement
+
+
+def make_job(i):
+    return Job(measurements=[
+        DemoMeasurement((i + 1.) * u.mmag, name='PA1', filter_name='r'),
+        # units vary between jobs and must be converted
+        DemoMeasurement((i + 1.) / 1000. * u.mag, name='PA1',
+                        filter_name='g'),
+        DemoMeasurement(i * u.marcsec, name='AM1')])
+
+
+class ExtractMetricSeriesTestCase(unittest.TestCase):
+    """Test extract_metric_series and MetricSeries."""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.paths = []
+        self.store = JobStore()
+        for i in range(5):
+            job = make_job(i)
+            path = os.path.join(self.tmp_dir, 'job{0:d}.json'.format(i))
+            job.write_json(path)
+            self.paths.append(path)
+            self.store.ingest(job, job_id=str(i),
+                              run_time='2017-01-0{0:d}'.format(i + 1))
+
+    def tearDown(self):
+        self.store.close()
+        shutil.rmtree(self.tmp_dir)
+
+    def test_files(self):
+        series = extract_metric_series(self.paths, 'PA1', filter_name='r',
+                                       max_workers=2)
+        self.assertEqual(len(series), 5)
+        self.assertEqual(series.unit, u.mmag)
+        np.testing.assert_allclose(series.values, [1., 2., 3., 4., 5.])
+        self.assertEqual(list(series.job_ids), self.paths)
+        self.assertEqual(set(series.filter_names), {'r'})
+        self.assertFalse(np.any(np.isnat(series.run_times)))
+
+    def test_unit_conversion(self):
+        series = extract_metric_series(self.paths, 'PA1', unit='mmag')
+        self.assertEqual(len(series), 10)
+        np.testing.assert_allclose(series.values[series.filter_names == 'g'],
+                                   [1., 2., 3., 4., 5.])
+
+    def test_process_pool(self):
+        series = extract_metric_series(self.paths, 'AM1', max_workers=2,
+                                       use_processes=True)
+        np.testing.assert_allclose(series.values, [0., 1., 2., 3., 4.])
+
+    def test_job_store(self):
+        series = extract_metric_series(self.store, 'PA1', filter_name='g',
+                                       unit=u.mmag)
+        self.assertEqual(list(series.job_ids), ['0', '1', '2', '3', '4'])
+        np.testing.assert_allclose(series.values, [1., 2., 3., 4., 5.])
+        self.assertEqual(series.run_times[0],
+                         np.datetime64('2017-01-01T00:00:00'))
+
+    def test_missing_values(self):
+        rows = [('0', None, 'PA1', None, 'r', None, ''),
+                ('1', '2017-01-02T00:00:00', 'PA1', None, 'r', 0.002, 'mag'),
+                ('2', None, 'PA1', None, 'r', 'failed', ''),
+                ('3', None, 'PA1', None, 'r', 3., 'mmag')]
+        series = MetricSeries.from_rows('PA1', rows)
+        self.assertEqual(series.unit, u.mag)
+        np.testing.assert_allclose(series.values, [np.nan, 0.002, np.nan,
+                                                   0.003])
+        series = MetricSeries.from_rows('PA1', rows, unit='mmag')
+        np.testing.assert_allclose(series.values, [np.nan, 2., np.nan, 3.])
+
+    def test_no_matches(self):
+        series = extract_metric_series(self.paths, 'missing')
+        self.assertEqual(len(series), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()